@@ -23,6 +23,10 @@ class BaseAgent:
         """
         raise NotImplementedError("Subclass must implement get_move method")
     
+    def new_game(self):
+        """Chuẩn bị cho ván mới (xóa dữ liệu dành riêng cho ván trước nếu có)"""
+        pass
+    
     def reset_stats(self):
         """Reset thống kê"""
         self.nodes_searched = 0
@@ -0,0 +1,265 @@
+"""
+Bitbase tàn cuộc KPK / KRK / KQK (thắng / hòa) tạo bằng phân tích ngược (retrograde)
+
+Mỗi bảng ứng với Vua + một quân của bên mạnh chống Vua đơn. Vị trí được chuẩn hóa để
+bên mạnh luôn là Trắng (lật bàn cờ theo chiều dọc nếu bên mạnh là Đen), chỉ số là
+    (bên yếu đi ? 64^3 : 0) + Vua mạnh * 4096 + quân * 64 + Vua yếu
+và mỗi vị trí là 1 bit: 1 = bên mạnh thắng, 0 = hòa (hoặc vị trí không hợp lệ).
+Mỗi bảng 2 * 64^3 bit = 64 KB, lưu thô trên đĩa và được mmap khi tải.
+
+Tạo bảng: sinh trước danh sách nước đi của mọi vị trí một lần, sau đó lặp điểm bất
+động bằng NumPy (np.logical_or/and.reduceat trên từng nhóm nước đi) cho đến khi không
+còn vị trí nào đổi từ hòa sang thắng. Bảng KPK dùng KQK / KRK cho nước phong cấp.
+Không xét luật 50 nước.
+"""
+import mmap
+import os
+import random
+
+import chess
+import numpy as np
+
+from config import BITBASE_DIR
+
+
+# Tên bảng -> loại quân của bên mạnh (KQK, KRK phải tạo trước KPK)
+ENDGAMES = {'KQK': chess.QUEEN, 'KRK': chess.ROOK, 'KPK': chess.PAWN}
+TABLE_POSITIONS = 64 * 64 * 64  # Số vị trí cho mỗi bên đi
+TABLE_BYTES = 2 * TABLE_POSITIONS // 8
+
+
+def table_index(strong_to_move, strong_king, piece, weak_king):
+    """Chỉ số bit của vị trí (đã chuẩn hóa bên mạnh = Trắng)"""
+    return (0 if strong_to_move else TABLE_POSITIONS) + (strong_king << 12) + (piece << 6) + weak_king
+
+
+def _piece_attacks(piece_type, square, occupied):
+    """Bitboard ô bị quân Trắng loại piece_type trên ô square tấn công"""
+    if piece_type == chess.PAWN:
+        return chess.BB_PAWN_ATTACKS[chess.WHITE][square]
+    attacks = 0
+    if piece_type in (chess.BISHOP, chess.QUEEN):
+        attacks |= chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+    if piece_type in (chess.ROOK, chess.QUEEN):
+        attacks |= (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied] |
+                    chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied])
+    return attacks
+
+
+def generate_table(piece_type, promotions=None):
+    """
+    Tạo bitbase cho Vua + piece_type chống Vua đơn
+
+    Args:
+        piece_type: chess.PAWN / chess.ROOK / chess.QUEEN
+        promotions: Với KPK: dict {loại quân phong: mảng kết quả của generate_table}
+                    (thường là Hậu và Xe; phong Mã / Tượng luôn hòa)
+
+    Returns:
+        Mảng bool độ dài 2 * 64^3 theo table_index (True = bên mạnh thắng)
+    """
+    promotions = promotions or {}
+    n = TABLE_POSITIONS
+    win = np.zeros(2 * n, dtype=bool)
+    promotion_win = np.zeros(n, dtype=bool)
+    strong_moves, strong_counts = [], np.zeros(n, dtype=np.int32)
+    weak_moves, weak_counts = [], np.zeros(n, dtype=np.int32)
+
+    for strong_king in range(64):
+        king_zone = chess.BB_KING_ATTACKS[strong_king]
+        for piece in range(64):
+            if piece == strong_king or (piece_type == chess.PAWN and not 8 <= piece < 56):
+                continue
+            piece_bb = chess.BB_SQUARES[piece]
+            base = (strong_king << 12) | (piece << 6)
+            for weak_king in range(64):
+                weak_bb = chess.BB_SQUARES[weak_king]
+                if weak_king == piece or king_zone & weak_bb or weak_king == strong_king:
+                    continue
+                index = base | weak_king
+                occupied = chess.BB_SQUARES[strong_king] | piece_bb | weak_bb
+                piece_attacks = _piece_attacks(piece_type, piece, occupied)
+                in_check = bool(piece_attacks & weak_bb)
+
+                # Bên yếu đi: các ô Vua yếu đi được (quân trượt vẫn khống chế ô phía sau Vua)
+                guarded = king_zone | _piece_attacks(piece_type, piece, occupied & ~weak_bb)
+                escapes = chess.BB_KING_ATTACKS[weak_king] & ~guarded
+                if escapes & piece_bb:
+                    pass  # Bắt được quân không được bảo vệ -> hòa
+                elif not escapes:
+                    win[n + index] = in_check  # Chiếu hết thắng, hết nước (stalemate) hòa
+                else:
+                    for to_square in chess.scan_forward(escapes):
+                        weak_moves.append(base | to_square)
+                    weak_counts[index] = chess.popcount(escapes)
+
+                # Bên mạnh đi: không hợp lệ nếu Vua yếu đang bị chiếu
+                if in_check:
+                    continue
+                count = len(strong_moves)
+                king_targets = king_zone & ~piece_bb & ~chess.BB_KING_ATTACKS[weak_king]
+                for to_square in chess.scan_forward(king_targets):
+                    strong_moves.append(n + ((to_square << 12) | (piece << 6) | weak_king))
+                if piece_type == chess.PAWN:
+                    push = piece + 8
+                    if not occupied & chess.BB_SQUARES[push]:
+                        if push >= 56:
+                            promoted = n + ((strong_king << 12) | (push << 6) | weak_king)
+                            promotion_win[index] = any(table[promoted] for table in promotions.values())
+                        else:
+                            strong_moves.append(n + ((strong_king << 12) | (push << 6) | weak_king))
+                            if piece < 16 and not occupied & chess.BB_SQUARES[push + 8]:
+                                strong_moves.append(n + ((strong_king << 12) | ((push + 8) << 6) | weak_king))
+                else:
+                    for to_square in chess.scan_forward(piece_attacks & ~occupied):
+                        strong_moves.append(n + ((strong_king << 12) | (to_square << 6) | weak_king))
+                strong_counts[index] = len(strong_moves) - count
+
+    strong_moves = np.array(strong_moves, dtype=np.int32)
+    weak_moves = np.array(weak_moves, dtype=np.int32)
+    strong_positions = np.nonzero(strong_counts)[0]
+    weak_positions = np.nonzero(weak_counts)[0]
+    strong_starts = np.concatenate(([0], np.cumsum(strong_counts[strong_positions])[:-1]))
+    weak_starts = np.concatenate(([0], np.cumsum(weak_counts[weak_positions])[:-1]))
+
+    # Điểm bất động: bên mạnh thắng nếu CÓ nước dẫn tới vị trí thắng,
+    # bên yếu thua nếu MỌI nước đều dẫn tới vị trí thắng của bên mạnh
+    win[:n] |= promotion_win
+    wins = -1
+    while wins != np.count_nonzero(win):
+        wins = np.count_nonzero(win)
+        win[strong_positions] |= np.logical_or.reduceat(win[strong_moves], strong_starts)
+        win[n + weak_positions] = np.logical_and.reduceat(win[weak_moves], weak_starts)
+    return win
+
+
+def generate_all(directory=BITBASE_DIR, verbose=True):
+    """
+    Tạo và lưu tất cả bitbase trong ENDGAMES
+
+    Returns:
+        dict {tên bảng: số vị trí thắng}
+    """
+    os.makedirs(directory, exist_ok=True)
+    tables = {}
+    counts = {}
+    for name, piece_type in ENDGAMES.items():
+        promotions = {}
+        if piece_type == chess.PAWN:
+            promotions = {pt: tables[pt] for pt in (chess.QUEEN, chess.ROOK) if pt in tables}
+        table = generate_table(piece_type, promotions)
+        tables[piece_type] = table
+        counts[name] = int(np.count_nonzero(table))
+        np.packbits(table).tofile(os.path.join(directory, f"{name.lower()}.bin"))
+        if verbose:
+            print(f"  {name}: {counts[name]:,} vị trí thắng")
+    return counts
+
+
+class Bitbases:
+    """Các bitbase đã tạo, đọc qua mmap"""
+
+    def __init__(self, directory=BITBASE_DIR):
+        """
+        Args:
+            directory: Thư mục chứa kpk.bin / krk.bin / kqk.bin (bảng thiếu thì bỏ qua)
+        """
+        self.directory = directory
+        self._tables = {}  # loại quân -> mmap
+        for name, piece_type in ENDGAMES.items():
+            path = os.path.join(directory, f"{name.lower()}.bin")
+            if not os.path.exists(path) or os.path.getsize(path) != TABLE_BYTES:
+                continue
+            with open(path, "rb") as f:
+                self._tables[piece_type] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @classmethod
+    def open_if_exists(cls, directory=BITBASE_DIR):
+        """Tải bitbase nếu có ít nhất một bảng, ngược lại trả về None"""
+        if directory is None or not os.path.isdir(directory):
+            return None
+        bitbases = cls(directory)
+        return bitbases if bitbases._tables else None
+
+    def __len__(self):
+        return len(self._tables)
+
+    def probe(self, board):
+        """
+        Tra kết quả chính xác của vị trí
+
+        Returns:
+            1 = bên đang đi thắng, 0 = hòa, -1 = bên đang đi thua,
+            None nếu vị trí không thuộc bảng nào đã tải
+        """
+        occupied = board.occupied
+        if chess.popcount(occupied) != 3:
+            return None
+        square = chess.lsb(occupied & ~board.kings)
+        table = self._tables.get(board.piece_type_at(square))
+        if table is None:
+            return None
+        strong = bool(board.occupied_co[chess.WHITE] & chess.BB_SQUARES[square])
+        strong_king = board.king(strong)
+        weak_king = board.king(not strong)
+        if not strong:
+            # Chuẩn hóa: bên mạnh thành Trắng (lật theo chiều dọc)
+            strong_king, square, weak_king = strong_king ^ 56, square ^ 56, weak_king ^ 56
+        strong_to_move = board.turn == strong
+        index = table_index(strong_to_move, strong_king, square, weak_king)
+        if not (table[index >> 3] >> (7 - (index & 7))) & 1:
+            return 0
+        return 1 if strong_to_move else -1
+
+    def close(self):
+        """Đóng các file"""
+        for table in self._tables.values():
+            table.close()
+        self._tables = {}
+
+
+def verify_table(bitbases, piece_type, samples=1000, seed=0):
+    """
+    Kiểm tra bitbase với python-chess trên các vị trí ngẫu nhiên
+
+    Mỗi vị trí phải thỏa: chiếu hết -> thua, stalemate -> hòa, ngược lại kết quả bằng
+    max(-kết quả sau mỗi nước hợp lệ) với nước đi sinh bởi python-chess (vị trí sau
+    nước đi ra ngoài bảng, như Vua đối Vua, là hòa). Vị trí lật màu phải cho cùng kết quả.
+
+    Returns:
+        Danh sách FEN sai (rỗng nếu đúng)
+    """
+    rng = random.Random(seed)
+    errors = []
+    checked = 0
+    while checked < samples:
+        board = chess.Board(None)
+        squares = rng.sample(range(8, 56) if piece_type == chess.PAWN else range(64), 1)
+        kings = rng.sample([sq for sq in range(64) if sq != squares[0]], 2)
+        board.set_piece_at(kings[0], chess.Piece(chess.KING, chess.WHITE))
+        board.set_piece_at(kings[1], chess.Piece(chess.KING, chess.BLACK))
+        board.set_piece_at(squares[0], chess.Piece(piece_type, chess.WHITE))
+        board.turn = rng.choice((chess.WHITE, chess.BLACK))
+        if not board.is_valid():
+            continue
+        checked += 1
+
+        result = bitbases.probe(board)
+        if board.is_checkmate():
+            expected = -1
+        elif board.is_stalemate():
+            expected = 0
+        else:
+            expected = -1
+            for move in board.legal_moves:
+                board.push(move)
+                if board.is_checkmate():
+                    child = -1
+                else:
+                    child = bitbases.probe(board)
+                    child = 0 if child is None else child
+                board.pop()
+                expected = max(expected, -child)
+        if result != expected or bitbases.probe(board.mirror()) != result:
+            errors.append(board.fen())
+    return errors
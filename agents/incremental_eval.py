@@ -0,0 +1,109 @@
+"""
+Đánh giá vật chất + vị trí (Piece-Square Tables) cập nhật tăng dần
+
+Bộ tích lũy là tuple (mg, eg, white_material, black_material):
+- mg: tổng (giá trị quân + bảng vị trí) Trắng trừ Đen, Vua dùng bảng trung cuộc
+- eg: như mg nhưng Vua dùng bảng tàn cuộc
+- white_material / black_material: tổng giá trị quân (kể cả Vua) mỗi bên
+Khi đi một nước chỉ cần cộng/trừ phần thay đổi thay vì duyệt lại 64 ô.
+"""
+import chess
+from utils import get_piece_value, get_position_value, castling_squares
+
+
+# PIECE_VALUES_BY_TYPE[piece_type]
+PIECE_VALUES_BY_TYPE = [0] + [get_piece_value(chess.Piece(piece_type, chess.WHITE))
+                              for piece_type in chess.PIECE_TYPES]
+
+# PST_MG[color][piece_type][square] = giá trị quân + điểm vị trí (trung cuộc)
+# PST_EG tương tự nhưng dùng bảng tàn cuộc cho Vua
+PST_MG = [[[0] * 64 for _ in range(7)] for _ in range(2)]
+PST_EG = [[[0] * 64 for _ in range(7)] for _ in range(2)]
+for _color in chess.COLORS:
+    for _piece_type in chess.PIECE_TYPES:
+        _piece = chess.Piece(_piece_type, _color)
+        for _square in chess.SQUARES:
+            PST_MG[_color][_piece_type][_square] = \
+                get_piece_value(_piece) + get_position_value(_piece, _square, False)
+            PST_EG[_color][_piece_type][_square] = \
+                get_piece_value(_piece) + get_position_value(_piece, _square, True)
+
+
+def compute_accumulators(board):
+    """
+    Tính bộ tích lũy đầy đủ từ đầu (ở gốc cây tìm kiếm)
+
+    Returns:
+        (mg, eg, white_material, black_material)
+    """
+    mg = eg = 0
+    material = [0, 0]
+    for color in chess.COLORS:
+        sign = 1 if color == chess.WHITE else -1
+        for piece_type in chess.PIECE_TYPES:
+            for square in board.pieces(piece_type, color):
+                mg += sign * PST_MG[color][piece_type][square]
+                eg += sign * PST_EG[color][piece_type][square]
+                material[color] += PIECE_VALUES_BY_TYPE[piece_type]
+    return mg, eg, material[chess.WHITE], material[chess.BLACK]
+
+
+def update_accumulators(board, move, accumulators):
+    """
+    Bộ tích lũy sau khi đi nước `move` (gọi TRƯỚC khi push)
+
+    Args:
+        board: Bàn cờ trước khi đi
+        move: Nước đi (có thể là null move)
+        accumulators: Bộ tích lũy của vị trí hiện tại
+
+    Returns:
+        Bộ tích lũy mới
+    """
+    if not move:
+        return accumulators  # Null move: quân cờ không đổi
+
+    mg, eg, white_material, black_material = accumulators
+    us = board.turn
+    sign = 1 if us == chess.WHITE else -1
+    our_mg = PST_MG[us]
+    our_eg = PST_EG[us]
+    from_square = move.from_square
+    to_square = move.to_square
+    piece_type = board.piece_type_at(from_square)
+
+    # Nhập thành: di chuyển cả Vua lẫn Xe
+    if piece_type == chess.KING and board.is_castling(move):
+        king_to, rook_from, rook_to = castling_squares(move)
+        mg += sign * (our_mg[chess.KING][king_to] - our_mg[chess.KING][from_square] +
+                      our_mg[chess.ROOK][rook_to] - our_mg[chess.ROOK][rook_from])
+        eg += sign * (our_eg[chess.KING][king_to] - our_eg[chess.KING][from_square] +
+                      our_eg[chess.ROOK][rook_to] - our_eg[chess.ROOK][rook_from])
+        return mg, eg, white_material, black_material
+
+    new_type = move.promotion or piece_type
+    mg += sign * (our_mg[new_type][to_square] - our_mg[piece_type][from_square])
+    eg += sign * (our_eg[new_type][to_square] - our_eg[piece_type][from_square])
+    if move.promotion:
+        gained = PIECE_VALUES_BY_TYPE[new_type] - PIECE_VALUES_BY_TYPE[chess.PAWN]
+        if us == chess.WHITE:
+            white_material += gained
+        else:
+            black_material += gained
+
+    # Quân bị bắt (kể cả bắt tốt qua đường)
+    captured_type = board.piece_type_at(to_square)
+    captured_square = to_square
+    if not captured_type and piece_type == chess.PAWN and to_square == board.ep_square:
+        captured_type = chess.PAWN
+        captured_square = to_square - 8 if us == chess.WHITE else to_square + 8
+    if captured_type:
+        them = not us
+        mg += sign * PST_MG[them][captured_type][captured_square]
+        eg += sign * PST_EG[them][captured_type][captured_square]
+        if them == chess.WHITE:
+            white_material -= PIECE_VALUES_BY_TYPE[captured_type]
+        else:
+            black_material -= PIECE_VALUES_BY_TYPE[captured_type]
+
+    return mg, eg, white_material, black_material
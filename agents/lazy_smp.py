@@ -0,0 +1,105 @@
+"""
+Lazy SMP - Tìm kiếm song song nhiều tiến trình với bảng chuyển vị dùng chung
+
+Các tiến trình phụ (helper) chạy Iterative Deepening trên cùng vị trí gốc với
+tiến trình chính, độ sâu so le nhau (helper lẻ tìm sâu hơn 1 ply), và cùng đọc/ghi
+một TranspositionTable trong shared memory. Ngoài bảng chuyển vị không có đồng bộ
+nào khác: helper chỉ làm "ấm" bảng để tiến trình chính cắt tỉa nhanh hơn.
+Khi tiến trình chính xong, nó dừng các helper và chọn kết quả có độ sâu hoàn chỉnh
+lớn nhất.
+
+Helper sống suốt vòng đời của agent nên chi phí khởi động tiến trình chỉ trả một lần.
+"""
+import multiprocessing
+
+
+def _helper_loop(helper_id, tt_name, num_buckets, agent_options, tasks, results, stop_event):
+    """
+    Vòng lặp của một tiến trình helper
+
+    Nhận (board, depth, generation) từ hàng đợi tasks, tìm kiếm đến khi xong hoặc
+    stop_event được bật, rồi gửi (helper_id, độ sâu hoàn chỉnh, nước đi, số node)
+    vào hàng đợi results. Task None = kết thúc.
+    """
+    # Import trễ để tránh vòng lặp import với minimax_agent
+    from .minimax_agent import MinimaxAgent
+    from .transposition_table import TranspositionTable, GENERATION_MASK
+
+    table = TranspositionTable.attach(tt_name, num_buckets)
+    agent = MinimaxAgent(**agent_options, tt_mb=0)
+    agent.transposition_table = table
+    agent._stop_event = stop_event
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        board, depth, generation = task
+        # get_move sẽ tăng thế hệ lên đúng thế hệ của tiến trình chính
+        table.generation = (generation - 1) & GENERATION_MASK
+        agent.depth = depth
+        move = agent.get_move(board)
+        results.put((helper_id, agent.completed_depth, move, agent.nodes_searched))
+
+    table.close()
+
+
+class HelperPool:
+    """Nhóm tiến trình helper cho Lazy SMP, gắn với một bảng chuyển vị dùng chung"""
+
+    def __init__(self, transposition_table, num_helpers, agent_options):
+        """
+        Args:
+            transposition_table: Bảng chuyển vị tạo với shared=True
+            num_helpers: Số tiến trình helper (không tính tiến trình chính)
+            agent_options: Tham số khởi tạo MinimaxAgent cho helper (trừ depth, tt_mb)
+        """
+        context = multiprocessing.get_context()
+        self.num_helpers = num_helpers
+        self.stop_event = context.Event()
+        self._results = context.Queue()
+        # Mỗi helper một hàng đợi riêng để chắc chắn helper nào cũng nhận đúng một task
+        self._tasks = [context.Queue() for _ in range(num_helpers)]
+        self._processes = []
+        for helper_id in range(1, num_helpers + 1):
+            process = context.Process(
+                target=_helper_loop,
+                args=(helper_id, transposition_table.shared_name, transposition_table.num_buckets,
+                      agent_options, self._tasks[helper_id - 1], self._results, self.stop_event),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+
+    def start_search(self, board, depth, generation):
+        """
+        Cho tất cả helper bắt đầu tìm kiếm vị trí `board`
+
+        Args:
+            board: Bàn cờ gốc (kèm lịch sử nước đi để phát hiện lặp lại)
+            depth: Độ sâu của tiến trình chính; helper lẻ tìm depth + 1
+            generation: Thế hệ hiện tại của bảng chuyển vị
+        """
+        self.stop_event.clear()
+        for helper_id, tasks in enumerate(self._tasks, start=1):
+            tasks.put((board, depth + helper_id % 2, generation))
+
+    def stop(self, timeout=10.0):
+        """
+        Dừng các helper và thu kết quả
+
+        Returns:
+            Danh sách (helper_id, độ sâu hoàn chỉnh, nước đi, số node)
+        """
+        self.stop_event.set()
+        return [self._results.get(timeout=timeout) for _ in range(self.num_helpers)]
+
+    def close(self):
+        """Kết thúc các tiến trình helper"""
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
@@ -1,75 +1,552 @@
 """
 Agent sử dụng thuật toán Minimax với Alpha-Beta Pruning
 """
+import threading
+import time
+from itertools import chain
 import chess
 from .base_agent import BaseAgent
-from utils import get_piece_value, get_position_value, is_endgame
-from config import MINIMAX_DEPTH
+from . import zobrist
+from .incremental_eval import compute_accumulators, update_accumulators, PIECE_VALUES_BY_TYPE
+from .see import static_exchange, captured_piece_type
+from .transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from .lazy_smp import HelperPool
+from .root_parallel import RootMovePool
+from .opening_book import OpeningBook
+from .bitbase import Bitbases
+from .pawn_hash import PawnHashTable
+from .search_stats import IterationStats, SearchStats
+from config import MINIMAX_DEPTH, TT_SIZE_MB, PAWN_HASH_ENTRIES, OPENING_BOOK_PATH, BITBASE_DIR
+
+
+# Hệ số tăng số node giữa 2 iteration khi chưa có số liệu (sau depth 1)
+DEFAULT_ITERATION_GROWTH = 4.0
+# Số node giữa 2 lần kiểm tra đồng hồ
+BUDGET_CHECK_INTERVAL = 32
+# Nửa độ rộng Aspiration Window ban đầu; vượt quá MAX thì dùng cửa sổ đầy đủ
+ASPIRATION_WINDOW = 50
+MAX_ASPIRATION_WINDOW = 800
+# Số ply tối đa lưu killer moves và giới hạn điểm history khi sắp xếp
+MAX_PLY = 64
+HISTORY_MAX = 600
+CENTER_SQUARES = (chess.D4, chess.E4, chess.D5, chess.E5)
+
+# Tham số tìm kiếm chọn lọc
+NULL_MOVE_REDUCTION = 2      # R của null-move pruning
+NULL_MOVE_MIN_DEPTH = 3
+LMR_MIN_DEPTH = 3            # Late move reductions chỉ dùng khi còn >= 3 ply
+LMR_MIN_INDEX = 3            # ... và từ nước thứ 4 trở đi
+FUTILITY_MARGINS = (0, 200, 500)   # Theo độ sâu còn lại (1, 2)
+RAZOR_MARGINS = (0, 300, 550)
+# Delta pruning trong quiescence: biên an toàn so với stand pat. Các yếu tố vị trí
+# (mobility, tránh stalemate...) có thể đổi ~600 điểm sau một nước bắt quân nên biên phải rộng
+DELTA_MARGIN = 700
+# Điểm thắng chắc chắn theo bitbase: lớn hơn mọi điểm đánh giá, nhỏ hơn điểm chiếu hết
+BITBASE_WIN_SCORE = 100000
+
+
+def file_set(bitboard):
+    """Gộp bitboard thành 8 bit: bit i = 1 nếu cột i có ít nhất một ô được bật"""
+    bitboard |= bitboard >> 32
+    bitboard |= bitboard >> 16
+    bitboard |= bitboard >> 8
+    return bitboard & 0xFF
+
+
+def _build_pawn_masks():
+    """Mask tốt thông (vùng phía trước trên 3 cột) và mask tốt che Vua cho từng ô"""
+    white_passed, black_passed = [], []
+    white_shield, black_shield = [], []
+    for square in chess.SQUARES:
+        file = chess.square_file(square)
+        rank = chess.square_rank(square)
+        files = [f for f in (file - 1, file, file + 1) if 0 <= f < 8]
+        white_passed.append(sum(chess.BB_SQUARES[chess.square(f, r)]
+                                for f in files for r in range(rank + 1, 8)))
+        black_passed.append(sum(chess.BB_SQUARES[chess.square(f, r)]
+                                for f in files for r in range(0, rank)))
+        white_shield.append(sum(chess.BB_SQUARES[chess.square(f, rank + 1)]
+                                for f in files) if rank < 7 else 0)
+        black_shield.append(sum(chess.BB_SQUARES[chess.square(f, rank - 1)]
+                                for f in files) if rank > 0 else 0)
+    return white_passed, black_passed, white_shield, black_shield
+
+
+WHITE_PASSED_MASKS, BLACK_PASSED_MASKS, WHITE_SHIELD_MASKS, BLACK_SHIELD_MASKS = _build_pawn_masks()
+
+
+class SearchAborted(Exception):
+    """Hết thời gian / số node cho phép giữa chừng một iteration"""
+    pass
 
 
 class MinimaxAgent(BaseAgent):
     """Agent sử dụng Minimax với Alpha-Beta Pruning (Nâng cấp PRO)"""
     
-    def __init__(self, depth=MINIMAX_DEPTH):
+    def __init__(self, depth=MINIMAX_DEPTH, tt_mb=TT_SIZE_MB, time_limit=None, node_limit=None,
+                 null_move_pruning=True, late_move_reductions=True, futility_pruning=True,
+                 see_pruning=True, mobility='attacks', workers=1, root_workers=1,
+                 opening_book=OPENING_BOOK_PATH, bitbases=BITBASE_DIR,
+                 pawn_hash_entries=PAWN_HASH_ENTRIES, on_iteration=None):
+        """
+        Args:
+            depth: Độ sâu tối đa của Iterative Deepening
+            tt_mb: Dung lượng bảng chuyển vị (MB)
+            time_limit: Giới hạn thời gian mặc định cho mỗi nước (giây, None = không giới hạn)
+            node_limit: Giới hạn số node mặc định cho mỗi nước (None = không giới hạn)
+            null_move_pruning: Bật null-move pruning
+            late_move_reductions: Bật late move reductions
+            futility_pruning: Bật futility pruning + razoring ở nút gần lá
+            see_pruning: Quiescence bỏ qua nước bắt quân lỗ (SEE < 0) và dùng delta pruning
+            mobility: 'attacks' = ước lượng mobility từ bitboard tấn công (nhanh),
+                      'legal' = đếm chính xác số nước hợp lệ (bản gốc, để so sánh)
+            workers: Số tiến trình tìm kiếm song song (Lazy SMP), 1 = chỉ tiến trình chính
+            root_workers: Số tiến trình chia nhau các nước đi ở gốc (ProcessPoolExecutor),
+                          1 = tìm tuần tự; mỗi worker có bảng chuyển vị tt_mb / root_workers MB
+            opening_book: File sách khai cuộc Polyglot (.bin), None hoặc file không tồn tại
+                          = luôn tìm kiếm
+            bitbases: Thư mục bitbase tàn cuộc KPK/KRK/KQK, None hoặc chưa tạo = không dùng
+            pawn_hash_entries: Số mục bảng băm cấu trúc Tốt, 0 = tính lại mỗi lần đánh giá
+            on_iteration: Hàm gọi sau mỗi iteration hoàn chỉnh với IterationStats
+                          (không gọi khi pondering)
+        """
         super().__init__(name="Minimax Agent")
         self.depth = depth
-        self.transposition_table = {}  # Bảng băm vị trí (Transposition Table)
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.completed_depth = 0  # Độ sâu hoàn chỉnh cuối cùng của nước vừa tìm
+        self.null_move_pruning = null_move_pruning
+        self.late_move_reductions = late_move_reductions
+        self.futility_pruning = futility_pruning
+        self.see_pruning = see_pruning
+        self.mobility = mobility
+        # Bảng băm vị trí (khóa Zobrist), kích thước cố định tt_mb MB
+        # (nằm trong shared memory khi tìm kiếm nhiều tiến trình)
+        self.tt_mb = tt_mb
+        self.workers = workers
+        self.transposition_table = TranspositionTable(tt_mb, shared=workers > 1)
+        self.root_workers = root_workers
+        self._helpers = None     # HelperPool của Lazy SMP (tạo khi cần)
+        self._root_pool = None   # RootMovePool tìm song song nước đi ở gốc (tạo khi cần)
+        self.opening_book = OpeningBook.open_if_exists(opening_book)
+        self.book_hit = False    # Nước vừa trả về có lấy từ sách khai cuộc không
+        self.bitbase_dir = bitbases
+        self.bitbases = Bitbases.open_if_exists(bitbases)
+        self._probe_bitbases = False  # Tra bitbase ở các nút trong cây tìm kiếm
+        self._bitbase_root = False    # Gốc thuộc bitbase: lọc nước đi ở gốc theo bitbase
+        self.pawn_hash_entries = pawn_hash_entries
+        self.pawn_hash = PawnHashTable(pawn_hash_entries) if pawn_hash_entries else None
+        self.on_iteration = on_iteration
+        self.reset_stats()
+        
+        # Pondering: suy nghĩ trong lượt đối thủ bằng thread nền, dùng chung bảng chuyển vị
+        self._ponder_thread = None
+        self._ponder_stop = None
+        self._ponder_board = None   # Vị trí đang suy nghĩ (sau nước dự đoán của đối thủ)
+        self._ponder_result = None  # (nước đi, độ sâu hoàn chỉnh, số node)
+        self.ponder_hit = False     # Nước vừa trả về có lấy từ kết quả pondering không
+        self._stop_event = None  # Được đặt trong tiến trình helper: tín hiệu dừng từ tiến trình chính
         self.quiescence_depth_limit = 10  # Giới hạn độ sâu quiescence search
+        self.hash_stack = []  # Khóa Zobrist dọc theo đường đi hiện tại
+        self.pawn_stack = []  # Khóa Zobrist chỉ gồm Tốt dọc theo đường đi (bảng băm Tốt)
+        self.game_keys = []   # Khóa các vị trí trước gốc trong ván (phát hiện lặp lại)
+        self.eval_stack = []  # Bộ tích lũy vật chất + vị trí dọc theo đường đi
+        self._in_search = False  # True khi eval_stack khớp với bàn cờ đang tìm kiếm
+        
+        # Killer moves (2 slot mỗi ply) và history heuristic [màu][from][to]
+        self.killer_moves = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [0] * (2 * 64 * 64)
+        
+        # Trạng thái ngân sách tìm kiếm (được đặt lại trong get_move)
+        self._deadline = None
+        self._max_nodes = None
+        self._next_check = float('inf')
+    
+    def new_game(self):
+        """Ván mới: xóa bảng chuyển vị và heuristic sắp xếp của ván trước"""
+        self.stop_pondering()
+        self.transposition_table.clear()
+        if self._root_pool is not None:
+            self._root_pool.new_game()
+        self.killer_moves = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [0] * (2 * 64 * 64)
+    
+    def reset_stats(self):
+        """Reset thống kê (bộ đếm tìm kiếm, iteration, bảng băm Tốt)"""
+        super().reset_stats()
+        self.qnodes_searched = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_cutoffs = 0
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.search_time = 0.0
+        self.iterations = []
+        if self.pawn_hash is not None:
+            self.pawn_hash.reset_stats()
+    
+    def get_stats(self):
+        """
+        Thống kê của lần tìm nước đi gần nhất
+        
+        Returns:
+            SearchStats (đọc được như dict: stats['nodes_searched'], stats['pv'], ...)
+        """
+        extra = {}
+        if self.pawn_hash is not None:
+            extra['pawn_hash_probes'] = self.pawn_hash.probes
+            extra['pawn_hash_hit_rate'] = self.pawn_hash.hit_rate
+            extra['pawn_hash_time_saved'] = self.pawn_hash.time_saved
+        return SearchStats(self.name, self.nodes_searched, self.qnodes_searched, self.search_time,
+                           self.tt_probes, self.tt_hits, self.tt_cutoffs,
+                           self.beta_cutoffs, self.first_move_cutoffs, self.iterations, extra)
+    
+    def close(self):
+        """Dừng các tiến trình helper và giải phóng bảng chuyển vị dùng chung"""
+        self.stop_pondering()
+        if self._helpers is not None:
+            self._helpers.close()
+            self._helpers = None
+        if self._root_pool is not None:
+            self._root_pool.close()
+            self._root_pool = None
+        if self.opening_book is not None:
+            self.opening_book.close()
+            self.opening_book = None
+        if self.bitbases is not None:
+            self.bitbases.close()
+            self.bitbases = None
+        self.transposition_table.close()
+    
+    def _agent_options(self):
+        """Tham số khởi tạo agent cho các tiến trình tìm kiếm phụ (cùng cấu hình cắt tỉa)"""
+        return dict(null_move_pruning=self.null_move_pruning,
+                    late_move_reductions=self.late_move_reductions,
+                    futility_pruning=self.futility_pruning,
+                    see_pruning=self.see_pruning,
+                    mobility=self.mobility,
+                    opening_book=None,
+                    bitbases=self.bitbase_dir,
+                    pawn_hash_entries=self.pawn_hash_entries)
+    
+    def _ensure_helpers(self, workers):
+        """
+        Chuẩn bị các tiến trình helper cho Lazy SMP (giữ lại giữa các nước đi)
+        
+        Returns:
+            HelperPool hoặc None nếu chỉ dùng 1 tiến trình
+        """
+        if workers <= 1:
+            return None
+        if self._helpers is not None and self._helpers.num_helpers == workers - 1:
+            return self._helpers
+        if self._helpers is not None:
+            self._helpers.close()
+        if not self.transposition_table.shared:
+            self.transposition_table = TranspositionTable(self.tt_mb, shared=True)
+        self._helpers = HelperPool(self.transposition_table, workers - 1, self._agent_options())
+        return self._helpers
+    
+    def _ensure_root_pool(self, root_workers):
+        """
+        Chuẩn bị pool tìm song song nước đi ở gốc (giữ lại giữa các nước đi và các ván)
+        
+        Returns:
+            RootMovePool hoặc None nếu tìm tuần tự
+        """
+        if root_workers <= 1:
+            return None
+        if self._root_pool is not None and self._root_pool.num_workers == root_workers:
+            return self._root_pool
+        if self._root_pool is not None:
+            self._root_pool.close()
+        # Chia dung lượng bảng chuyển vị cho các worker để tổng bộ nhớ vẫn khoảng tt_mb
+        worker_tt_mb = max(1, self.tt_mb // root_workers)
+        self._root_pool = RootMovePool(root_workers, dict(self._agent_options(), tt_mb=worker_tt_mb))
+        return self._root_pool
+    
+    def start_pondering(self, board):
+        """
+        Bắt đầu suy nghĩ trong lượt đối thủ (thread nền)
+        
+        Nếu bảng chuyển vị có nước đáp trả dự đoán của đối thủ thì tìm vị trí sau nước đó;
+        nếu không thì tìm chính vị trí hiện tại để làm "ấm" bảng chuyển vị cho mọi nước
+        đáp trả. Lần get_move tiếp theo sẽ dừng thread và dùng lại kết quả.
+        
+        Args:
+            board: Bàn cờ khi đến lượt đối thủ (không bị thay đổi)
+        """
+        self.stop_pondering()
+        board = board.copy()
+        if board.is_game_over():
+            return
+        entry = self.transposition_table.probe(zobrist.compute_key(board))
+        if entry is not None and entry.best_move is not None and board.is_legal(entry.best_move):
+            board.push(entry.best_move)
+            if board.is_game_over():
+                return
+        
+        self._ponder_board = board
+        self._ponder_result = None
+        self._ponder_stop = threading.Event()
+        self._ponder_thread = threading.Thread(target=self._ponder, args=(board,), daemon=True)
+        self._ponder_thread.start()
     
-    def order_moves(self, board, moves, best_move_hint=None):
+    def _ponder(self, board):
+        """Thân thread pondering: tìm kiếm không giới hạn cho đến khi bị dừng"""
+        self._stop_event = self._ponder_stop
+        try:
+            # Không giới hạn thời gian / số node: chỉ dừng khi xong self.depth hoặc stop_pondering
+            move = self.get_move(board, time_limit=float('inf'), node_limit=float('inf'))
+            self._ponder_result = (move, self.completed_depth, self.nodes_searched)
+        finally:
+            self._stop_event = None
+    
+    def stop_pondering(self):
+        """Dừng thread pondering (nếu có) và chờ nó kết thúc"""
+        if self._ponder_thread is None:
+            return
+        self._ponder_stop.set()
+        self._ponder_thread.join()
+        self._ponder_thread = None
+    
+    def _finish_pondering(self, board):
+        """
+        Dừng pondering khi đến lượt mình
+        
+        Returns:
+            Nước đi tìm được khi đối thủ đi đúng nước dự đoán và pondering đã đạt
+            đủ self.depth, ngược lại None (bảng chuyển vị vẫn được dùng lại)
+        """
+        pondered_board = self._ponder_board
+        self.stop_pondering()
+        self._ponder_board = None
+        result, self._ponder_result = self._ponder_result, None
+        if result is None or pondered_board is None or pondered_board.fen() != board.fen():
+            return None
+        move, depth, nodes = result
+        if move is None or depth < self.depth or move not in board.legal_moves:
+            return None
+        self.nodes_searched = nodes
+        self.completed_depth = depth
+        return move
+    
+    def set_root(self, board):
+        """Đặt gốc cây tìm kiếm: tính khóa Zobrist và bộ tích lũy đánh giá từ đầu"""
+        self.hash_stack = [zobrist.compute_key(board)]
+        self.pawn_stack = [zobrist.pawn_key(board)]
+        self.game_keys = zobrist.history_keys(board)
+        self.eval_stack = [compute_accumulators(board)]
+        # Gốc KRK / KQK: chỉ lọc nước đi ở gốc (get_move), cây tìm kiếm không tra bitbase
+        # để tìm được chiếu hết; các trường hợp khác (kể cả KPK: thắng sau phong cấp được
+        # cộng giá trị Hậu) tra bitbase ở các nút trong cây
+        self._bitbase_root = self.bitbases is not None and self.bitbases.probe(board) is not None
+        self._probe_bitbases = self.bitbases is not None and \
+            (not self._bitbase_root or bool(board.pawns))
+    
+    def make_move(self, board, move):
+        """
+        Đi nước trong cây tìm kiếm, cập nhật tăng dần khóa Zobrist (cả khóa Tốt)
+        và bộ tích lũy vật chất + vị trí
+        
+        Args:
+            board: Bàn cờ hiện tại
+            move: Nước đi (có thể là null move)
+        """
+        key = self.hash_stack[-1] ^ zobrist.move_key_delta(board, move) ^ zobrist.state_key(board)
+        self.pawn_stack.append(self.pawn_stack[-1] ^ zobrist.pawn_key_delta(board, move))
+        self.eval_stack.append(update_accumulators(board, move, self.eval_stack[-1]))
+        board.push(move)
+        self.hash_stack.append(key ^ zobrist.state_key(board))
+    
+    def unmake_move(self, board):
+        """Hoàn tác nước đi cuối cùng (cùng khóa Zobrist và bộ tích lũy)"""
+        board.pop()
+        self.hash_stack.pop()
+        self.pawn_stack.pop()
+        self.eval_stack.pop()
+    
+    def order_moves(self, board, moves, best_move_hint=None, ply=None):
         """
         Sắp xếp nước đi để tối ưu Alpha-Beta Pruning
         Nước đi tốt hơn được xét trước -> pruning nhiều hơn
         
+        Thứ tự: nước từ bảng chuyển vị / iteration trước -> bắt quân không lỗ (MVV-LVA)
+        và phong cấp -> killer moves của ply -> nước yên lặng theo history
+        -> bắt quân lỗ (SEE < 0).
+        
         Args:
             board: Bàn cờ hiện tại
             moves: Danh sách nước đi cần sắp xếp
-            best_move_hint: Nước đi tốt nhất từ iteration trước (Iterative Deepening)
+            best_move_hint: Nước đi tốt nhất từ bảng chuyển vị / iteration trước
+            ply: Khoảng cách từ gốc (để dùng killer moves), None = không dùng
         
         Returns:
             Danh sách nước đi đã sắp xếp
         """
-        move_scores = []
+        killers = self.killer_moves[ply] if ply is not None and ply < MAX_PLY else ()
+        history = self.history
+        history_base = 4096 if board.turn == chess.WHITE else 0
         
-        for move in moves:
-            score = 0
+        def move_priority(move):
+            # 0. HIGHEST PRIORITY: Best move từ bảng chuyển vị / iteration trước
+            if move == best_move_hint:
+                return 100000  # Ưu tiên cực cao!
             
-            # 0. HIGHEST PRIORITY: Best move từ iteration trước
-            if best_move_hint and move == best_move_hint:
-                score += 100000  # Ưu tiên cực cao!
+            score = 0
+            quiet = True
             
             # 1. Ưu tiên bắt quân (captures)
             if board.is_capture(move):
-                captured_piece = board.piece_at(move.to_square)
-                moving_piece = board.piece_at(move.from_square)
-                if captured_piece and moving_piece:
-                    # MVV-LVA: Most Valuable Victim - Least Valuable Attacker
-                    score += 1000 + get_piece_value(captured_piece) - get_piece_value(moving_piece) // 10
+                quiet = False
+                score += self._capture_priority(board, move)
             
             # 2. Ưu tiên phong cấp (promotions)
             if move.promotion:
+                quiet = False
                 score += 900
             
-            # 3. Ưu tiên chiếu hết (checks)
-            board.push(move)
-            if board.is_checkmate():
-                score += 10000  # Chiếu hết là tốt nhất!
-            elif board.is_check():
+            # 3. Nước yên lặng: killer moves rồi đến history heuristic
+            if quiet:
+                if move in killers:
+                    score += 800 if move == killers[0] else 700
+                else:
+                    score += min(history[history_base + move.from_square * 64 + move.to_square],
+                                 HISTORY_MAX)
+            
+            # 4. Ưu tiên chiếu (không cần push/pop)
+            if board.gives_check(move):
                 score += 100
-            board.pop()
             
-            # 4. Ưu tiên nước đi vào trung tâm
-            to_file = chess.square_file(move.to_square)
-            to_rank = chess.square_rank(move.to_square)
-            if (to_file in [3, 4] and to_rank in [3, 4]):  # e4, e5, d4, d5
+            # 5. Ưu tiên nước đi vào trung tâm (e4, e5, d4, d5)
+            if move.to_square in CENTER_SQUARES:
                 score += 30
             
-            move_scores.append((score, move))
+            return score
         
         # Sắp xếp giảm dần theo score
-        move_scores.sort(reverse=True, key=lambda x: x[0])
+        return sorted(moves, key=move_priority, reverse=True)
+    
+    @staticmethod
+    def _capture_priority(board, move):
+        """
+        Điểm sắp xếp của nước bắt quân: 1000 + MVV-LVA nếu không lỗ (SEE >= 0),
+        ngược lại là điểm SEE (âm) để xếp sau cả nước yên lặng
+        """
+        victim_value = PIECE_VALUES_BY_TYPE[captured_piece_type(board, move)]
+        attacker_value = PIECE_VALUES_BY_TYPE[board.piece_type_at(move.from_square)]
+        # Bắt quân giá trị >= quân mình thì chắc chắn không lỗ, khỏi cần SEE
+        exchange = 0 if victim_value >= attacker_value else static_exchange(board, move)
+        if exchange >= 0:
+            # MVV-LVA: Most Valuable Victim - Least Valuable Attacker
+            return 1000 + victim_value - attacker_value // 10
+        return exchange
+    
+    @staticmethod
+    def _quiet_promotions(board):
+        """Sinh các nước phong cấp không bắt quân (Tốt ở hàng 7 đi thẳng)"""
+        rank = chess.BB_RANK_7 if board.turn == chess.WHITE else chess.BB_RANK_2
+        pawns = board.pawns & board.occupied_co[board.turn] & rank
+        if not pawns:
+            return iter(())
+        return board.generate_legal_moves(pawns, ~board.occupied & chess.BB_ALL)
+    
+    def generate_ordered_moves(self, board, tt_move=None, ply=None):
+        """
+        Sinh nước đi theo từng giai đoạn (lazy), cùng thứ tự ưu tiên với order_moves:
+        nước từ bảng chuyển vị -> bắt quân không lỗ + phong cấp -> killer moves
+        -> nước yên lặng theo history -> bắt quân lỗ (SEE < 0).
         
-        return [move for _, move in move_scores]
+        Giai đoạn sau chỉ được sinh khi vòng lặp gọi chưa break (beta cutoff), nên ở
+        nút cắt mà nước đầu tiên đã bác bỏ thì không phải sinh nước yên lặng.
+        
+        Args:
+            board: Bàn cờ hiện tại
+            tt_move: Nước đi tốt nhất từ bảng chuyển vị (có thể không hợp lệ do trùng khóa)
+            ply: Khoảng cách từ gốc (để dùng killer moves), None = không dùng
+        
+        Yields:
+            Các nước đi hợp lệ, mỗi nước đúng một lần
+        """
+        # 1. Nước từ bảng chuyển vị: thử ngay, chưa cần sinh nước nào
+        if tt_move is not None and board.is_legal(tt_move):
+            yield tt_move
+        else:
+            tt_move = None
+        
+        # 2. Bắt quân và phong cấp
+        good_captures = []
+        bad_captures = []
+        for move in board.generate_legal_captures():
+            if move == tt_move:
+                continue
+            priority = self._capture_priority(board, move)
+            if move.promotion:
+                good_captures.append((priority + 900, move))
+            elif priority >= 0:
+                good_captures.append((priority, move))
+            else:
+                bad_captures.append((priority, move))
+        for move in self._quiet_promotions(board):
+            if move != tt_move:
+                good_captures.append((900, move))
+        good_captures.sort(key=lambda item: item[0], reverse=True)
+        for _, move in good_captures:
+            yield move
+        
+        # 3. Killer moves (nước yên lặng gây cutoff ở cùng ply, phải kiểm tra hợp lệ)
+        killers = self.killer_moves[ply] if ply is not None and ply < MAX_PLY else (None, None)
+        for killer in killers:
+            if killer is not None and killer != tt_move and \
+                    not board.is_capture(killer) and board.is_legal(killer):
+                yield killer
+        
+        # 4. Nước yên lặng theo history (+ chiếu, + trung tâm như order_moves)
+        history = self.history
+        history_base = 4096 if board.turn == chess.WHITE else 0
+        quiet_moves = []
+        # Nhập thành được python-chess lọc theo ô của Xe (đang có quân) nên phải sinh riêng
+        empty = ~board.occupied & chess.BB_ALL
+        for move in chain(board.generate_legal_moves(chess.BB_ALL, empty),
+                          board.generate_castling_moves()):
+            if move.promotion or move == tt_move or move in killers or board.is_en_passant(move):
+                continue
+            score = min(history[history_base + move.from_square * 64 + move.to_square], HISTORY_MAX)
+            if board.gives_check(move):
+                score += 100
+            if move.to_square in CENTER_SQUARES:
+                score += 30
+            quiet_moves.append((score, move))
+        quiet_moves.sort(key=lambda item: item[0], reverse=True)
+        for _, move in quiet_moves:
+            yield move
+        
+        # 5. Bắt quân lỗ
+        bad_captures.sort(key=lambda item: item[0], reverse=True)
+        for _, move in bad_captures:
+            yield move
+    
+    def _record_cutoff(self, board, move, depth, ply):
+        """
+        Ghi nhận nước yên lặng gây beta cutoff (killer move + history)
+        
+        Args:
+            board: Bàn cờ tại nút xảy ra cutoff
+            move: Nước đi gây cutoff
+            depth: Độ sâu còn lại tại nút
+            ply: Khoảng cách từ gốc
+        """
+        if board.is_capture(move) or move.promotion:
+            return
+        
+        if ply < MAX_PLY:
+            killers = self.killer_moves[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        
+        index = (4096 if board.turn == chess.WHITE else 0) + move.from_square * 64 + move.to_square
+        self.history[index] += depth * depth
     
     def evaluate_board(self, board):
         """
@@ -81,74 +558,52 @@ class MinimaxAgent(BaseAgent):
         Returns:
             Điểm số (dương = trắng lợi thế, âm = đen lợi thế)
         """
-        # Kiểm tra trạng thái kết thúc
-        if board.is_checkmate():
-            if board.turn == chess.WHITE:
-                return -999999  # Đen thắng
-            else:
-                return 999999   # Trắng thắng
+        # Kiểm tra trạng thái kết thúc. Khi đang tìm kiếm, negamax / quiescence tự phát hiện
+        # chiếu hết / hết nước đi nên không phải sinh nước đi ở đây
+        if not self._in_search:
+            if board.is_checkmate():
+                if board.turn == chess.WHITE:
+                    return -999999  # Đen thắng
+                else:
+                    return 999999   # Trắng thắng
+            
+            if board.is_stalemate():
+                return 0  # Hòa
         
-        if board.is_stalemate() or board.is_insufficient_material():
+        if board.is_insufficient_material():
             return 0  # Hòa
         
-        score = 0
-        endgame = is_endgame(board)
-        
-        # 1. Đánh giá từng quân cờ (Material + Position)
-        white_material = 0
-        black_material = 0
+        # 1. Material + Position: lấy từ bộ tích lũy tăng dần khi đang tìm kiếm
+        if self._in_search:
+            mg, eg, white_material, black_material = self.eval_stack[-1]
+        else:
+            mg, eg, white_material, black_material = compute_accumulators(board)
         
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece:
-                # Giá trị quân cờ
-                piece_value = get_piece_value(piece)
-                
-                # Giá trị vị trí
-                position_value = get_position_value(piece, square, endgame)
-                
-                total_value = piece_value + position_value
-                
-                # Cộng điểm cho trắng, trừ điểm cho đen
-                if piece.color == chess.WHITE:
-                    score += total_value
-                    white_material += piece_value
-                else:
-                    score -= total_value
-                    black_material += piece_value
+        # Tàn cuộc: hết Hậu hoặc tổng vật chất < 1300 (giống utils.is_endgame)
+        endgame = not board.queens or white_material + black_material < 1300
+        score = eg if endgame else mg
         
         # 2. Mobility (Khả năng di chuyển) - ĐÃ CẢI TIẾN ĐỂ TRÁNH STALEMATE
-        white_mobility = 0
-        black_mobility = 0
+        winning_margin = 400  # Thắng hơn 1 Xe hoặc 1 Mã+Tốt
+        is_white_winning = white_material > black_material + winning_margin
+        is_black_winning = black_material > white_material + winning_margin
         
-        try:
-            # Tính mobility cho bên ĐANG CÓ LƯỢT ĐI
-            if board.turn == chess.WHITE:
-                white_mobility = len(list(board.legal_moves))
-            else:
-                black_mobility = len(list(board.legal_moves))
-            
-            # Đảo lượt để tính cho bên kia (null move)
-            board.push(chess.Move.null())
-            if board.turn == chess.WHITE:
-                white_mobility = len(list(board.legal_moves))
+        if self.mobility == 'legal':
+            white_mobility = self._legal_mobility(board, chess.WHITE)
+            black_mobility = self._legal_mobility(board, chess.BLACK)
+        else:
+            # Ước lượng từ bitboard tấn công; riêng bên đang thua lớn vẫn đếm chính xác
+            # vì logic tránh stalemate bên dưới phụ thuộc vào số nước thật của bên đó
+            if is_black_winning:
+                white_mobility = self._legal_mobility(board, chess.WHITE)
             else:
-                black_mobility = len(list(board.legal_moves))
-            board.pop()
-            
-        except Exception:
-            # Xử lý trường hợp không thể đi null move (ví dụ: đang bị chiếu)
-            # Nếu đang bị chiếu, legal_moves đã được tính ở trên
-            if board.turn == chess.WHITE:
-                black_mobility = 0  # Giả sử bên kia không thể đi
+                white_mobility = self._attack_mobility(board, chess.WHITE)
+            if is_white_winning:
+                black_mobility = self._legal_mobility(board, chess.BLACK)
             else:
-                white_mobility = 0
+                black_mobility = self._attack_mobility(board, chess.BLACK)
         
         # *** LOGIC TRÁNH STALEMATE ***
-        winning_margin = 400  # Thắng hơn 1 Xe hoặc 1 Mã+Tốt
-        is_white_winning = white_material > black_material + winning_margin
-        is_black_winning = black_material > white_material + winning_margin
-        
         if is_white_winning:
             # Trắng đang thắng lớn
             score += white_mobility * 10  # 1. Luôn thưởng cho mobility của mình
@@ -180,60 +635,8 @@ class MinimaxAgent(BaseAgent):
             # 3. Nếu ván cờ cân bằng, dùng logic cũ
             score += (white_mobility - black_mobility) * 10
         
-        # 3. King Safety (An toàn vua) - quan trọng trong opening/middlegame
-        if not endgame:
-            white_king_sq = board.king(chess.WHITE)
-            black_king_sq = board.king(chess.BLACK)
-            
-            # Kiểm tra vua có được bảo vệ bởi tốt không
-            if white_king_sq:
-                # Đếm tốt trắng quanh vua trắng
-                king_file = chess.square_file(white_king_sq)
-                king_rank = chess.square_rank(white_king_sq)
-                pawn_shield = 0
-                for file_offset in [-1, 0, 1]:
-                    f = king_file + file_offset
-                    if 0 <= f < 8 and king_rank < 7:
-                        sq = chess.square(f, king_rank + 1)
-                        piece = board.piece_at(sq)
-                        if piece and piece.piece_type == chess.PAWN and piece.color == chess.WHITE:
-                            pawn_shield += 15
-                score += pawn_shield
-            
-            if black_king_sq:
-                king_file = chess.square_file(black_king_sq)
-                king_rank = chess.square_rank(black_king_sq)
-                pawn_shield = 0
-                for file_offset in [-1, 0, 1]:
-                    f = king_file + file_offset
-                    if 0 <= f < 8 and king_rank > 0:
-                        sq = chess.square(f, king_rank - 1)
-                        piece = board.piece_at(sq)
-                        if piece and piece.piece_type == chess.PAWN and piece.color == chess.BLACK:
-                            pawn_shield += 15
-                score -= pawn_shield
-        
-        # 4. Pawn Structure (Cấu trúc tốt)
-        # Tốt đơn (isolated pawn) bị phạt
-        # Tốt kép (doubled pawn) bị phạt
-        for file in range(8):
-            white_pawns_on_file = 0
-            black_pawns_on_file = 0
-            
-            for rank in range(8):
-                sq = chess.square(file, rank)
-                piece = board.piece_at(sq)
-                if piece and piece.piece_type == chess.PAWN:
-                    if piece.color == chess.WHITE:
-                        white_pawns_on_file += 1
-                    else:
-                        black_pawns_on_file += 1
-            
-            # Phạt tốt kép
-            if white_pawns_on_file > 1:
-                score -= 10 * (white_pawns_on_file - 1)
-            if black_pawns_on_file > 1:
-                score += 10 * (black_pawns_on_file - 1)
+        # 3 + 4 + 8. King Safety (tốt che Vua), tốt kép, tốt thông
+        score += self._pawn_structure_score(board, endgame)
         
         # 5. Control Center (Kiểm soát trung tâm) - quan trọng!
         center_squares = [chess.E4, chess.E5, chess.D4, chess.D5]
@@ -258,101 +661,8 @@ class MinimaxAgent(BaseAgent):
             else:
                 score += 50  # Đen bị chiếu
         
-        # 7. Development bonus (Opening phase)
-        if not endgame and board.fullmove_number <= 15:
-            # Thưởng cho việc phát triển quân
-            white_developed = 0
-            black_developed = 0
-            
-            # Kiểm tra mã và tượng có rời khỏi hàng đầu chưa
-            for piece_type in [chess.KNIGHT, chess.BISHOP]:
-                for square in board.pieces(piece_type, chess.WHITE):
-                    if chess.square_rank(square) > 0:  # Đã rời hàng 1
-                        white_developed += 10
-                for square in board.pieces(piece_type, chess.BLACK):
-                    if chess.square_rank(square) < 7:  # Đã rời hàng 8
-                        black_developed += 10
-            
-            score += white_developed - black_developed
-        
-        # 8. Passed Pawns (Tốt thông) - tốt không bị chặn bởi tốt địch
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece and piece.piece_type == chess.PAWN:
-                file = chess.square_file(square)
-                rank = chess.square_rank(square)
-                
-                is_passed = True
-                if piece.color == chess.WHITE:
-                    # Kiểm tra các hàng phía trước
-                    for check_rank in range(rank + 1, 8):
-                        # Kiểm tra cùng cột và 2 cột bên cạnh
-                        for check_file in [file - 1, file, file + 1]:
-                            if 0 <= check_file < 8:
-                                check_sq = chess.square(check_file, check_rank)
-                                check_piece = board.piece_at(check_sq)
-                                if check_piece and check_piece.piece_type == chess.PAWN and check_piece.color == chess.BLACK:
-                                    is_passed = False
-                                    break
-                        if not is_passed:
-                            break
-                    
-                    if is_passed:
-                        # Thưởng tùy theo vị trí: tốt càng gần promotion càng giá trị
-                        bonus = 10 * (rank - 1)  # Rank 2 = 10, Rank 7 = 60
-                        score += bonus
-                
-                else:  # BLACK pawn
-                    for check_rank in range(0, rank):
-                        for check_file in [file - 1, file, file + 1]:
-                            if 0 <= check_file < 8:
-                                check_sq = chess.square(check_file, check_rank)
-                                check_piece = board.piece_at(check_sq)
-                                if check_piece and check_piece.piece_type == chess.PAWN and check_piece.color == chess.WHITE:
-                                    is_passed = False
-                                    break
-                        if not is_passed:
-                            break
-                    
-                    if is_passed:
-                        bonus = 10 * (6 - rank)  # Rank 6 = 10, Rank 1 = 60
-                        score -= bonus
-        
-        # 9. Rook on Open/Semi-Open Files (Xe trên cột mở/nửa mở)
-        for file in range(8):
-            white_pawns = 0
-            black_pawns = 0
-            white_rook = False
-            black_rook = False
-            
-            for rank in range(8):
-                sq = chess.square(file, rank)
-                piece = board.piece_at(sq)
-                if piece:
-                    if piece.piece_type == chess.PAWN:
-                        if piece.color == chess.WHITE:
-                            white_pawns += 1
-                        else:
-                            black_pawns += 1
-                    elif piece.piece_type == chess.ROOK:
-                        if piece.color == chess.WHITE:
-                            white_rook = True
-                        else:
-                            black_rook = True
-            
-            # Open file (không có tốt nào)
-            if white_pawns == 0 and black_pawns == 0:
-                if white_rook:
-                    score += 20
-                if black_rook:
-                    score -= 20
-            # Semi-open file (chỉ có tốt địch)
-            elif white_pawns == 0 and black_pawns > 0:
-                if white_rook:
-                    score += 15
-            elif black_pawns == 0 and white_pawns > 0:
-                if black_rook:
-                    score -= 15
+        # 7 + 9. Phát triển quân (opening) và Xe trên cột mở/nửa mở
+        score += self._piece_placement_score(board, endgame)
         
         # 10. Bishop Pair (Cặp tượng) - rất mạnh trong endgame
         white_bishops = len(list(board.pieces(chess.BISHOP, chess.WHITE)))
@@ -409,239 +719,794 @@ class MinimaxAgent(BaseAgent):
         
         return score
     
-    def quiescence_search(self, board, alpha, beta, maximizing_player, depth=0):
+    def _legal_mobility(self, board, color):
+        """
+        Số nước hợp lệ của bên `color` (sinh toàn bộ legal moves)
+        Nếu không phải lượt của `color` thì đảo lượt bằng null move
+        """
+        if board.turn == color:
+            return board.legal_moves.count()
+        board.push(chess.Move.null())
+        count = board.legal_moves.count()
+        board.pop()
+        return count
+    
+    def _attack_mobility(self, board, color):
+        """
+        Số nước giả hợp lệ (pseudo-legal) của bên `color` ước lượng từ bitboard:
+        ô bị tấn công không có quân mình + nước đi thẳng / bắt quân của Tốt.
+        Không sinh danh sách nước đi và không cần đảo lượt.
+        """
+        own = board.occupied_co[color]
+        enemy = board.occupied_co[not color]
+        empty = ~board.occupied & chess.BB_ALL
+        
+        count = 0
+        for square in chess.scan_forward(own & ~board.pawns):
+            count += chess.popcount(board.attacks_mask(square) & ~own)
+        
+        pawns = own & board.pawns
+        if color == chess.WHITE:
+            single_pushes = (pawns << 8) & empty
+            double_pushes = ((single_pushes & chess.BB_RANK_3) << 8) & empty
+            captures_west = ((pawns & ~chess.BB_FILE_A) << 7) & enemy
+            captures_east = ((pawns & ~chess.BB_FILE_H) << 9) & enemy
+        else:
+            single_pushes = (pawns >> 8) & empty
+            double_pushes = ((single_pushes & chess.BB_RANK_6) >> 8) & empty
+            captures_west = ((pawns & ~chess.BB_FILE_A) >> 9) & enemy
+            captures_east = ((pawns & ~chess.BB_FILE_H) >> 7) & enemy
+        
+        return (count + chess.popcount(single_pushes) + chess.popcount(double_pushes) +
+                chess.popcount(captures_west) + chess.popcount(captures_east))
+    
+    def _pawn_structure_score(self, board, endgame):
+        """
+        Các yếu tố chỉ phụ thuộc vào Tốt (và vị trí Vua), lấy từ bảng băm Tốt nếu có
+        
+        Mục trong bảng lưu điểm cấu trúc (tốt kép + tốt thông) cùng điểm tốt che Vua
+        ứng với vị trí hai Vua lúc lưu; Vua đã đi thì chỉ tính lại phần che Vua.
+        
+        Returns:
+            Điểm (dương = trắng lợi thế)
+        """
+        white_king_sq = board.king(chess.WHITE)
+        black_king_sq = board.king(chess.BLACK)
+        table = self.pawn_hash
+        if table is None:
+            structure = self._pawn_structure_terms(board)
+            shield = self._pawn_shield_score(board, white_king_sq, black_king_sq)
+        else:
+            key = self.pawn_stack[-1] if self._in_search else zobrist.pawn_key(board)
+            entry = table.probe(key)
+            if entry is None:
+                start = time.perf_counter()
+                structure = self._pawn_structure_terms(board)
+                shield = self._pawn_shield_score(board, white_king_sq, black_king_sq)
+                table.store(key, (key, structure, white_king_sq, black_king_sq, shield),
+                            time.perf_counter() - start)
+            else:
+                structure = entry[1]
+                if entry[2] == white_king_sq and entry[3] == black_king_sq:
+                    shield = entry[4]
+                else:
+                    shield = self._pawn_shield_score(board, white_king_sq, black_king_sq)
+                    table.store(key, (key, structure, white_king_sq, black_king_sq, shield))
+        return structure if endgame else structure + shield
+    
+    @staticmethod
+    def _pawn_shield_score(board, white_king_sq, black_king_sq):
+        """
+        King Safety: +15 cho mỗi tốt đứng ngay trước Vua (chỉ dùng ngoài tàn cuộc)
+        
+        Returns:
+            Điểm (dương = trắng lợi thế)
+        """
+        score = 0
+        # Vua ở a1/a8 (ô 0) không được tính, giữ như bản gốc
+        if white_king_sq:
+            score += 15 * chess.popcount(WHITE_SHIELD_MASKS[white_king_sq] &
+                                         board.pawns & board.occupied_co[chess.WHITE])
+        if black_king_sq:
+            score -= 15 * chess.popcount(BLACK_SHIELD_MASKS[black_king_sq] &
+                                         board.pawns & board.occupied_co[chess.BLACK])
+        return score
+    
+    @staticmethod
+    def _pawn_structure_terms(board):
+        """
+        Tốt kép và tốt thông - chỉ phụ thuộc vào vị trí các Tốt (tính bằng bitboard)
+        
+        - Tốt kép: -10 cho mỗi tốt thừa trên cùng một cột
+        - Tốt thông: thưởng theo hàng, tốt càng gần phong cấp càng giá trị
+        
+        Returns:
+            Điểm (dương = trắng lợi thế)
+        """
+        white_pawns = board.pawns & board.occupied_co[chess.WHITE]
+        black_pawns = board.pawns & board.occupied_co[chess.BLACK]
+        
+        # Tốt kép: số tốt trừ số cột có tốt
+        score = -10 * (chess.popcount(white_pawns) - chess.popcount(file_set(white_pawns)))
+        score += 10 * (chess.popcount(black_pawns) - chess.popcount(file_set(black_pawns)))
+        
+        # Tốt thông: không có tốt địch phía trước trên cùng cột và 2 cột bên cạnh
+        for square in chess.scan_forward(white_pawns):
+            if not WHITE_PASSED_MASKS[square] & black_pawns:
+                score += 10 * ((square >> 3) - 1)  # Rank 2 = 10, Rank 7 = 60
+        for square in chess.scan_forward(black_pawns):
+            if not BLACK_PASSED_MASKS[square] & white_pawns:
+                score -= 10 * (6 - (square >> 3))  # Rank 7 = 10, Rank 2 = 60
+        
+        return score
+    
+    def _piece_placement_score(self, board, endgame):
+        """
+        Phát triển Mã/Tượng (opening) và Xe trên cột mở/nửa mở - tính bằng bitboard
+        
+        Returns:
+            Điểm (dương = trắng lợi thế)
+        """
+        white = board.occupied_co[chess.WHITE]
+        black = board.occupied_co[chess.BLACK]
+        score = 0
+        
+        # Phát triển quân: Mã/Tượng đã rời hàng cuối
+        if not endgame and board.fullmove_number <= 15:
+            minors = board.knights | board.bishops
+            score += 10 * chess.popcount(minors & white & ~chess.BB_RANK_1)
+            score -= 10 * chess.popcount(minors & black & ~chess.BB_RANK_8)
+        
+        # Xe trên cột mở (không có tốt) / nửa mở (chỉ có tốt địch), mỗi cột tính 1 lần
+        white_pawn_files = file_set(board.pawns & white)
+        black_pawn_files = file_set(board.pawns & black)
+        white_rook_files = file_set(board.rooks & white)
+        black_rook_files = file_set(board.rooks & black)
+        open_files = ~(white_pawn_files | black_pawn_files) & 0xFF
+        
+        score += 20 * chess.popcount(white_rook_files & open_files)
+        score -= 20 * chess.popcount(black_rook_files & open_files)
+        score += 15 * chess.popcount(white_rook_files & black_pawn_files & ~white_pawn_files)
+        score -= 15 * chess.popcount(black_rook_files & white_pawn_files & ~black_pawn_files)
+        
+        return score
+    
+    def quiescence_search(self, board, alpha, beta, depth=0):
         """
         Quiescence Search - Tìm kiếm "tĩnh" để tránh Horizon Effect
         Chỉ tìm kiếm các nước đi "ồn ào" (captures, promotions)
         
         Args:
             board: Bàn cờ hiện tại
-            alpha: Alpha value
-            beta: Beta value
-            maximizing_player: True nếu đang tối đa hóa
+            alpha: Alpha value (theo góc nhìn bên đang đi)
+            beta: Beta value (theo góc nhìn bên đang đi)
             depth: Độ sâu quiescence (để giới hạn)
         
         Returns:
-            Điểm đánh giá sau khi bàn cờ "tĩnh"
+            Điểm đánh giá sau khi bàn cờ "tĩnh" (theo góc nhìn bên đang đi)
         """
         self.nodes_searched += 1
+        self.qnodes_searched += 1
+        if self.nodes_searched >= self._next_check:
+            self._check_budget()
         
-        # Kiểm tra game over
-        if board.is_game_over():
-            return self.evaluate_board(board)
+        # evaluate_board trả điểm theo góc nhìn Trắng -> đổi dấu cho bên đang đi
+        color = 1 if board.turn == chess.WHITE else -1
+        
+        # Chiếu hết: chỉ sinh nước đi khi bị chiếu. Stalemate chỉ được kiểm tra
+        # (_is_stalemate) khi sắp trả về đánh giá tĩnh - nếu đã tìm một nước bắt quân
+        # thì bên đi vẫn còn nước hợp lệ
+        in_check = board.is_check()
+        if in_check and not any(board.generate_legal_moves()):
+            return -999999
+        
+        # Lá thuộc bitbase (kể cả khi gốc là KRK / KQK): kết quả chính xác + mop-up
+        if self.bitbases is not None:
+            score = self._bitbase_score(board)
+            if score is not None:
+                return score
         
         # Giới hạn độ sâu quiescence
         if depth >= self.quiescence_depth_limit:
-            return self.evaluate_board(board)
+            if self._is_stalemate(board, in_check):
+                return 0
+            return color * self.evaluate_board(board)
+        
+        # Đánh giá tĩnh (stand pat) - có thể không đi nước ồn ào nào
+        stand_pat = color * self.evaluate_board(board)
+        if stand_pat >= beta:
+            if self._is_stalemate(board, in_check):
+                return 0
+            return beta
+        if stand_pat > alpha:
+            alpha = stand_pat
         
-        # Đánh giá tĩnh (stand pat)
-        stand_pat = self.evaluate_board(board)
+        # Khi bị chiếu hoặc chỉ còn Vua + Tốt thì không cắt tỉa (đánh giá dao động mạnh)
+        prune_ok = self.see_pruning and not in_check and \
+            bool(board.occupied & ~(board.pawns | board.kings))
         
-        # Chỉ xét các nước "ồn ào" (captures và promotions)
+        # Chỉ sinh các nước "ồn ào" (captures và promotions)
         violent_moves = []
-        for move in board.legal_moves:
-            if board.is_capture(move) or move.promotion:
-                violent_moves.append(move)
+        has_moves = False
+        for move in chain(board.generate_legal_captures(), self._quiet_promotions(board)):
+            has_moves = True
+            captured_type = captured_piece_type(board, move)
+            gain = PIECE_VALUES_BY_TYPE[captured_type] if captured_type else 0
+            if move.promotion:
+                gain += PIECE_VALUES_BY_TYPE[move.promotion] - PIECE_VALUES_BY_TYPE[chess.PAWN]
+            attacker_value = PIECE_VALUES_BY_TYPE[board.piece_type_at(move.from_square)]
+            
+            if prune_ok:
+                # Delta pruning: kể cả ăn trọn quân cũng không kéo điểm lên tới alpha
+                if stand_pat + gain + DELTA_MARGIN <= alpha:
+                    continue
+                # SEE: bỏ qua nước bắt quân bị bắt lại lỗ vật chất
+                if gain < attacker_value and static_exchange(board, move) < 0:
+                    continue
+            
+            # MVV-LVA
+            violent_moves.append((gain - attacker_value // 10, move))
         
         # Nếu không có nước ồn ào, trả về đánh giá tĩnh
         if not violent_moves:
+            if not has_moves and self._is_stalemate(board, in_check):
+                return 0
             return stand_pat
         
-        # Sắp xếp các nước ồn ào (MVV-LVA)
-        ordered_moves = self.order_moves(board, violent_moves)
+        violent_moves.sort(key=lambda item: item[0], reverse=True)
         
-        # Tìm kiếm giống minimax (max/min style)
-        if maximizing_player:
-            # Stand pat (có thể không đi nước ồn ào nào)
-            if stand_pat >= beta:
-                return beta
-            if stand_pat > alpha:
-                alpha = stand_pat
+        best_score = stand_pat
+        for _, move in violent_moves:
+            self.make_move(board, move)
+            score = -self.quiescence_search(board, -beta, -alpha, depth + 1)
+            self.unmake_move(board)
             
-            max_eval = stand_pat
-            for move in ordered_moves:
-                board.push(move)
-                eval_score = self.quiescence_search(board, alpha, beta, False, depth + 1)
-                board.pop()
-                
-                max_eval = max(max_eval, eval_score)
-                alpha = max(alpha, eval_score)
-                if beta <= alpha:
-                    break
-            return max_eval
-        else:
-            # Stand pat
-            if stand_pat <= alpha:
-                return alpha
-            if stand_pat < beta:
-                beta = stand_pat
-            
-            min_eval = stand_pat
-            for move in ordered_moves:
-                board.push(move)
-                eval_score = self.quiescence_search(board, alpha, beta, True, depth + 1)
-                board.pop()
-                
-                min_eval = min(min_eval, eval_score)
-                beta = min(beta, eval_score)
-                if beta <= alpha:
-                    break
-            return min_eval
+            if score > best_score:
+                best_score = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        return best_score
     
-    def minimax(self, board, depth, alpha, beta, maximizing_player):
+    def negamax(self, board, depth, alpha, beta):
         """
-        Thuật toán Minimax với Alpha-Beta Pruning + Transposition Table + Quiescence
+        Negamax với Alpha-Beta + Principal Variation Search + Transposition Table + Quiescence
         (ĐÃ CẢI TIẾN: Tránh lặp lại 3 lần)
         
+        Điểm luôn tính theo góc nhìn bên đang đi: điểm của nút cha = -điểm của nút con.
+        PVS: nước đầu tiên (nước PV) được tìm với cửa sổ đầy đủ, các nước sau được tìm
+        với cửa sổ rỗng (alpha, alpha + 1) và chỉ tìm lại khi vượt alpha (fail-high).
+        
+        Bảng chuyển vị dùng khóa Zobrist (self.hash_stack[-1]) và lưu loại điểm
+        (EXACT / LOWER_BOUND / UPPER_BOUND) để không dùng nhầm điểm cắt tỉa như điểm chính xác.
+        
         Args:
             board: Bàn cờ hiện tại
             depth: Độ sâu còn lại
             alpha: Giá trị alpha cho pruning
             beta: Giá trị beta cho pruning
-            maximizing_player: True nếu đang tối đa hóa, False nếu tối thiểu hóa
         
         Returns:
-            Điểm số tốt nhất
+            Điểm số tốt nhất (theo góc nhìn bên đang đi)
         """
         self.nodes_searched += 1
+        if self.nodes_searched >= self._next_check:
+            self._check_budget()
         
-        # Kiểm tra game over trước
-        if board.is_game_over():
-            return self.evaluate_board(board)
+        # Hòa do lặp lại / luật 50 nước (không cần sinh nước đi)
+        if self._is_draw(board):
+            return 0
+        
+        # Tàn cuộc có trong bitbase: kết quả chính xác, không cần tìm tiếp
+        if self._probe_bitbases:
+            score = self._bitbase_score(board)
+            if score is not None:
+                return score
         
         # Transposition Table lookup
-        fen_key = board.fen()
-        if fen_key in self.transposition_table:
-            stored_depth, stored_score = self.transposition_table[fen_key]
-            if stored_depth >= depth:
-                return stored_score
+        key = self.hash_stack[-1]
+        alpha_orig = alpha
+        beta_orig = beta
+        tt_move = None
+        self.tt_probes += 1
+        entry = self.transposition_table.probe(key)
+        if entry is not None:
+            self.tt_hits += 1
+            tt_move = entry.best_move
+            if entry.depth >= depth:
+                if entry.flag == EXACT:
+                    self.tt_cutoffs += 1
+                    return entry.score
+                elif entry.flag == LOWER_BOUND:
+                    alpha = max(alpha, entry.score)
+                else:
+                    beta = min(beta, entry.score)
+                if alpha >= beta:
+                    self.tt_cutoffs += 1
+                    return entry.score
         
         # Điều kiện dừng - GỌI QUIESCENCE SEARCH thay vì evaluate_board
-        if depth == 0:
-            score = self.quiescence_search(board, alpha, beta, maximizing_player)
-            self.transposition_table[fen_key] = (0, score)
+        if depth <= 0:
+            score = self.quiescence_search(board, alpha, beta)
+            self._store(key, 0, score, alpha_orig, beta_orig, None)
             return score
         
-        # Lấy và sắp xếp nước đi (Move Ordering để tăng pruning)
-        legal_moves = list(board.legal_moves)
-        ordered_moves = self.order_moves(board, legal_moves)
+        ply = len(self.hash_stack) - 1
+        in_check = board.is_check()
+        # Nút PV có cửa sổ rộng; các nút cửa sổ rỗng (PVS) mới được cắt tỉa chọn lọc
+        is_pv = beta - alpha > 1
+        prune_ok = not is_pv and not in_check and abs(alpha) < 999000 and abs(beta) < 999000
         
-        if maximizing_player:
-            max_eval = float('-inf')
-            for move in ordered_moves:
-                board.push(move)
-                
-                # ### CẢI TIẾN: KIỂM TRA LẶP LẠI ###
-                # Nếu nước đi này tạo ra 1 thế cờ đã lặp lại (lần 2),
-                # coi như hòa cờ (0 điểm) để agent tránh/chọn nó.
-                if board.is_repetition(2):
-                    eval_score = 0
-                else:
-                    eval_score = self.minimax(board, depth - 1, alpha, beta, False)
-                
-                board.pop()
-                
-                # MATE SCORE OPTIMIZATION: Ưu tiên mate ngắn nhất
-                # Nếu tìm thấy đường thắng, trừ 1 để ưu tiên đường ngắn hơn
-                if eval_score > 999000:  # Điểm mate thắng
-                    eval_score -= 1
-                # Nếu bị thua, cộng 1 để ưu tiên thua "lâu nhất"
-                elif eval_score < -999000:  # Điểm mate thua
-                    eval_score += 1
-                
-                max_eval = max(max_eval, eval_score)
-                alpha = max(alpha, eval_score)
-                if beta <= alpha:
-                    break  # Beta cutoff
+        # NULL-MOVE PRUNING: nhường lượt mà vẫn >= beta thì nước thật chắc chắn cũng vậy
+        # Không dùng khi bên đi chỉ còn Vua + Tốt (zugzwang) hoặc ngay sau một null move
+        if self.null_move_pruning and prune_ok and depth >= NULL_MOVE_MIN_DEPTH and \
+                board.move_stack and board.move_stack[-1] and \
+                self._has_non_pawn_material(board, board.turn):
+            self.make_move(board, chess.Move.null())
+            score = -self.negamax(board, depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + 1)
+            self.unmake_move(board)
+            if score >= beta:
+                return beta
+        
+        # RAZORING / FUTILITY PRUNING ở các nút gần lá
+        futile = False
+        if self.futility_pruning and prune_ok and depth < len(FUTILITY_MARGINS):
+            static_eval = self.evaluate_board(board)
+            if board.turn == chess.BLACK:
+                static_eval = -static_eval
             
-            # Lưu vào Transposition Table
-            self.transposition_table[fen_key] = (depth, max_eval)
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for move in ordered_moves:
-                board.push(move)
-                
-                # ### CẢI TIẾN: KIỂM TRA LẶP LẠI ###
-                if board.is_repetition(2):
-                    eval_score = 0
-                else:
-                    eval_score = self.minimax(board, depth - 1, alpha, beta, True)
-                
-                board.pop()
-                
-                # MATE SCORE OPTIMIZATION: Ưu tiên mate ngắn nhất
-                if eval_score > 999000:  # Điểm mate thắng
-                    eval_score -= 1
-                elif eval_score < -999000:  # Điểm mate thua
-                    eval_score += 1
+            # Razoring: quá thấp so với alpha -> chỉ cần kiểm tra bằng quiescence
+            if static_eval + RAZOR_MARGINS[depth] <= alpha:
+                score = self.quiescence_search(board, alpha, beta)
+                if score <= alpha:
+                    return score
+            
+            # Futility: nước yên lặng không thể kéo điểm lên tới alpha
+            futile = static_eval + FUTILITY_MARGINS[depth] <= alpha
+        
+        # Sinh nước đi theo giai đoạn (Move Ordering để tăng pruning)
+        # Nước đi tốt nhất từ bảng chuyển vị được xét đầu tiên
+        ordered_moves = self.generate_ordered_moves(board, tt_move, ply)
+        killers = self.killer_moves[ply] if ply < MAX_PLY else ()
+        
+        best_score = float('-inf')
+        best_move = None
+        for index, move in enumerate(ordered_moves):
+            quiet = not move.promotion and not board.is_capture(move)
+            
+            # Bỏ qua nước yên lặng vô vọng (giữ lại nước đầu tiên và nước chiếu)
+            if futile and quiet and index > 0 and not board.gives_check(move):
+                continue
+            
+            self.make_move(board, move)
+            
+            if index == 0:
+                score = -self.negamax(board, depth - 1, -beta, -alpha)
+            else:
+                # LATE MOVE REDUCTIONS: nước yên lặng xếp cuối được tìm nông hơn trước
+                reduction = 0
+                if self.late_move_reductions and quiet and not in_check and \
+                        depth >= LMR_MIN_DEPTH and index >= LMR_MIN_INDEX and \
+                        move not in killers and not board.is_check():
+                    reduction = 1 if index < 2 * LMR_MIN_INDEX else 2
                 
-                min_eval = min(min_eval, eval_score)
-                beta = min(beta, eval_score)
-                if beta <= alpha:
-                    break  # Alpha cutoff
+                # PVS: thử cửa sổ rỗng, tìm lại với cửa sổ đầy đủ nếu fail-high
+                score = -self.negamax(board, depth - 1 - reduction, -alpha - 1, -alpha)
+                if reduction and score > alpha:
+                    score = -self.negamax(board, depth - 1, -alpha - 1, -alpha)
+                if alpha < score < beta:
+                    score = -self.negamax(board, depth - 1, -beta, -alpha)
             
-            # Lưu vào Transposition Table
-            self.transposition_table[fen_key] = (depth, min_eval)
-            return min_eval
+            self.unmake_move(board)
+            
+            # MATE SCORE OPTIMIZATION: Ưu tiên mate ngắn nhất
+            # Nếu tìm thấy đường thắng, trừ 1 để ưu tiên đường ngắn hơn
+            if score > 999000:  # Điểm mate thắng
+                score -= 1
+            # Nếu bị thua, cộng 1 để ưu tiên thua "lâu nhất"
+            elif score < -999000:  # Điểm mate thua
+                score += 1
+            
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.beta_cutoffs += 1
+                if index == 0:
+                    self.first_move_cutoffs += 1
+                self._record_cutoff(board, move, depth, ply)
+                break  # Beta cutoff
+        
+        # Không có nước đi hợp lệ nào: chiếu hết hoặc stalemate
+        if best_move is None:
+            return -999999 if in_check else 0
+        
+        # Lưu vào Transposition Table
+        self._store(key, depth, best_score, alpha_orig, beta_orig, best_move)
+        return best_score
+    
+    @staticmethod
+    def _is_stalemate(board, in_check):
+        """Hết nước đi hợp lệ mà không bị chiếu (dừng ở nước hợp lệ đầu tiên tìm được)"""
+        if in_check:
+            return False
+        # Nhanh: một Tốt đi thẳng được và không bị ghim là đã có nước hợp lệ
+        empty = ~board.occupied & chess.BB_ALL
+        pawns = board.pawns & board.occupied_co[board.turn]
+        pushable = pawns & (empty >> 8 if board.turn == chess.WHITE else empty << 8)
+        if pushable and not board.is_pinned(board.turn, chess.lsb(pushable)):
+            return False
+        return not any(board.generate_legal_moves())
     
-    def get_move(self, board):
+    @staticmethod
+    def _has_non_pawn_material(board, color):
+        """Bên `color` còn quân khác ngoài Vua và Tốt không (điều kiện chống zugzwang)"""
+        return bool(board.occupied_co[color] & ~(board.pawns | board.kings))
+    
+    def _bitbase_score(self, board):
+        """
+        Điểm của vị trí theo bitbase (góc nhìn bên đang đi)
+        
+        Thắng / thua được cộng thêm điểm "mop-up" để vẫn ưu tiên tiến triển: Vua thua bị
+        dồn ra mép, Vua thắng áp sát, tốt tiến gần ô phong cấp (phong Hậu cộng thêm
+        giá trị Hậu vì KQK cũng là thắng).
+        
+        Returns:
+            0 nếu hòa, ±(BITBASE_WIN_SCORE + mop-up) nếu thắng / thua, -999999 nếu bị
+            chiếu hết, None nếu vị trí không thuộc bitbase
         """
-        Tìm nước đi tốt nhất với Iterative Deepening
+        result = self.bitbases.probe(board)
+        if not result:
+            return result
+        if result < 0 and board.is_check() and not any(board.generate_legal_moves()):
+            return -999999
+        winner = board.turn if result > 0 else not board.turn
+        winner_king = board.king(winner)
+        loser_king = board.king(not winner)
+        square = chess.lsb(board.occupied & ~board.kings)
+        piece_type = board.piece_type_at(square)
+        
+        score = BITBASE_WIN_SCORE + PIECE_VALUES_BY_TYPE[piece_type]
+        file, rank = chess.square_file(loser_king), chess.square_rank(loser_king)
+        score += int(abs(file - 3.5) + abs(rank - 3.5)) * 20
+        score += (7 - chess.square_distance(winner_king, loser_king)) * 10
+        if piece_type == chess.PAWN:
+            score += chess.square_rank(square if winner == chess.WHITE else square ^ 56) * 20
+        return result * score
+    
+    def _bitbase_root_moves(self, board, legal_moves):
+        """
+        Các nước ở gốc giữ được kết quả tốt nhất theo bitbase (gốc thuộc bitbase)
+        
+        Vị trí sau nước đi ra ngoài bitbase (bắt quân, phong Mã / Tượng) là hòa.
+        """
+        results = []
+        for move in legal_moves:
+            board.push(move)
+            if board.is_checkmate():
+                results.append(1)
+            else:
+                results.append(-(self.bitbases.probe(board) or 0))
+            board.pop()
+        best = max(results)
+        return [move for move, result in zip(legal_moves, results) if result == best]
+    
+    def _is_draw(self, board):
+        """
+        Hòa do lặp lại vị trí (lần 2) hoặc luật 50 nước
+        
+        Lặp lại được phát hiện bằng cách so khóa Zobrist trên đường đi hiện tại
+        và lịch sử ván (game_keys) thay vì board.is_repetition / is_game_over.
+        """
+        if board.halfmove_clock >= 100:
+            return not board.is_checkmate()
+        return zobrist.is_repetition(self.hash_stack, self.game_keys, board.halfmove_clock)
+    
+    def _check_budget(self):
+        """Dừng tìm kiếm (raise SearchAborted) nếu đã vượt thời gian hoặc số node"""
+        if self._stop_event is not None and self._stop_event.is_set():
+            raise SearchAborted()
+        if self._max_nodes is not None and self.nodes_searched >= self._max_nodes:
+            raise SearchAborted()
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise SearchAborted()
+        # Không cần xem đồng hồ ở mọi node
+        self._next_check = self.nodes_searched + BUDGET_CHECK_INTERVAL
+        if self._max_nodes is not None:
+            self._next_check = min(self._next_check, self._max_nodes)
+    
+    def _store(self, key, depth, score, alpha_orig, beta_orig, best_move):
+        """Lưu điểm vào bảng chuyển vị kèm loại điểm so với cửa sổ ban đầu"""
+        if score <= alpha_orig:
+            flag = UPPER_BOUND
+        elif score >= beta_orig:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.transposition_table.store(key, depth, score, flag, best_move)
+    
+    def get_move(self, board, time_limit=None, node_limit=None, workers=None, root_workers=None):
+        """
+        Tìm nước đi tốt nhất với Iterative Deepening (có ngân sách thời gian / số node)
+        
+        Iteration có thể bị dừng giữa chừng khi hết ngân sách; khi đó trả về nước đi
+        tốt nhất của độ sâu hoàn chỉnh gần nhất. Trước mỗi iteration mới, thời gian và
+        số node được dự đoán theo hệ số phân nhánh của iteration trước để không bắt đầu
+        một iteration chắc chắn không kịp hoàn thành.
+        
+        Từ depth 2, mỗi iteration dùng Aspiration Window quanh điểm của iteration trước
+        và nới rộng cửa sổ khi kết quả rơi ra ngoài.
+        
+        Với workers > 1 (Lazy SMP), các tiến trình helper tìm cùng gốc qua bảng chuyển vị
+        dùng chung và bị dừng khi tiến trình chính xong; kết quả có độ sâu hoàn chỉnh
+        lớn nhất được chọn.
         
         Args:
             board: Bàn cờ hiện tại
+            time_limit: Giới hạn thời gian (giây), None = dùng self.time_limit
+            node_limit: Giới hạn số node của tiến trình chính, None = dùng self.node_limit
+            workers: Số tiến trình tìm kiếm, None = dùng self.workers
+            root_workers: Số tiến trình chia nước đi ở gốc, None = dùng self.root_workers
         
         Returns:
             Nước đi tốt nhất
         """
+        # Đang pondering (và không phải chính thread pondering gọi): dừng lại,
+        # dùng luôn kết quả nếu đối thủ đi đúng nước dự đoán
+        if threading.current_thread() is not self._ponder_thread:
+            self.ponder_hit = False
+            if self._ponder_thread is not None:
+                move = self._finish_pondering(board)
+                if move is not None:
+                    self.ponder_hit = True
+                    return move
+        
         self.reset_stats()
-        self.transposition_table.clear()  # Clear cache mỗi lần chọn nước
+        self.completed_depth = 0
+        
+        # Sách khai cuộc: có nước trong sách thì đi luôn, không tìm kiếm
+        self.book_hit = False
+        if self.opening_book is not None:
+            move = self.opening_book.get_move(board)
+            if move is not None:
+                self.book_hit = True
+                return move
+        
+        # Giữ bảng chuyển vị giữa các nước, chỉ đánh dấu mục cũ để thay thế trước
+        self.transposition_table.new_search()
+        self.set_root(board)
+        
+        # Killer moves theo ply không còn đúng sau khi gốc đổi; history giảm một nửa
+        self.killer_moves = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [value // 2 for value in self.history]
         
         legal_moves = list(board.legal_moves)
         if not legal_moves:
             return None
+        if self._bitbase_root:
+            legal_moves = self._bitbase_root_moves(board, legal_moves)
+        
+        if time_limit is None:
+            time_limit = self.time_limit
+        if node_limit is None:
+            node_limit = self.node_limit
+        
+        start_time = time.perf_counter()
+        self._deadline = start_time + time_limit if time_limit is not None else None
+        self._max_nodes = node_limit
+        limited = time_limit is not None or node_limit is not None or self._stop_event is not None
+        self._next_check = 0 if limited else float('inf')
+        root_ply = len(board.move_stack)
+        
+        root_pool = self._ensure_root_pool(self.root_workers if root_workers is None else root_workers)
+        
+        # Lazy SMP: helper bắt đầu cùng lúc với tiến trình chính
+        helpers = self._ensure_helpers(self.workers if workers is None else workers)
+        if helpers is not None:
+            helpers.start_search(board, self.depth, self.transposition_table.generation)
         
         best_move = None
+        best_score = 0
+        last_iteration_nodes = 0
+        self._in_search = True
         
-        # ITERATIVE DEEPENING: Tìm kiếm từ depth=1 đến depth=target
-        for current_depth in range(1, self.depth + 1):
-            # Sắp xếp nước đi - ƯU TIÊN best_move từ iteration trước
-            ordered_moves = self.order_moves(board, legal_moves, best_move)
-            
-            best_value = float('-inf') if board.turn == chess.WHITE else float('inf')
-            alpha = float('-inf')
-            beta = float('inf')
-            temp_best_move = None
-            
-            # Duyệt qua các nước đi đã sắp xếp
-            for move in ordered_moves:
-                board.push(move)
+        try:
+            # ITERATIVE DEEPENING: Tìm kiếm từ depth=1 đến depth=target
+            for current_depth in range(1, self.depth + 1):
+                iteration_start = time.perf_counter()
+                nodes_before = self.nodes_searched
+                qnodes_before = self.qnodes_searched
                 
-                # Gọi minimax với current_depth (không phải self.depth)
-                if board.turn == chess.BLACK:  # Sau khi đi, đến lượt đen
-                    # Trắng vừa đi, tìm max
-                    move_value = self.minimax(board, current_depth - 1, alpha, beta, False)
-                else:  # Sau khi đi, đến lượt trắng
-                    # Đen vừa đi, tìm min
-                    move_value = self.minimax(board, current_depth - 1, alpha, beta, True)
+                # ASPIRATION WINDOW: cửa sổ hẹp quanh điểm iteration trước
+                if current_depth > 1 and abs(best_score) < 999000:
+                    delta = ASPIRATION_WINDOW
+                    alpha = best_score - delta
+                    beta = best_score + delta
+                else:
+                    delta = None
+                    alpha = float('-inf')
+                    beta = float('inf')
                 
-                board.pop()
+                while True:
+                    score, move = self._search_root(board, legal_moves, current_depth,
+                                                    best_move, alpha, beta, root_pool)
+                    if delta is None:
+                        break
+                    if score <= alpha:
+                        # Fail-low: nới cận dưới, giữ nước đi cũ
+                        delta *= 2
+                        alpha = score - delta if delta <= MAX_ASPIRATION_WINDOW else float('-inf')
+                    elif score >= beta:
+                        # Fail-high: nước đi này đã tốt hơn, ưu tiên xét nó đầu tiên
+                        best_move = move
+                        delta *= 2
+                        beta = score + delta if delta <= MAX_ASPIRATION_WINDOW else float('inf')
+                    else:
+                        break
                 
-                # Cập nhật nước đi tốt nhất cho iteration này
-                if board.turn == chess.WHITE:
-                    if move_value > best_value:
-                        best_value = move_value
-                        temp_best_move = move
-                        alpha = max(alpha, move_value)
+                # Sau mỗi iteration, cập nhật best_move nếu tìm được
+                if move:
+                    best_move = move
+                    best_score = score
+                self.completed_depth = current_depth
+                
+                iteration_nodes = self.nodes_searched - nodes_before
+                iteration = IterationStats(current_depth, best_score, iteration_nodes,
+                                           self.qnodes_searched - qnodes_before,
+                                           time.perf_counter() - iteration_start,
+                                           self._principal_variation(board, best_move, current_depth))
+                self.iterations.append(iteration)
+                if self.on_iteration is not None and \
+                        threading.current_thread() is not self._ponder_thread:
+                    self.on_iteration(iteration)
+                
+                # Dự đoán chi phí iteration tiếp theo theo hệ số phân nhánh
+                if last_iteration_nodes:
+                    growth = max(2.0, iteration_nodes / last_iteration_nodes)
                 else:
-                    if move_value < best_value:
-                        best_value = move_value
-                        temp_best_move = move
-                        beta = min(beta, move_value)
-            
-            # Sau mỗi iteration, cập nhật best_move nếu tìm được
-            if temp_best_move:
-                best_move = temp_best_move
+                    growth = DEFAULT_ITERATION_GROWTH
+                last_iteration_nodes = iteration_nodes
+                
+                now = time.perf_counter()
+                if self._deadline is not None and \
+                        now + (now - iteration_start) * growth > self._deadline:
+                    break
+                if self._max_nodes is not None and \
+                        self.nodes_searched + iteration_nodes * growth > self._max_nodes:
+                    break
+        except SearchAborted:
+            # Hoàn tác các nước đang dở trong cây tìm kiếm
+            while len(board.move_stack) > root_ply:
+                board.pop()
+            del self.hash_stack[1:]
+            del self.pawn_stack[1:]
+            del self.eval_stack[1:]
+            if best_move is None:
+                best_move = self.order_moves(board, legal_moves)[0]
+        finally:
+            self._in_search = False
+            self._deadline = None
+            self._max_nodes = None
+            self._next_check = float('inf')
+            # Luôn dừng helper (kể cả khi có ngoại lệ) để không còn kết quả cũ trong hàng đợi
+            helper_results = helpers.stop() if helpers is not None else []
+        
+        # Chọn kết quả có độ sâu hoàn chỉnh lớn nhất (hòa thì giữ của tiến trình chính)
+        for _, helper_depth, helper_move, helper_nodes in helper_results:
+            self.nodes_searched += helper_nodes
+            if helper_depth > self.completed_depth and helper_move in legal_moves:
+                best_move = helper_move
+                self.completed_depth = helper_depth
         
+        self.search_time = time.perf_counter() - start_time
         return best_move
+    
+    def _principal_variation(self, board, best_move, max_length):
+        """
+        Biến chính: best_move rồi lần theo nước tốt nhất trong bảng chuyển vị
+        
+        Returns:
+            Danh sách nước đi (dừng khi hết mục, nước không hợp lệ hoặc lặp vị trí)
+        """
+        pv = []
+        seen = set()
+        move = best_move
+        while move is not None and len(pv) < max_length and board.is_legal(move):
+            board.push(move)
+            pv.append(move)
+            key = zobrist.compute_key(board)
+            if key in seen:
+                break
+            seen.add(key)
+            entry = self.transposition_table.probe(key)
+            move = entry.best_move if entry is not None else None
+        for _ in pv:
+            board.pop()
+        return pv
+    
+    def _search_root(self, board, legal_moves, current_depth, best_move, alpha, beta, root_pool=None):
+        """
+        Một iteration của Iterative Deepening tại gốc (negamax + PVS)
+        
+        Với root_pool, nước đầu tiên (nước PV) được tìm tuần tự để có alpha, các nước
+        còn lại được tìm song song trong pool với alpha đó.
+        
+        Args:
+            board: Bàn cờ hiện tại
+            legal_moves: Các nước đi hợp lệ tại gốc
+            current_depth: Độ sâu của iteration
+            best_move: Nước đi tốt nhất từ iteration trước (xét đầu tiên)
+            alpha: Cận dưới của cửa sổ tìm kiếm
+            beta: Cận trên của cửa sổ tìm kiếm
+            root_pool: RootMovePool để tìm song song (None = tuần tự)
+        
+        Returns:
+            (điểm tốt nhất theo góc nhìn bên đang đi, nước đi tốt nhất)
+        """
+        # Sắp xếp nước đi - ƯU TIÊN best_move từ iteration trước
+        ordered_moves = self.order_moves(board, legal_moves, best_move, 0)
+        
+        best_value = float('-inf')
+        temp_best_move = None
+        
+        # Duyệt qua các nước đi đã sắp xếp
+        for index, move in enumerate(ordered_moves):
+            if index == 1 and root_pool is not None and current_depth > 1:
+                return self._search_root_parallel(board, ordered_moves[1:], current_depth,
+                                                  best_value, temp_best_move, alpha, beta, root_pool)
+            
+            self.make_move(board, move)
+            
+            # Gọi negamax với current_depth (không phải self.depth)
+            if index == 0:
+                move_value = -self.negamax(board, current_depth - 1, -beta, -alpha)
+            else:
+                move_value = -self.negamax(board, current_depth - 1, -alpha - 1, -alpha)
+                if alpha < move_value < beta:
+                    move_value = -self.negamax(board, current_depth - 1, -beta, -alpha)
+            
+            self.unmake_move(board)
+            
+            # Cập nhật nước đi tốt nhất cho iteration này
+            if move_value > best_value:
+                best_value = move_value
+                temp_best_move = move
+            if move_value > alpha:
+                alpha = move_value
+            if alpha >= beta:
+                break  # Fail-high của aspiration window
+        
+        return best_value, temp_best_move
+    
+    def _search_root_parallel(self, board, moves, current_depth, best_value, best_move,
+                              alpha, beta, root_pool):
+        """
+        Tìm song song các nước còn lại ở gốc sau khi nước PV đã cho alpha
+        
+        Returns:
+            (điểm tốt nhất, nước đi tốt nhất) như _search_root
+        """
+        time_limit = None
+        if self._deadline is not None:
+            time_limit = max(0.0, self._deadline - time.perf_counter())
+        
+        # Chia số node còn lại cho các nước để tổng số node không vượt node_limit
+        node_limit = None
+        if self._max_nodes is not None:
+            node_limit = max(1, (self._max_nodes - self.nodes_searched) // len(moves))
+        
+        results, nodes = root_pool.search_moves(board, moves, current_depth, alpha, beta,
+                                                time_limit, node_limit,
+                                                self.transposition_table.generation)
+        self.nodes_searched += nodes
+        
+        for move, move_value in results:
+            if move_value is None:
+                raise SearchAborted()  # Worker hết thời gian: iteration không hoàn chỉnh
+            if move_value > best_value:
+                best_value = move_value
+                best_move = move
+        return best_value, best_move
@@ -5,34 +5,86 @@ import chess
 import numpy as np
 import os
 from .base_agent import BaseAgent
-from utils import fen_to_tensor, get_piece_value
-from config import ML_DEPTH, ML_MODEL_PATH
+from . import zobrist
+from .opening_book import OpeningBook
+from .numpy_model import NumpyModel, quantized_path
+from utils import board_to_tensor, castling_squares, get_piece_value
+from config import ML_DEPTH, ML_BATCH_SIZE, ML_MODEL_PATH, ML_QUANTIZATION, OPENING_BOOK_PATH
+
+
+def plane_index(square, channel):
+    """Chỉ số của (ô, kênh) trong tensor 8x8x12 đã trải phẳng (row = 7 - hàng, col = cột)"""
+    return (7 - (square >> 3)) * 96 + (square & 7) * 12 + channel
 
 
 class MLAgent(BaseAgent):
     """Agent sử dụng mô hình ML để đánh giá bàn cờ"""
     
-    def __init__(self, model_path=ML_MODEL_PATH, depth=ML_DEPTH):
+    def __init__(self, model_path=ML_MODEL_PATH, depth=ML_DEPTH, opening_book=OPENING_BOOK_PATH,
+                 batch_size=ML_BATCH_SIZE, quantization=ML_QUANTIZATION):
+        """
+        Args:
+            model_path: File model đã train
+            depth: Độ sâu tìm kiếm
+            opening_book: File sách khai cuộc Polyglot (None = không dùng)
+            batch_size: Số vị trí tối đa mỗi lần forward. Với batch_size > 1, ở mỗi nút
+                        còn 1 ply mọi vị trí con được đánh giá trong một batch trước khi
+                        alpha-beta duyệt các con; 1 = gọi model cho từng lá
+            quantization: 'int8' / 'float16' = dùng file model NumPy đã lượng tử hóa
+                          (<model_path không đuôi>_<kiểu>.npz), không cần TensorFlow;
+                          file nhỏ hơn nhưng tốc độ như model float32
+        """
         super().__init__(name="ML Agent")
         self.depth = depth
+        self.batch_size = max(1, batch_size)
         self.model = None
         self.model_path = model_path
+        self.quantization = quantization
         self._evaluation_cache = {}  # Cache để tăng tốc
+        self.hash_stack = []  # Khóa Zobrist dọc theo đường đi hiện tại
+        self.game_keys = []   # Khóa các vị trí trước gốc trong ván (phát hiện lặp lại)
+        # Tensor đầu vào (8x8x12) của vị trí hiện tại, cập nhật tăng dần khi đi / hoàn tác
+        self.planes = np.zeros((8, 8, 12), dtype=np.float32)
+        self.plane_stack = []  # (ô bị xóa, ô được đặt) của từng nước trên đường đi
+        self._in_search = False  # True khi đang trong negamax (bỏ kiểm tra game over ở lá)
+        # Sách khai cuộc Polyglot (None nếu không có file)
+        self.opening_book = OpeningBook.open_if_exists(opening_book)
+        self.book_hit = False
         
         # De-normalization parameters (LƯU Ý: Cần load từ file hoặc set từ training)
         # Giá trị mặc định tạm thời (NẾU không có file normalization_params.npy)
         self.y_mean = 0.0
         self.y_std = 1000.0  # Giá trị ước lượng
         
+        self.model_calls = 0          # Số lần forward của model
+        self.positions_evaluated = 0  # Số vị trí đã đưa qua model
+        
         self._load_model()
         self._load_normalization_params()
     
     def _load_model(self):
-        """Tải model đã train"""
+        """Tải model đã train (Keras nếu có TensorFlow, ngược lại bản NumPy .npz)"""
+        numpy_path = os.path.splitext(self.model_path)[0] + '.npz'
         try:
-            import tensorflow as tf
-            # Load với compile=False để tránh lỗi deserialize metrics
-            self.model = tf.keras.models.load_model(self.model_path, compile=False)
+            if self.quantization is not None:
+                path = quantized_path(self.model_path, self.quantization)
+                self.model = NumpyModel(path)
+                print(f"✓ Đã tải model {self.quantization} từ {path}")
+                return
+            if self.model_path.endswith('.npz'):
+                self.model = NumpyModel(self.model_path)
+            else:
+                try:
+                    import tensorflow as tf
+                except ImportError:
+                    # Không có TensorFlow: dùng trọng số đã xuất bằng convert_model.py
+                    if not os.path.exists(numpy_path):
+                        raise
+                    self.model = NumpyModel(numpy_path)
+                    print(f"✓ Đã tải model NumPy từ {numpy_path}")
+                    return
+                # Load với compile=False để tránh lỗi deserialize metrics
+                self.model = tf.keras.models.load_model(self.model_path, compile=False)
             print(f"✓ Đã tải model từ {self.model_path}")
         except Exception as e:
             print(f"✗ Không thể tải model: {e}")
@@ -59,12 +111,14 @@ class MLAgent(BaseAgent):
             print(f"⚠ Lỗi khi load normalization params: {e}")
             print(f"  Sử dụng giá trị mặc định")
     
-    def evaluate_board(self, board):
+    def evaluate_board(self, board, key=None, planes=None):
         """
-        Đánh giá bàn cờ bằng ML model (với cache)
+        Đánh giá bàn cờ bằng ML model (với cache theo khóa Zobrist)
         
         Args:
             board: Bàn cờ cần đánh giá
+            key: Khóa Zobrist của board (None = tính lại)
+            planes: Tensor (8, 8, 12) của board (None = mã hóa từ bitboard)
         
         Returns:
             Điểm số từ model
@@ -73,41 +127,96 @@ class MLAgent(BaseAgent):
             # Fallback: trả về điểm ngẫu nhiên nếu không có model
             return np.random.uniform(-100, 100)
         
-        # Kiểm tra game over
-        if board.is_checkmate():
-            if board.turn == chess.WHITE:
-                return -999999
-            else:
-                return 999999
-        
-        if board.is_stalemate() or board.is_insufficient_material():
-            return 0
-        
-        # Sử dụng FEN làm cache key
-        fen = board.fen()
-        if fen in self._evaluation_cache:
-            return self._evaluation_cache[fen]
+        # Kiểm tra game over trước khi tra cache: cache có thể chứa điểm model của
+        # vị trí kết thúc (prefetch_children đánh giá mọi vị trí con). Khi đang tìm
+        # kiếm, negamax tự phát hiện chiếu hết / hết nước đi trước khi gọi hàm này
+        if not self._in_search:
+            if board.is_checkmate():
+                if board.turn == chess.WHITE:
+                    return -999999
+                else:
+                    return 999999
+            
+            if board.is_stalemate() or board.is_insufficient_material():
+                return 0
         
-        # Chuyển board -> FEN -> Tensor
-        tensor = fen_to_tensor(fen)
+        # Sử dụng khóa Zobrist làm cache key
+        if key is None:
+            key = zobrist.compute_key(board)
+        if key in self._evaluation_cache:
+            return self._evaluation_cache[key]
         
-        # Thêm batch dimension
-        tensor_batch = np.expand_dims(tensor, axis=0)
+        # Tensor từ bitboard (trong tìm kiếm dùng luôn bộ đệm tăng dần), thêm batch dimension
+        if planes is None:
+            planes = board_to_tensor(board)
+        tensor_batch = planes[np.newaxis]
         
         # Dự đoán
         try:
-            score_normalized = self.model.predict(tensor_batch, verbose=0)[0][0]
-            
-            # DE-NORMALIZE: Chuyển từ normalized score về actual score
-            score_actual = float(score_normalized * self.y_std + self.y_mean)
+            score_actual = float(self.predict_batch(tensor_batch)[0])
             
             # Lưu vào cache
-            self._evaluation_cache[fen] = score_actual
+            self._evaluation_cache[key] = score_actual
             return score_actual
         except Exception as e:
             print(f"Lỗi khi predict: {e}")
             return 0.0
     
+    def predict_batch(self, tensors):
+        """
+        Một lần forward của model cho cả batch
+        
+        Args:
+            tensors: numpy array shape (N, 8, 8, 12)
+        
+        Returns:
+            numpy array shape (N,) - điểm đã de-normalize (góc nhìn Trắng)
+        """
+        self.model_calls += 1
+        self.positions_evaluated += len(tensors)
+        # predict_on_batch không tạo lại pipeline dữ liệu như predict() nên chi phí
+        # cố định mỗi lần gọi nhỏ hơn nhiều
+        scores_normalized = np.asarray(self.model.predict_on_batch(tensors)).reshape(-1)
+        
+        # DE-NORMALIZE: Chuyển từ normalized score về actual score
+        return scores_normalized * self.y_std + self.y_mean
+    
+    def prefetch_children(self, board, moves):
+        """
+        Đánh giá trước các vị trí con của nút còn 1 ply bằng các lần forward theo batch
+        
+        Kết quả được ghi vào cache nên evaluate_board ở các lá không gọi model nữa.
+        Alpha-beta vẫn duyệt các con như bình thường; đổi lại các con nằm sau beta
+        cutoff cũng được đánh giá.
+        
+        Args:
+            board: Bàn cờ tại nút
+            moves: Các nước đi hợp lệ của nút
+        """
+        if self.model is None or self.batch_size <= 1:
+            return
+        
+        pending = {}  # Khóa Zobrist -> tensor (bỏ vị trí trùng / đã có trong cache)
+        for move in moves:
+            self.make_move(board, move)
+            key = self.hash_stack[-1]
+            if key not in self._evaluation_cache and key not in pending:
+                pending[key] = self.planes.copy()
+            self.unmake_move(board)
+        if not pending:
+            return
+        
+        keys = list(pending)
+        tensors = np.stack(list(pending.values()))
+        try:
+            for start in range(0, len(keys), self.batch_size):
+                scores = self.predict_batch(tensors[start:start + self.batch_size])
+                for key, score in zip(keys[start:start + self.batch_size], scores):
+                    self._evaluation_cache[key] = float(score)
+        except Exception as e:
+            # Các lá chưa có trong cache sẽ được đánh giá từng vị trí
+            print(f"Lỗi khi predict batch: {e}")
+    
     def order_moves(self, board, moves):
         """
         Sắp xếp nước đi theo thứ tự ưu tiên (MVV-LVA + Checks)
@@ -141,66 +250,151 @@ class MLAgent(BaseAgent):
             if move.promotion:
                 priority += 9000  # Rất cao
             
-            # 3. Checks
-            board.push(move)
-            if board.is_check():
+            # 3. Checks (không cần push/pop)
+            if board.gives_check(move):
                 priority += 50
-            board.pop()
             
             return priority
         
         # Sắp xếp theo priority giảm dần
         return sorted(moves, key=move_priority, reverse=True)
     
-    def minimax(self, board, depth, alpha, beta, maximizing_player):
+    def reset_stats(self):
+        """Reset thống kê (kể cả số lần forward của model)"""
+        super().reset_stats()
+        self.model_calls = 0
+        self.positions_evaluated = 0
+    
+    def get_stats(self):
+        """Thống kê: số node, số lần forward và số vị trí đã đánh giá bằng model"""
+        stats = super().get_stats()
+        stats['model_calls'] = self.model_calls
+        stats['positions_evaluated'] = self.positions_evaluated
+        return stats
+    
+    def set_root(self, board):
+        """Khởi tạo khóa Zobrist và tensor đầu vào cho gốc tìm kiếm"""
+        self.hash_stack = [zobrist.compute_key(board)]
+        self.game_keys = zobrist.history_keys(board)
+        self.planes = board_to_tensor(board)
+        self.plane_stack = []
+    
+    def _plane_changes(self, board, move):
         """
-        Minimax với ML evaluation
+        Các phần tử của tensor đầu vào thay đổi khi đi nước move (gọi trước khi push)
+        
+        Returns:
+            (chỉ số bị xóa về 0, chỉ số được đặt thành 1) trong tensor trải phẳng
+        """
+        piece_type = board.piece_type_at(move.from_square)
+        own = 0 if board.turn == chess.WHITE else 6
+        cleared = [plane_index(move.from_square, piece_type - 1 + own)]
+        if board.is_castling(move):
+            king_to, rook_from, rook_to = castling_squares(move)
+            cleared.append(plane_index(rook_from, chess.ROOK - 1 + own))
+            return cleared, [plane_index(king_to, chess.KING - 1 + own),
+                             plane_index(rook_to, chess.ROOK - 1 + own)]
+        
+        if board.is_en_passant(move):
+            captured_square = move.to_square - 8 if board.turn == chess.WHITE else move.to_square + 8
+            cleared.append(plane_index(captured_square, chess.PAWN - 1 + 6 - own))
+        else:
+            captured = board.piece_type_at(move.to_square)
+            if captured:
+                cleared.append(plane_index(move.to_square, captured - 1 + 6 - own))
+        return cleared, [plane_index(move.to_square, (move.promotion or piece_type) - 1 + own)]
+    
+    def make_move(self, board, move):
+        """Đi nước trong cây tìm kiếm, cập nhật tăng dần khóa Zobrist và tensor đầu vào"""
+        key = self.hash_stack[-1] ^ zobrist.move_key_delta(board, move) ^ zobrist.state_key(board)
+        cleared, placed = self._plane_changes(board, move)
+        flat = self.planes.reshape(-1)
+        for index in cleared:
+            flat[index] = 0.0
+        for index in placed:
+            flat[index] = 1.0
+        self.plane_stack.append((cleared, placed))
+        board.push(move)
+        self.hash_stack.append(key ^ zobrist.state_key(board))
+    
+    def unmake_move(self, board):
+        """Hoàn tác nước đi cuối cùng (cùng khóa Zobrist và tensor đầu vào)"""
+        board.pop()
+        self.hash_stack.pop()
+        cleared, placed = self.plane_stack.pop()
+        flat = self.planes.reshape(-1)
+        for index in placed:
+            flat[index] = 0.0
+        for index in cleared:
+            flat[index] = 1.0
+    
+    def negamax(self, board, depth, alpha, beta):
+        """
+        Negamax + Principal Variation Search với ML evaluation
+        
+        Điểm tính theo góc nhìn bên đang đi. Nước đầu tiên được tìm với cửa sổ
+        đầy đủ, các nước sau dùng cửa sổ rỗng và chỉ tìm lại khi fail-high.
         
         Args:
             board: Bàn cờ hiện tại
             depth: Độ sâu còn lại
             alpha: Alpha value
             beta: Beta value
-            maximizing_player: True nếu maximizing
         
         Returns:
-            Điểm số
+            Điểm số (theo góc nhìn bên đang đi)
         """
         self.nodes_searched += 1
         
-        if depth == 0 or board.is_game_over():
-            return self.evaluate_board(board)
+        # Hòa do lặp lại (so khóa Zobrist trên đường đi + lịch sử ván) hoặc luật 50 nước
+        if board.halfmove_clock >= 100 and not board.is_checkmate():
+            return 0
+        if zobrist.is_repetition(self.hash_stack, self.game_keys, board.halfmove_clock):
+            return 0
         
-        # Sắp xếp nước đi để cải thiện pruning
+        if depth == 0:
+            # Chiếu hết / stalemate ở lá: dừng ở nước hợp lệ đầu tiên tìm được,
+            # không sinh hết danh sách nước đi như is_checkmate / is_stalemate
+            if not any(board.generate_legal_moves()):
+                return -999999 if board.is_check() else 0
+            if board.is_insufficient_material():
+                return 0
+            score = self.evaluate_board(board, self.hash_stack[-1], self.planes)
+            return score if board.turn == chess.WHITE else -score
+        
+        # Không có nước đi hợp lệ: chiếu hết hoặc stalemate
         legal_moves = list(board.legal_moves)
+        if not legal_moves:
+            return -999999 if board.is_check() else 0
+        
+        # Sắp xếp nước đi để cải thiện pruning
         ordered_moves = self.order_moves(board, legal_moves)
         
-        if maximizing_player:
-            max_eval = float('-inf')
-            for move in ordered_moves:
-                board.push(move)
-                eval_score = self.minimax(board, depth - 1, alpha, beta, False)
-                board.pop()
-                max_eval = max(max_eval, eval_score)
-                alpha = max(alpha, eval_score)
-                if beta <= alpha:
-                    break
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for move in ordered_moves:
-                board.push(move)
-                eval_score = self.minimax(board, depth - 1, alpha, beta, True)
-                board.pop()
-                min_eval = min(min_eval, eval_score)
-                beta = min(beta, eval_score)
-                if beta <= alpha:
-                    break
-            return min_eval
+        # Các con đều là lá: đánh giá chung một batch
+        if depth == 1:
+            self.prefetch_children(board, ordered_moves)
+        
+        best_score = float('-inf')
+        for index, move in enumerate(ordered_moves):
+            self.make_move(board, move)
+            if index == 0:
+                score = -self.negamax(board, depth - 1, -beta, -alpha)
+            else:
+                # PVS: cửa sổ rỗng trước, tìm lại nếu vượt alpha
+                score = -self.negamax(board, depth - 1, -alpha - 1, -alpha)
+                if alpha < score < beta:
+                    score = -self.negamax(board, depth - 1, -beta, -alpha)
+            self.unmake_move(board)
+            
+            best_score = max(best_score, score)
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+        return best_score
     
     def get_move(self, board):
         """
-        Tìm nước đi tốt nhất bằng Minimax + ML
+        Tìm nước đi tốt nhất bằng Negamax + ML
         
         Args:
             board: Bàn cờ hiện tại
@@ -218,33 +412,45 @@ class MLAgent(BaseAgent):
         if not legal_moves:
             return None
         
+        # Có nước trong sách khai cuộc thì đi luôn, không cần đánh giá bằng model
+        self.book_hit = False
+        if self.opening_book is not None:
+            move = self.opening_book.get_move(board)
+            if move is not None:
+                self.book_hit = True
+                return move
+        
+        self.set_root(board)
+        
         # Sắp xếp nước đi trước khi đánh giá
         ordered_moves = self.order_moves(board, legal_moves)
+        if self.depth == 1:
+            self.prefetch_children(board, ordered_moves)
         
         best_move = None
-        best_value = float('-inf') if board.turn == chess.WHITE else float('inf')
+        best_value = float('-inf')
         alpha = float('-inf')
         beta = float('inf')
         
-        for move in ordered_moves:
-            board.push(move)
-            
-            if board.turn == chess.BLACK:
-                move_value = self.minimax(board, self.depth - 1, alpha, beta, False)
-            else:
-                move_value = self.minimax(board, self.depth - 1, alpha, beta, True)
-            
-            board.pop()
-            
-            if board.turn == chess.WHITE:
+        self._in_search = True
+        try:
+            for index, move in enumerate(ordered_moves):
+                self.make_move(board, move)
+                
+                if index == 0:
+                    move_value = -self.negamax(board, self.depth - 1, -beta, -alpha)
+                else:
+                    move_value = -self.negamax(board, self.depth - 1, -alpha - 1, -alpha)
+                    if move_value > alpha:
+                        move_value = -self.negamax(board, self.depth - 1, -beta, -alpha)
+                
+                self.unmake_move(board)
+                
                 if move_value > best_value:
                     best_value = move_value
                     best_move = move
                     alpha = max(alpha, move_value)
-            else:
-                if move_value < best_value:
-                    best_value = move_value
-                    best_move = move
-                    beta = min(beta, move_value)
+        finally:
+            self._in_search = False
         
         return best_move
@@ -0,0 +1,280 @@
+"""
+Chạy model đánh giá (CNN) bằng NumPy, không cần TensorFlow
+
+Trọng số được xuất một lần từ file Keras .h5 ra file .npz (convert_model.py). Khi
+xuất, mỗi lớp BatchNormalization được gộp (fold) vào lớp Conv2D / Dense NGAY SAU nó:
+BN là phép affine y * s + t trên từng kênh nên
+    conv(BN(y)) = conv(y, W * s) + conv(t, W)
+Với padding 'same', phần conv(t, W) khác nhau ở các ô sát biên (ô đệm bằng 0 sau BN,
+không phải t) nên bias của lớp conv được lưu thành bản đồ bias (H, W, kênh ra) thay vì
+vector, kết quả vẫn chính xác. BN cuối cùng (trước Flatten) được gộp vào lớp Dense.
+
+Convolution dùng im2col: mỗi ô lấy cửa sổ k x k x C thành một hàng, sau đó nhân
+ma trận với kernel (k * k * C, kênh ra).
+
+Lượng tử hóa sau training (quantize_layers) chỉ là định dạng LƯU TRỮ nén: kernel
+lưu dạng int8 (đối xứng, một scale cho mỗi kênh ra) hoặc float16, bias giữ float32.
+Khi tải, kernel được giải lượng tử về float32 một lần và forward vẫn là phép nhân
+ma trận float32 của BLAS - phép nhân ma trận int8 / float16 của NumPy không dùng
+BLAS và chậm hơn hàng chục lần. Vì vậy tốc độ không đổi; lợi ích là file nhỏ hơn
+4x / 2x, đổi lại sai số của trọng số (xem quantize_model.py).
+"""
+import os
+
+import numpy as np
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0, out=x),
+}
+
+
+def _pad(x, kernel_size, padding):
+    """Đệm 0 quanh bàn cờ cho padding 'same' (kernel lẻ)"""
+    if padding == 'valid':
+        return x
+    pad = kernel_size // 2
+    return np.pad(x, ((0, 0), (pad, pad), (pad, pad), (0, 0)))
+
+
+def _conv2d(x, kernel, padding):
+    """
+    Convolution stride 1 bằng im2col
+
+    Args:
+        x: (N, H, W, C)
+        kernel: (k, k, C, kênh ra) - thứ tự của Keras
+        padding: 'same' hoặc 'valid'
+
+    Returns:
+        (N, H', W', kênh ra), chưa cộng bias
+    """
+    size = kernel.shape[0]
+    padded = _pad(x, size, padding)
+    # Cửa sổ (N, H', W', C, k, k) -> hàng im2col (N * H' * W', C * k * k)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, (size, size), axis=(1, 2))
+    n, height, width = windows.shape[:3]
+    columns = windows.reshape(n * height * width, -1)
+    weights = kernel.transpose(2, 0, 1, 3).reshape(columns.shape[1], -1)
+    return (columns @ weights).reshape(n, height, width, -1)
+
+
+def fold_layers(layers, input_shape=(8, 8, 12)):
+    """
+    Gộp các lớp BatchNormalization vào lớp Conv2D / Dense ngay sau chúng
+
+    Args:
+        layers: Danh sách dict theo thứ tự của model:
+            {'type': 'conv', 'kernel', 'bias', 'activation', 'padding'}
+            {'type': 'batchnorm', 'gamma', 'beta', 'mean', 'variance', 'epsilon'}
+            {'type': 'dense', 'kernel', 'bias', 'activation'}
+            {'type': 'flatten'} / {'type': 'dropout'}
+        input_shape: Kích thước đầu vào (H, W, C)
+
+    Returns:
+        Danh sách lớp đã gộp: conv có 'bias' là bản đồ (H', W', kênh ra), dense có
+        'bias' là vector; không còn batchnorm / flatten / dropout
+    """
+    folded = []
+    shape = tuple(input_shape)
+    scale = shift = None  # BN đang chờ gộp vào lớp tiếp theo
+    for layer in layers:
+        kind = layer['type']
+        if kind == 'batchnorm':
+            if scale is not None:
+                raise ValueError("Hai lớp BatchNormalization liền nhau")
+            scale = layer['gamma'] / np.sqrt(layer['variance'] + layer['epsilon'])
+            shift = layer['beta'] - layer['mean'] * scale
+        elif kind == 'conv':
+            if len(shape) != 3:
+                raise ValueError("Conv2D sau Flatten")
+            kernel = layer['kernel'].astype(np.float64)
+            padding = layer.get('padding', 'same')
+            size = kernel.shape[0]
+            out_size = shape[0] if padding == 'same' else shape[0] - size + 1
+            bias = np.broadcast_to(layer['bias'].astype(np.float64),
+                                   (out_size, out_size, kernel.shape[3])).copy()
+            if scale is not None:
+                # Phần t của BN đi qua conv với cùng padding -> bản đồ bias
+                constant = np.broadcast_to(shift, (1,) + shape)
+                bias += _conv2d(constant, kernel, padding)[0]
+                kernel = kernel * scale[None, None, :, None]
+                scale = shift = None
+            folded.append({'type': 'conv', 'kernel': kernel.astype(np.float32),
+                           'bias': bias.astype(np.float32), 'padding': padding,
+                           'activation': layer.get('activation', 'linear')})
+            shape = (out_size, out_size, kernel.shape[3])
+        elif kind == 'dense':
+            kernel = layer['kernel'].astype(np.float64)
+            bias = layer['bias'].astype(np.float64)
+            if scale is not None:
+                # Flatten giữ kênh ở chiều nhanh nhất: lặp s, t cho từng ô
+                repeats = kernel.shape[0] // len(scale)
+                bias = bias + np.tile(shift, repeats) @ kernel
+                kernel = kernel * np.tile(scale, repeats)[:, None]
+                scale = shift = None
+            folded.append({'type': 'dense', 'kernel': kernel.astype(np.float32),
+                           'bias': bias.astype(np.float32),
+                           'activation': layer.get('activation', 'linear')})
+            shape = (kernel.shape[1],)
+        elif kind == 'flatten':
+            shape = (int(np.prod(shape)),)
+        elif kind != 'dropout':
+            raise ValueError(f"Không hỗ trợ lớp {kind}")
+    if scale is not None:
+        raise ValueError("BatchNormalization ở cuối model không có lớp nào để gộp vào")
+    return folded
+
+
+def layers_from_keras(model):
+    """Đọc danh sách lớp (dạng dict của fold_layers) từ model Keras Sequential"""
+    layers = []
+    for layer in model.layers:
+        kind = type(layer).__name__
+        weights = layer.get_weights()
+        if kind == 'Conv2D':
+            config = layer.get_config()
+            if tuple(config['strides']) != (1, 1) or tuple(config['dilation_rate']) != (1, 1):
+                raise ValueError(f"{layer.name}: chỉ hỗ trợ stride 1, không dilation")
+            layers.append({'type': 'conv', 'kernel': weights[0], 'bias': weights[1],
+                           'activation': config['activation'], 'padding': config['padding']})
+        elif kind == 'BatchNormalization':
+            config = layer.get_config()
+            gamma = weights.pop(0) if config['scale'] else np.ones_like(weights[-1])
+            beta = weights.pop(0) if config['center'] else np.zeros_like(weights[-1])
+            layers.append({'type': 'batchnorm', 'gamma': gamma, 'beta': beta,
+                           'mean': weights[0], 'variance': weights[1],
+                           'epsilon': config['epsilon']})
+        elif kind == 'Dense':
+            layers.append({'type': 'dense', 'kernel': weights[0], 'bias': weights[1],
+                           'activation': layer.get_config()['activation']})
+        elif kind == 'Flatten':
+            layers.append({'type': 'flatten'})
+        elif kind == 'Dropout':
+            layers.append({'type': 'dropout'})
+        elif kind != 'InputLayer':
+            raise ValueError(f"Không hỗ trợ lớp {kind} ({layer.name})")
+    for layer in layers:
+        if layer.get('activation', 'linear') not in ACTIVATIONS:
+            raise ValueError(f"Không hỗ trợ activation {layer['activation']}")
+    return layers
+
+
+QUANTIZATIONS = ('int8', 'float16')
+
+
+def quantize_layers(folded, quantization):
+    """
+    Lượng tử hóa kernel của các lớp đã gộp (để lưu file nhỏ hơn, không làm forward nhanh hơn)
+
+    Args:
+        folded: Kết quả fold_layers (hoặc NumpyModel.layers)
+        quantization: 'int8' (scale theo từng kênh ra = max|W| / 127) hoặc 'float16'
+
+    Returns:
+        Danh sách lớp mới; lớp int8 có thêm 'scale' (float32, một giá trị mỗi kênh ra)
+    """
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Không hỗ trợ lượng tử hóa {quantization}")
+    quantized = []
+    for layer in folded:
+        layer = dict(layer)
+        kernel = layer['kernel'].astype(np.float32)
+        if quantization == 'float16':
+            layer['kernel'] = kernel.astype(np.float16)
+        else:
+            axes = tuple(range(kernel.ndim - 1))
+            scale = np.abs(kernel).max(axis=axes) / 127.0
+            scale[scale == 0] = 1.0
+            layer['kernel'] = np.clip(np.round(kernel / scale), -127, 127).astype(np.int8)
+            layer['scale'] = scale.astype(np.float32)
+        quantized.append(layer)
+    return quantized
+
+
+def quantized_path(path, quantization):
+    """Tên file của model đã lượng tử hóa: models/chess_model.npz -> models/chess_model_int8.npz"""
+    return f"{os.path.splitext(path)[0]}_{quantization}.npz"
+
+
+def save_npz(path, folded):
+    """Lưu các lớp đã gộp (có thể đã lượng tử hóa) ra file .npz"""
+    arrays = {
+        'types': np.array([layer['type'] for layer in folded]),
+        'activations': np.array([layer['activation'] for layer in folded]),
+        'paddings': np.array([layer.get('padding', '') for layer in folded]),
+    }
+    for index, layer in enumerate(folded):
+        arrays[f'kernel_{index}'] = layer['kernel']
+        arrays[f'bias_{index}'] = layer['bias']
+        if 'scale' in layer:
+            arrays[f'scale_{index}'] = layer['scale']
+    np.savez_compressed(path, **arrays)
+
+
+def convert_h5(h5_path, npz_path):
+    """
+    Xuất model Keras .h5 ra .npz (cần TensorFlow, chỉ chạy một lần)
+
+    Returns:
+        Model Keras đã tải (để so sánh kết quả)
+    """
+    import tensorflow as tf
+    model = tf.keras.models.load_model(h5_path, compile=False)
+    save_npz(npz_path, fold_layers(layers_from_keras(model), model.input_shape[1:]))
+    return model
+
+
+class NumpyModel:
+    """Model đánh giá chạy bằng NumPy từ file .npz (giao diện predict giống Keras)"""
+
+    def __init__(self, path=None, layers=None):
+        """
+        Args:
+            path: File .npz tạo bởi save_npz
+            layers: Hoặc danh sách lớp đã gộp (kết quả fold_layers)
+        """
+        # Kiểu lưu kernel trong file: 'int8' / 'float16' / None. Kernel luôn được
+        # giải lượng tử về float32 khi tải (forward float32 như model không lượng tử hóa)
+        self.quantization = None
+        if layers is None:
+            layers = []
+            with np.load(path) as data:
+                for index, (kind, activation, padding) in enumerate(
+                        zip(data['types'], data['activations'], data['paddings'])):
+                    kernel = data[f'kernel_{index}']
+                    if kernel.dtype == np.int8:
+                        self.quantization = 'int8'
+                        kernel = kernel.astype(np.float32) * data[f'scale_{index}']
+                    elif kernel.dtype == np.float16:
+                        self.quantization = 'float16'
+                    layers.append({'type': str(kind), 'activation': str(activation),
+                                   'padding': str(padding), 'kernel': kernel.astype(np.float32),
+                                   'bias': data[f'bias_{index}']})
+        self.path = path
+        self.layers = layers
+
+    def predict_on_batch(self, x):
+        """
+        Args:
+            x: (N, 8, 8, 12)
+
+        Returns:
+            (N, 1) float32
+        """
+        x = np.asarray(x, dtype=np.float32)
+        for layer in self.layers:
+            if layer['type'] == 'conv':
+                x = _conv2d(x, layer['kernel'], layer['padding']) + layer['bias']
+            else:
+                x = x.reshape(len(x), -1) @ layer['kernel'] + layer['bias']
+            x = ACTIVATIONS[layer['activation']](x)
+        return x
+
+    def predict(self, x, batch_size=256, verbose=0):
+        """Như predict_on_batch nhưng chia thành các batch tối đa batch_size vị trí"""
+        x = np.asarray(x, dtype=np.float32)
+        outputs = [self.predict_on_batch(x[start:start + batch_size])
+                   for start in range(0, len(x), batch_size)]
+        return np.concatenate(outputs) if outputs else np.zeros((0, 1), dtype=np.float32)
@@ -0,0 +1,121 @@
+"""
+Sách khai cuộc định dạng Polyglot (.bin)
+
+File sách là dãy entry 16 byte (khóa Zobrist, nước đi, trọng số, learn) sắp xếp
+theo khóa. Việc đọc dùng chess.polyglot.MemoryMappedReader: file được mmap (không
+nạp vào RAM) và tra cứu bằng tìm kiếm nhị phân trên khóa Zobrist Polyglot - cùng
+khóa với agents.zobrist.
+"""
+import os
+import random
+import struct
+
+import chess
+import chess.polyglot
+
+from config import OPENING_BOOK_PATH, OPENING_BOOK_MAX_PLY
+from utils import castling_squares
+
+
+# Entry Polyglot: khóa (8 byte), nước đi (2), trọng số (2), learn (4), big-endian
+ENTRY_STRUCT = struct.Struct(">QHHI")
+MAX_WEIGHT = 0xFFFF
+
+
+class OpeningBook:
+    """Sách khai cuộc Polyglot, đọc qua mmap"""
+
+    def __init__(self, path=OPENING_BOOK_PATH, max_ply=OPENING_BOOK_MAX_PLY, seed=None):
+        """
+        Args:
+            path: Đường dẫn file .bin
+            max_ply: Chỉ dùng sách trong max_ply nửa nước đầu ván (None = không giới hạn)
+            seed: Seed cho lựa chọn ngẫu nhiên theo trọng số (None = ngẫu nhiên)
+        """
+        self.path = path
+        self.max_ply = max_ply
+        self._reader = chess.polyglot.MemoryMappedReader(path)
+        self._random = random.Random(seed)
+
+    @classmethod
+    def open_if_exists(cls, path=OPENING_BOOK_PATH, **kwargs):
+        """Mở sách nếu file tồn tại, ngược lại trả về None (agent tìm kiếm bình thường)"""
+        if path is None or not os.path.exists(path):
+            return None
+        return cls(path, **kwargs)
+
+    def __len__(self):
+        return len(self._reader)
+
+    def entries(self, board):
+        """
+        Các nước trong sách cho vị trí `board`
+
+        Returns:
+            Danh sách (nước đi, trọng số), trọng số giảm dần
+        """
+        entries = [(entry.move, entry.weight) for entry in self._reader.find_all(board)]
+        entries.sort(key=lambda item: item[1], reverse=True)
+        return entries
+
+    def get_move(self, board, weighted_random=True):
+        """
+        Chọn nước đi từ sách
+
+        Args:
+            board: Bàn cờ hiện tại
+            weighted_random: True = chọn ngẫu nhiên theo trọng số, False = trọng số lớn nhất
+
+        Returns:
+            chess.Move hoặc None nếu vị trí không có trong sách
+        """
+        if self.max_ply is not None and board.ply() >= self.max_ply:
+            return None
+        try:
+            if weighted_random:
+                return self._reader.weighted_choice(board, random=self._random).move
+            return self._reader.find(board).move
+        except IndexError:
+            return None
+
+    def close(self):
+        """Đóng file"""
+        self._reader.close()
+
+
+def encode_move(board, move):
+    """
+    Mã hóa nước đi theo Polyglot: to | from << 6 | promotion << 12
+
+    Nhập thành được ghi là Vua "bắt" Xe của mình (e1h1, e1a1, ...).
+    """
+    to_square = move.to_square
+    if board.is_castling(move):
+        _, rook_from, _ = castling_squares(move)
+        to_square = rook_from
+    promotion = move.promotion - 1 if move.promotion else 0
+    return to_square | (move.from_square << 6) | (promotion << 12)
+
+
+def write_book(path, move_weights):
+    """
+    Ghi sách Polyglot
+
+    Args:
+        path: File .bin đầu ra
+        move_weights: dict {(khóa Zobrist, mã nước Polyglot): trọng số}
+
+    Returns:
+        Số entry đã ghi
+    """
+    if not move_weights:
+        entries = []
+    else:
+        # Trọng số phải vừa 16 bit: co giãn theo trọng số lớn nhất
+        scale = max(1.0, max(move_weights.values()) / MAX_WEIGHT)
+        entries = sorted((key, raw_move, max(1, int(weight / scale)))
+                         for (key, raw_move), weight in move_weights.items() if weight > 0)
+    with open(path, "wb") as f:
+        for key, raw_move, weight in entries:
+            f.write(ENTRY_STRUCT.pack(key, raw_move, weight, 0))
+    return len(entries)
@@ -0,0 +1,73 @@
+"""
+Bảng băm cấu trúc Tốt (pawn hash) cho hàm đánh giá
+
+Các yếu tố Tốt (tốt kép, tốt thông, tốt che Vua) chỉ phụ thuộc vào vị trí các Tốt và
+hai Vua, mà cấu trúc Tốt rất ít thay đổi trong cây tìm kiếm. Bảng có kích thước cố định,
+đánh chỉ số bằng khóa Zobrist chỉ gồm Tốt (zobrist.pawn_key); mỗi mục lưu nguyên khóa
+để kiểm tra trùng, mục mới luôn thay mục cũ.
+
+Bảng tự đếm số lần tra / trúng và thời gian tính lại khi trượt, từ đó ước lượng thời
+gian tiết kiệm được (số lần trúng x thời gian trung bình một lần tính lại).
+"""
+from config import PAWN_HASH_ENTRIES
+
+
+class PawnHashTable:
+    """Bảng băm kích thước cố định: khóa Tốt -> mục (khóa, ...điểm)"""
+
+    def __init__(self, num_entries=PAWN_HASH_ENTRIES):
+        """
+        Args:
+            num_entries: Số mục (làm tròn xuống lũy thừa của 2)
+        """
+        size = 1
+        while size * 2 <= max(1, num_entries):
+            size *= 2
+        self.num_entries = size
+        self._mask = size - 1
+        self._entries = [None] * size
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Đặt lại thống kê (gọi đầu mỗi lần tìm nước đi)"""
+        self.probes = 0
+        self.hits = 0
+        self.miss_time = 0.0  # Tổng thời gian tính lại khi trượt (giây)
+
+    def probe(self, key):
+        """
+        Tra mục theo khóa Tốt
+
+        Returns:
+            Mục đã lưu (entry[0] == key) hoặc None
+        """
+        self.probes += 1
+        entry = self._entries[key & self._mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, entry, elapsed=0.0):
+        """
+        Lưu mục (entry[0] phải là key)
+
+        Args:
+            elapsed: Thời gian đã tính mục này khi trượt (để ước lượng thời gian tiết kiệm)
+        """
+        self._entries[key & self._mask] = entry
+        self.miss_time += elapsed
+
+    def clear(self):
+        """Xóa toàn bộ bảng"""
+        self._entries = [None] * self.num_entries
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    @property
+    def time_saved(self):
+        """Thời gian ước lượng đã tiết kiệm (giây)"""
+        misses = self.probes - self.hits
+        return self.hits * self.miss_time / misses if misses else 0.0
@@ -0,0 +1,127 @@
+"""
+Tìm kiếm song song các nước đi ở gốc bằng ProcessPoolExecutor
+
+Nước đầu tiên (nước PV) được tiến trình chính tìm trước để có alpha; các nước còn
+lại được chia cho các tiến trình worker, mỗi nước tìm với cửa sổ rỗng quanh alpha
+đó và chỉ tìm lại với cửa sổ đầy đủ khi vượt alpha (như PVS).
+
+Mỗi worker giữ một MinimaxAgent riêng (kèm bảng chuyển vị) suốt vòng đời của pool,
+nên chi phí khởi động tiến trình và import module chỉ trả một lần cho nhiều nước
+đi và nhiều ván. Bảng của worker sang thế hệ mới ở mỗi lượt tìm của tiến trình chính
+và được xóa khi sang ván mới (RootMovePool.new_game).
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# MinimaxAgent của tiến trình worker (tạo trong _init_worker)
+_worker_agent = None
+# Ván và lượt tìm kiếm của tiến trình chính mà bảng chuyển vị của worker đang ứng với
+_worker_game = 0
+_worker_search = None
+
+
+def _init_worker(agent_options):
+    """Khởi tạo agent của tiến trình worker (chạy một lần khi worker khởi động)"""
+    global _worker_agent
+    # Import trễ để tránh vòng lặp import với minimax_agent
+    from .minimax_agent import MinimaxAgent
+    _worker_agent = MinimaxAgent(**agent_options)
+
+
+def _search_move(board, move, depth, alpha, beta, time_limit, node_limit, game, search):
+    """
+    Tìm một nước đi ở gốc trong tiến trình worker
+
+    Args:
+        game: Số thứ tự ván của pool, khác ván trước = xóa bảng chuyển vị của worker
+        search: Mã lượt tìm của tiến trình chính, khác lượt trước = bảng sang thế hệ mới
+
+    Returns:
+        (điểm theo góc nhìn bên đi ở gốc hoặc None nếu hết thời gian/số node, số node)
+    """
+    from .minimax_agent import SearchAborted
+
+    global _worker_game, _worker_search
+    agent = _worker_agent
+    if game != _worker_game:
+        agent.new_game()
+        _worker_game = game
+        _worker_search = None
+    if search != _worker_search:
+        agent.transposition_table.new_search()
+        _worker_search = search
+
+    agent.reset_stats()
+    agent.set_root(board)
+    agent._deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    agent._max_nodes = node_limit
+    limited = time_limit is not None or node_limit is not None
+    agent._next_check = 0 if limited else float('inf')
+    agent._in_search = True
+    try:
+        agent.make_move(board, move)
+        score = -agent.negamax(board, depth - 1, -alpha - 1, -alpha)
+        if alpha < score < beta:
+            score = -agent.negamax(board, depth - 1, -beta, -alpha)
+    except SearchAborted:
+        score = None
+    finally:
+        agent._in_search = False
+        agent._deadline = None
+        agent._max_nodes = None
+        agent._next_check = float('inf')
+    return score, agent.nodes_searched
+
+
+class RootMovePool:
+    """Pool tiến trình dùng lâu dài để tìm song song các nước đi ở gốc"""
+
+    def __init__(self, num_workers, agent_options):
+        """
+        Args:
+            num_workers: Số tiến trình worker
+            agent_options: Tham số khởi tạo MinimaxAgent của worker (mỗi worker có
+                           bảng chuyển vị riêng dung lượng tt_mb)
+        """
+        self.num_workers = num_workers
+        self._game = 0
+        self._executor = ProcessPoolExecutor(max_workers=num_workers,
+                                             initializer=_init_worker,
+                                             initargs=(agent_options,))
+
+    def new_game(self):
+        """Ván mới: worker xóa bảng chuyển vị ở lần tìm tiếp theo"""
+        self._game += 1
+
+    def search_moves(self, board, moves, depth, alpha, beta, time_limit=None, node_limit=None,
+                     search=None):
+        """
+        Tìm song song các nước đi với cùng cửa sổ (alpha, beta)
+
+        Args:
+            board: Bàn cờ gốc
+            moves: Các nước cần tìm
+            depth: Độ sâu tính từ gốc
+            alpha: Alpha có được từ nước PV
+            beta: Cận trên của cửa sổ
+            time_limit: Thời gian còn lại (giây), None = không giới hạn
+            node_limit: Số node tối đa cho mỗi nước, None = không giới hạn
+            search: Mã lượt tìm của tiến trình chính (vd. thế hệ bảng chuyển vị)
+
+        Returns:
+            (danh sách (nước đi, điểm hoặc None nếu hết thời gian/số node), tổng số node)
+        """
+        futures = [self._executor.submit(_search_move, board, move, depth, alpha, beta,
+                                         time_limit, node_limit, self._game, search)
+                   for move in moves]
+        results = []
+        total_nodes = 0
+        for move, future in zip(moves, futures):
+            score, nodes = future.result()
+            results.append((move, score))
+            total_nodes += nodes
+        return results, total_nodes
+
+    def close(self):
+        """Kết thúc các tiến trình worker"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
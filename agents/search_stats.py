@@ -0,0 +1,151 @@
+"""
+Thống kê tìm kiếm của MinimaxAgent cho một nước đi
+
+SearchStats gom các bộ đếm của lần get_move gần nhất (node, node quiescence, bảng
+chuyển vị, beta cutoff) và danh sách IterationStats của từng iteration hoàn chỉnh
+trong Iterative Deepening. SearchStats vẫn đọc được như dict (stats['nodes_searched'])
+để tương thích với BaseAgent.get_stats.
+"""
+
+
+class IterationStats:
+    """Kết quả một iteration hoàn chỉnh của Iterative Deepening"""
+
+    __slots__ = ('depth', 'score', 'nodes', 'qnodes', 'time', 'pv')
+
+    def __init__(self, depth, score, nodes, qnodes, time, pv):
+        """
+        Args:
+            depth: Độ sâu của iteration
+            score: Điểm tốt nhất (góc nhìn bên đi ở gốc)
+            nodes: Số node của iteration (kể cả quiescence)
+            qnodes: Số node quiescence của iteration
+            time: Thời gian iteration (giây)
+            pv: Biến chính (danh sách chess.Move)
+        """
+        self.depth = depth
+        self.score = score
+        self.nodes = nodes
+        self.qnodes = qnodes
+        self.time = time
+        self.pv = pv
+
+    @property
+    def nps(self):
+        return self.nodes / self.time if self.time > 0 else 0.0
+
+    def __str__(self):
+        pv = " ".join(move.uci() for move in self.pv)
+        return (f"depth {self.depth:2d}  score {self.score:>7}  nodes {self.nodes:>8,} "
+                f"(q {self.qnodes:>8,})  {self.nps:>8,.0f} nps  {self.time:6.2f}s  pv {pv}")
+
+
+class SearchStats:
+    """Thống kê tìm kiếm của nước đi gần nhất"""
+
+    def __init__(self, name, nodes, qnodes, time, tt_probes, tt_hits, tt_cutoffs,
+                 beta_cutoffs, first_move_cutoffs, iterations, extra=None):
+        """
+        Args:
+            name: Tên agent
+            nodes: Tổng số node (negamax + quiescence, kể cả tiến trình phụ)
+            qnodes: Số node quiescence của tiến trình chính
+            time: Thời gian tìm kiếm (giây)
+            tt_probes / tt_hits / tt_cutoffs: Số lần tra bảng chuyển vị / tìm thấy /
+                                              trả điểm ngay từ bảng
+            beta_cutoffs: Số nút bị beta cutoff
+            first_move_cutoffs: Số beta cutoff do nước đầu tiên được xét
+            iterations: Danh sách IterationStats
+            extra: Các số liệu khác (bảng băm Tốt...) thêm vào as_dict()
+        """
+        self.name = name
+        self.nodes = nodes
+        self.qnodes = qnodes
+        self.time = time
+        self.tt_probes = tt_probes
+        self.tt_hits = tt_hits
+        self.tt_cutoffs = tt_cutoffs
+        self.beta_cutoffs = beta_cutoffs
+        self.first_move_cutoffs = first_move_cutoffs
+        self.iterations = list(iterations)
+        self.extra = dict(extra or {})
+
+    @property
+    def depth(self):
+        """Độ sâu hoàn chỉnh lớn nhất"""
+        return self.iterations[-1].depth if self.iterations else 0
+
+    @property
+    def score(self):
+        return self.iterations[-1].score if self.iterations else None
+
+    @property
+    def pv(self):
+        return self.iterations[-1].pv if self.iterations else []
+
+    @property
+    def nps(self):
+        return self.nodes / self.time if self.time > 0 else 0.0
+
+    @property
+    def tt_hit_rate(self):
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    @property
+    def tt_cutoff_rate(self):
+        return self.tt_cutoffs / self.tt_probes if self.tt_probes else 0.0
+
+    @property
+    def first_move_cutoff_rate(self):
+        """Tỉ lệ beta cutoff xảy ra ngay ở nước đầu tiên (đo chất lượng sắp xếp nước đi)"""
+        return self.first_move_cutoffs / self.beta_cutoffs if self.beta_cutoffs else 0.0
+
+    @property
+    def branching_factor(self):
+        """Hệ số phân nhánh hiệu dụng: trung bình nhân tỉ lệ node giữa các iteration liên tiếp"""
+        nodes = [iteration.nodes for iteration in self.iterations if iteration.nodes]
+        if len(nodes) < 2:
+            return 0.0
+        return (nodes[-1] / nodes[0]) ** (1.0 / (len(nodes) - 1))
+
+    def as_dict(self):
+        """Dạng dict (khóa 'name', 'nodes_searched' như BaseAgent.get_stats)"""
+        stats = {
+            'name': self.name,
+            'nodes_searched': self.nodes,
+            'qnodes_searched': self.qnodes,
+            'depth': self.depth,
+            'score': self.score,
+            'pv': [move.uci() for move in self.pv],
+            'time': self.time,
+            'nps': self.nps,
+            'tt_probes': self.tt_probes,
+            'tt_hit_rate': self.tt_hit_rate,
+            'tt_cutoff_rate': self.tt_cutoff_rate,
+            'first_move_cutoff_rate': self.first_move_cutoff_rate,
+            'branching_factor': self.branching_factor,
+            'nodes_per_depth': {iteration.depth: iteration.nodes for iteration in self.iterations},
+        }
+        stats.update(self.extra)
+        return stats
+
+    def __getitem__(self, key):
+        return self.as_dict()[key]
+
+    def get(self, key, default=None):
+        return self.as_dict().get(key, default)
+
+    def summary(self):
+        """Các dòng tóm tắt để in ra màn hình"""
+        pv = " ".join(move.uci() for move in self.pv)
+        lines = [
+            f"Depth {self.depth}, score {self.score}, PV: {pv}",
+            f"Nodes {self.nodes:,} (quiescence {self.qnodes:,}), {self.nps:,.0f} nodes/s, "
+            f"branching factor {self.branching_factor:.2f}",
+            f"TT hit {self.tt_hit_rate:.1%}, TT cutoff {self.tt_cutoff_rate:.1%}, "
+            f"first-move cutoff {self.first_move_cutoff_rate:.1%}",
+        ]
+        if 'pawn_hash_hit_rate' in self.extra:
+            lines.append(f"Pawn hash hit {self.extra['pawn_hash_hit_rate']:.1%}, "
+                         f"saved ~{self.extra['pawn_hash_time_saved'] * 1000:.0f} ms")
+        return lines
@@ -0,0 +1,80 @@
+"""
+Static Exchange Evaluation (SEE) - Ước lượng kết quả chuỗi trao đổi quân trên một ô
+
+Mỗi bên lần lượt bắt lại bằng quân rẻ nhất đang tấn công ô đích. Khi một quân
+bị nhấc khỏi bàn cờ, các quân trượt (Tượng, Xe, Hậu) đứng sau nó được tính là
+tấn công xuyên (x-ray) vì board.attackers_mask được gọi với bitboard chiếm ô mới.
+Bỏ qua quân bị ghim và chiếu hết - đây chỉ là ước lượng nhanh dùng để sắp xếp
+và cắt tỉa nước bắt quân.
+"""
+import chess
+
+from .incremental_eval import PIECE_VALUES_BY_TYPE
+
+
+def captured_piece_type(board, move):
+    """Loại quân bị bắt bởi nước `move` (kể cả bắt tốt qua đường), None nếu không bắt"""
+    captured_type = board.piece_type_at(move.to_square)
+    if captured_type is None and board.is_en_passant(move):
+        return chess.PAWN
+    return captured_type
+
+
+def static_exchange(board, move):
+    """
+    Điểm vật chất bên đang đi thu được sau chuỗi trao đổi bắt đầu bằng `move`
+
+    Args:
+        board: Bàn cờ trước khi đi
+        move: Nước bắt quân / phong cấp (nước yên lặng cho kết quả <= 0)
+
+    Returns:
+        Điểm SEE (centipawn): > 0 lời, 0 hòa, < 0 lỗ
+    """
+    from_square = move.from_square
+    to_square = move.to_square
+    if board.is_castling(move):
+        return 0
+
+    occupied = board.occupied ^ chess.BB_SQUARES[from_square]
+    moving_type = board.piece_type_at(from_square)
+
+    captured_type = board.piece_type_at(to_square)
+    if captured_type is None and board.is_en_passant(move):
+        captured_type = chess.PAWN
+        captured_square = to_square - 8 if board.turn == chess.WHITE else to_square + 8
+        occupied ^= chess.BB_SQUARES[captured_square]
+
+    gains = [PIECE_VALUES_BY_TYPE[captured_type] if captured_type else 0]
+    # Giá trị quân đang đứng trên ô đích (sẽ bị bắt ở lượt kế tiếp)
+    on_square = PIECE_VALUES_BY_TYPE[moving_type]
+    if move.promotion:
+        gains[0] += PIECE_VALUES_BY_TYPE[move.promotion] - PIECE_VALUES_BY_TYPE[chess.PAWN]
+        on_square = PIECE_VALUES_BY_TYPE[move.promotion]
+
+    side = not board.turn
+    while True:
+        attackers = board.attackers_mask(side, to_square, occupied) & occupied
+        if not attackers:
+            break
+
+        # Quân rẻ nhất của bên `side` đang tấn công ô đích
+        for piece_type in chess.PIECE_TYPES:
+            candidates = attackers & board.pieces_mask(piece_type, side)
+            if candidates:
+                break
+
+        # Vua không được bắt vào ô vẫn còn bị đối phương tấn công
+        if piece_type == chess.KING and \
+                board.attackers_mask(not side, to_square, occupied) & occupied:
+            break
+
+        gains.append(on_square - gains[-1])
+        on_square = PIECE_VALUES_BY_TYPE[piece_type]
+        occupied ^= candidates & -candidates
+        side = not side
+
+    # Mỗi bên có quyền dừng trao đổi nếu bắt tiếp làm mình lỗ
+    for index in range(len(gains) - 1, 0, -1):
+        gains[index - 1] = -max(-gains[index - 1], gains[index])
+    return gains[0]
@@ -0,0 +1,230 @@
+"""
+Bảng chuyển vị (Transposition Table) cho tìm kiếm Alpha-Beta
+
+Bảng có kích thước cố định, cấp phát sẵn trong một buffer array('Q')
+nên bộ nhớ không tăng theo thời gian chơi. Mỗi bucket có 2 slot:
+- Slot 0: ưu tiên độ sâu (chỉ bị thay khi mục mới sâu hơn hoặc bằng,
+  hoặc khi mục cũ thuộc lượt tìm kiếm trước)
+- Slot 1: luôn thay thế
+Mỗi slot gồm 2 số 64-bit: (khóa Zobrist XOR dữ liệu) và dữ liệu đã đóng gói.
+Lưu khóa dạng XOR giúp nhiều tiến trình dùng chung bảng (shared memory) mà không
+cần khóa: một slot bị ghi dở (2 word đến từ 2 lần ghi khác nhau) sẽ không khớp khóa
+khi tra cứu và bị coi như không có.
+
+Bảng được giữ suốt ván cờ; mỗi lần get_move tăng bộ đếm thế hệ (generation)
+để các mục cũ bị thay thế trước.
+"""
+import weakref
+from array import array
+from multiprocessing import shared_memory
+
+import chess
+
+from config import TT_SIZE_MB
+
+
+# Loại điểm lưu trong bảng
+EXACT = 0        # Điểm chính xác (alpha < score < beta)
+LOWER_BOUND = 1  # Fail-high: điểm thật >= score
+UPPER_BOUND = 2  # Fail-low: điểm thật <= score
+
+SLOT_WORDS = 2                        # Khóa + dữ liệu
+BUCKET_SLOTS = 2                      # Ưu tiên độ sâu + luôn thay thế
+BUCKET_WORDS = SLOT_WORDS * BUCKET_SLOTS
+BUCKET_BYTES = 8 * BUCKET_WORDS
+
+# Bố cục dữ liệu đóng gói (64 bit):
+#   bit 0-15  : nước đi (from | to << 6 | promotion << 12), 0 = không có
+#   bit 16-47 : điểm số (cộng SCORE_OFFSET để thành số không âm)
+#   bit 48-55 : độ sâu
+#   bit 56-57 : loại điểm
+#   bit 58-63 : thế hệ (generation) của lượt tìm kiếm đã lưu mục
+SCORE_OFFSET = 1 << 31
+SCORE_SHIFT = 16
+DEPTH_SHIFT = 48
+FLAG_SHIFT = 56
+GENERATION_SHIFT = 58
+GENERATION_MASK = 0x3F
+
+
+def encode_move(move):
+    """Mã hóa nước đi thành số 16-bit (0 nếu không có nước đi)"""
+    if not move:
+        return 0
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(code):
+    """Giải mã số 16-bit thành chess.Move (None nếu bằng 0)"""
+    if not code:
+        return None
+    return chess.Move(code & 63, (code >> 6) & 63, (code >> 12) or None)
+
+
+class TTEntry:
+    """Một mục trong bảng chuyển vị"""
+
+    __slots__ = ('depth', 'score', 'flag', 'best_move')
+
+    def __init__(self, depth, score, flag, best_move=None):
+        self.depth = depth
+        self.score = score
+        self.flag = flag
+        self.best_move = best_move
+
+
+def _release_shared(view, shm, unlink):
+    """Giải phóng shared memory (view phải được release trước khi close)"""
+    view.release()
+    shm.close()
+    if unlink:
+        shm.unlink()
+
+
+class TranspositionTable:
+    """Bảng chuyển vị dùng khóa Zobrist 64-bit, kích thước cố định"""
+
+    def __init__(self, size_mb=TT_SIZE_MB, shared=False):
+        """
+        Args:
+            size_mb: Dung lượng tối đa (MB). Số bucket được làm tròn xuống lũy thừa của 2
+            shared: Cấp phát trong multiprocessing.shared_memory để tiến trình khác
+                    gắn vào bằng TranspositionTable.attach(shared_name, num_buckets)
+        """
+        num_buckets = 1
+        while num_buckets * 2 * BUCKET_BYTES <= size_mb * 1024 * 1024:
+            num_buckets *= 2
+        self._init_buckets(num_buckets)
+        if shared:
+            # Vùng nhớ mới tạo đã được điền 0
+            self._attach_shared(shared_memory.SharedMemory(create=True, size=num_buckets * BUCKET_BYTES),
+                                owner=True)
+        else:
+            self._shm = None
+            self._table = array('Q', [0]) * (num_buckets * BUCKET_WORDS)
+
+    @classmethod
+    def attach(cls, name, num_buckets):
+        """
+        Gắn vào bảng dùng chung đã được tiến trình khác tạo (shared=True)
+
+        Args:
+            name: Tên vùng shared memory (thuộc tính shared_name của bảng gốc)
+            num_buckets: Số bucket của bảng gốc
+        """
+        table = cls.__new__(cls)
+        table._init_buckets(num_buckets)
+        table._attach_shared(shared_memory.SharedMemory(name=name), owner=False)
+        return table
+
+    def _init_buckets(self, num_buckets):
+        self.num_buckets = num_buckets
+        self._mask = num_buckets - 1
+        self.generation = 0
+
+    def _attach_shared(self, shm, owner):
+        self._shm = shm
+        self._table = shm.buf.cast('Q')
+        # Chỉ tiến trình tạo bảng mới xóa vùng nhớ khi bảng bị thu hồi
+        self._finalizer = weakref.finalize(self, _release_shared, self._table, shm, owner)
+
+    @property
+    def shared(self):
+        """Bảng có nằm trong shared memory không"""
+        return self._shm is not None
+
+    @property
+    def shared_name(self):
+        """Tên vùng shared memory (None nếu bảng không dùng chung)"""
+        return self._shm.name if self._shm is not None else None
+
+    def close(self):
+        """Giải phóng shared memory ngay (không cần gọi với bảng thường)"""
+        if self._shm is not None:
+            self._finalizer()
+
+    @property
+    def size_bytes(self):
+        """Dung lượng buffer (byte)"""
+        return len(self._table) * self._table.itemsize
+
+    def probe(self, key):
+        """
+        Tra cứu vị trí
+
+        Args:
+            key: Khóa Zobrist của vị trí
+
+        Returns:
+            TTEntry hoặc None nếu chưa có
+        """
+        table = self._table
+        index = (key & self._mask) * BUCKET_WORDS
+        data = table[index + 1]
+        if not data or table[index] ^ data != key:
+            data = table[index + 3]
+            if not data or table[index + 2] ^ data != key:
+                return None
+        return TTEntry((data >> DEPTH_SHIFT) & 0xFF,
+                       ((data >> SCORE_SHIFT) & 0xFFFFFFFF) - SCORE_OFFSET,
+                       (data >> FLAG_SHIFT) & 3,
+                       decode_move(data & 0xFFFF))
+
+    def store(self, key, depth, score, flag, best_move=None):
+        """
+        Lưu kết quả tìm kiếm của vị trí
+
+        Args:
+            key: Khóa Zobrist
+            depth: Độ sâu đã tìm kiếm
+            score: Điểm số (được làm tròn về số nguyên)
+            flag: EXACT, LOWER_BOUND hoặc UPPER_BOUND
+            best_move: Nước đi tốt nhất (nếu có)
+        """
+        table = self._table
+        index = (key & self._mask) * BUCKET_WORDS
+        depth = max(0, min(depth, 0xFF))
+
+        # Chọn slot: slot 0 giữ mục sâu nhất, slot 1 luôn bị thay
+        old_data = table[index + 1]
+        if table[index] ^ old_data == key or not old_data or \
+                (old_data >> GENERATION_SHIFT) != self.generation:
+            slot = index
+        elif depth >= (old_data >> DEPTH_SHIFT) & 0xFF:
+            # Mục cũ ở slot 0 bị đẩy xuống slot 1 thay vì mất hẳn
+            slot = index
+            table[index + 2] = table[index]
+            table[index + 3] = table[index + 1]
+        else:
+            slot = index + SLOT_WORDS
+
+        move_code = encode_move(best_move)
+        # Giữ lại nước đi tốt nhất cũ nếu lần này không tìm được
+        if not move_code and table[slot] ^ table[slot + 1] == key:
+            move_code = table[slot + 1] & 0xFFFF
+
+        data = (move_code |
+                ((int(score) + SCORE_OFFSET) << SCORE_SHIFT) |
+                (depth << DEPTH_SHIFT) |
+                (flag << FLAG_SHIFT) |
+                (self.generation << GENERATION_SHIFT))
+        table[slot] = key ^ data
+        table[slot + 1] = data
+
+    def new_search(self):
+        """Bắt đầu lượt tìm kiếm mới: các mục của lượt trước thành "cũ" """
+        self.generation = (self.generation + 1) & GENERATION_MASK
+
+    def clear(self):
+        """Xóa toàn bộ bảng"""
+        if self._shm is not None:
+            self._shm.buf[:] = bytes(len(self._shm.buf))
+        else:
+            self._table = array('Q', [0]) * len(self._table)
+        self.generation = 0
+
+    def hashfull(self, sample=1000):
+        """Tỉ lệ slot đã dùng (phần nghìn), ước lượng trên `sample` slot đầu tiên"""
+        slots = min(sample, len(self._table) // SLOT_WORDS)
+        used = sum(1 for i in range(slots) if self._table[i * SLOT_WORDS + 1])
+        return used * 1000 // slots
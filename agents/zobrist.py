@@ -0,0 +1,187 @@
+"""
+Zobrist hashing cho bàn cờ (cập nhật tăng dần khi push/pop)
+
+Dùng cùng bảng số ngẫu nhiên của Polyglot nên khóa tính ra trùng với
+chess.polyglot.zobrist_hash(board).
+"""
+import chess
+import chess.polyglot
+from chess.polyglot import POLYGLOT_RANDOM_ARRAY
+from utils import castling_squares
+
+
+# PIECE_KEYS[color][piece_type][square] (piece_type từ 1 đến 6)
+PIECE_KEYS = [[[0] * 64 for _ in range(7)] for _ in range(2)]
+for _piece_type in chess.PIECE_TYPES:
+    for _color in chess.COLORS:
+        _piece_index = (_piece_type - 1) * 2 + int(_color)
+        PIECE_KEYS[_color][_piece_type] = list(
+            POLYGLOT_RANDOM_ARRAY[64 * _piece_index:64 * _piece_index + 64]
+        )
+
+CASTLING_KEYS = POLYGLOT_RANDOM_ARRAY[768:772]  # K, Q, k, q
+EP_KEYS = POLYGLOT_RANDOM_ARRAY[772:780]         # Theo cột a-h
+TURN_KEY = POLYGLOT_RANDOM_ARRAY[780]            # Trắng đi
+
+
+def compute_key(board):
+    """Tính khóa Zobrist đầy đủ từ đầu (chỉ dùng ở gốc cây tìm kiếm)"""
+    return chess.polyglot.zobrist_hash(board)
+
+
+def state_key(board):
+    """
+    Phần khóa phụ thuộc trạng thái (quyền nhập thành, bắt tốt qua đường, lượt đi)
+
+    Phần này rẻ để tính lại nên được XOR ra trước khi push và XOR vào sau khi push.
+    """
+    key = TURN_KEY if board.turn == chess.WHITE else 0
+
+    castling = board.clean_castling_rights()
+    if castling:
+        if castling & chess.BB_H1:
+            key ^= CASTLING_KEYS[0]
+        if castling & chess.BB_A1:
+            key ^= CASTLING_KEYS[1]
+        if castling & chess.BB_H8:
+            key ^= CASTLING_KEYS[2]
+        if castling & chess.BB_A8:
+            key ^= CASTLING_KEYS[3]
+
+    ep_square = board.ep_square
+    if ep_square is not None:
+        # Giống Polyglot: chỉ tính khi có tốt sẵn sàng bắt qua đường
+        if board.turn == chess.WHITE:
+            ep_mask = chess.shift_down(chess.BB_SQUARES[ep_square])
+        else:
+            ep_mask = chess.shift_up(chess.BB_SQUARES[ep_square])
+        ep_mask = chess.shift_left(ep_mask) | chess.shift_right(ep_mask)
+        if ep_mask & board.pawns & board.occupied_co[board.turn]:
+            key ^= EP_KEYS[ep_square & 7]
+
+    return key
+
+
+def move_key_delta(board, move):
+    """
+    Phần thay đổi của khóa do quân cờ di chuyển (gọi TRƯỚC khi push)
+
+    Args:
+        board: Bàn cờ trước khi đi
+        move: Nước đi (có thể là null move)
+
+    Returns:
+        Giá trị XOR cho phần vị trí quân cờ
+    """
+    if not move:
+        return 0  # Null move: quân cờ không đổi
+
+    us = board.turn
+    our_keys = PIECE_KEYS[us]
+    from_square = move.from_square
+    to_square = move.to_square
+    piece_type = board.piece_type_at(from_square)
+    delta = our_keys[piece_type][from_square]
+
+    # Nhập thành: di chuyển cả Vua lẫn Xe
+    if piece_type == chess.KING and board.is_castling(move):
+        king_to, rook_from, rook_to = castling_squares(move)
+        return (delta ^ our_keys[chess.KING][king_to] ^
+                our_keys[chess.ROOK][rook_from] ^ our_keys[chess.ROOK][rook_to])
+
+    delta ^= our_keys[move.promotion or piece_type][to_square]
+
+    captured_type = board.piece_type_at(to_square)
+    if captured_type:
+        delta ^= PIECE_KEYS[not us][captured_type][to_square]
+    elif piece_type == chess.PAWN and to_square == board.ep_square:
+        # Bắt tốt qua đường: tốt bị bắt nằm sau ô đích
+        captured_square = to_square - 8 if us == chess.WHITE else to_square + 8
+        delta ^= PIECE_KEYS[not us][chess.PAWN][captured_square]
+
+    return delta
+
+
+def pawn_key(board):
+    """Khóa Zobrist chỉ gồm các Tốt (dùng cho bảng băm cấu trúc Tốt)"""
+    key = 0
+    for color in chess.COLORS:
+        keys = PIECE_KEYS[color][chess.PAWN]
+        for square in chess.scan_forward(board.pawns & board.occupied_co[color]):
+            key ^= keys[square]
+    return key
+
+
+def pawn_key_delta(board, move):
+    """
+    Phần thay đổi của khóa Tốt do nước đi (gọi TRƯỚC khi push)
+
+    Returns:
+        Giá trị XOR cho khóa Tốt (0 nếu nước đi không động đến Tốt nào)
+    """
+    if not move:
+        return 0
+
+    us = board.turn
+    from_square = move.from_square
+    to_square = move.to_square
+    pawns = board.pawns
+    delta = 0
+
+    if pawns & chess.BB_SQUARES[from_square]:
+        delta = PIECE_KEYS[us][chess.PAWN][from_square]
+        if not move.promotion:
+            delta ^= PIECE_KEYS[us][chess.PAWN][to_square]
+        if to_square == board.ep_square and not board.occupied & chess.BB_SQUARES[to_square]:
+            captured_square = to_square - 8 if us == chess.WHITE else to_square + 8
+            return delta ^ PIECE_KEYS[not us][chess.PAWN][captured_square]
+
+    if pawns & chess.BB_SQUARES[to_square]:
+        delta ^= PIECE_KEYS[not us][chess.PAWN][to_square]
+    return delta
+
+
+def history_keys(board):
+    """
+    Khóa Zobrist của các vị trí trước vị trí hiện tại trong ván (cũ nhất trước)
+
+    Chỉ lấy từ sau nước không thể đảo ngược gần nhất (theo halfmove_clock)
+    vì các vị trí trước đó không thể lặp lại.
+    """
+    board = board.copy()
+    keys = []
+    for _ in range(min(board.halfmove_clock, len(board.move_stack))):
+        board.pop()
+        keys.append(compute_key(board))
+    keys.reverse()
+    return keys
+
+
+def is_repetition(path_keys, game_keys, halfmove_clock):
+    """
+    Vị trí cuối của path_keys đã xuất hiện trước đó chưa (tương đương board.is_repetition(2))
+
+    Args:
+        path_keys: Khóa dọc theo đường đi từ gốc (path_keys[0] = gốc, path_keys[-1] = hiện tại)
+        game_keys: Khóa các vị trí trước gốc trong ván (kết quả history_keys)
+        halfmove_clock: Số ply kể từ nước ăn quân / đi Tốt gần nhất của vị trí hiện tại
+
+    Returns:
+        True nếu lặp lại
+    """
+    key = path_keys[-1]
+    # Chỉ so với vị trí cùng bên đi (cách 2, 4, ... ply) trong phạm vi halfmove_clock
+    index = len(path_keys) - 3
+    stop = len(path_keys) - 1 - halfmove_clock
+    while index >= stop:
+        if index >= 0:
+            if path_keys[index] == key:
+                return True
+        elif -index <= len(game_keys):
+            # Chỉ số âm: vị trí trước gốc (game_keys[-1] là vị trí ngay trước gốc)
+            if game_keys[index] == key:
+                return True
+        else:
+            break
+        index -= 2
+    return False
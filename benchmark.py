@@ -0,0 +1,799 @@
+"""
+Script benchmark hiệu năng tìm kiếm / đánh giá của các agents
+Chạy: python benchmark.py rồi chọn benchmark cần chạy
+"""
+import os
+import random
+import time
+import chess
+from agents.minimax_agent import MinimaxAgent
+from config import BITBASE_DIR
+from utils import count_material, is_endgame, fen_to_tensor, board_to_tensor, boards_to_tensor_batch
+
+
+# Bộ vị trí benchmark (khai cuộc, trung cuộc chiến thuật, tàn cuộc)
+BENCH_FENS = [
+    chess.STARTING_FEN,
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 9",
+    "r1b1k2r/ppppqppp/2n2n2/2b1p3/2B1P3/2NP1N2/PPP2PPP/R1BQK2R w KQkq - 1 6",
+    "r3k2r/pp3ppp/2n5/3pP3/1b1P4/2N5/PP3PPP/R3KB1R b KQkq - 0 12",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "2r3k1/1p3ppp/p7/3P4/8/1P6/P4PPP/2R3K1 b - - 0 25",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+]
+
+# Khai cuộc đa dạng cho các trận đấu so sánh sức mạnh
+MATCH_OPENINGS = [
+    "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+    "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+    "rnbqkbnr/ppp1pppp/8/3p4/3P4/8/PPP1PPPP/RNBQKBNR w KQkq - 0 2",
+    "rnbqkb1r/pppppppp/5n2/8/2P5/8/PP1PPPPP/RNBQKBNR w KQkq - 1 2",
+    "rnbqkbnr/pppp1ppp/4p3/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+    "rnbqkbnr/pp1ppppp/2p5/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+]
+
+
+# Vị trí chiếu hết / stalemate và nước đi mong đợi (None = gốc đã kết thúc ván)
+TERMINAL_POSITIONS = [
+    ("6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1", "d1d8"),
+    ("r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4", "h5f7"),
+    ("6k1/5ppp/8/8/8/8/q4PPP/1R4K1 b - - 0 1", "a2b1"),
+    ("7k/5K2/6Q1/8/8/8/8/8 w - - 0 1", "g6g8"),
+    ("8/8/8/8/8/1qk5/8/K7 b - - 0 1", "b3b2"),
+    ("k7/8/1Q6/8/8/8/8/6K1 b - - 0 1", None),
+    ("R5k1/5ppp/8/8/8/8/5PPP/6K1 b - - 0 1", None),
+]
+
+
+def search_positions(agent, fens=BENCH_FENS, stats=None):
+    """
+    Cho agent tìm nước đi trên từng vị trí benchmark
+
+    Args:
+        stats: Danh sách để nhận SearchStats của từng vị trí (None = không lấy)
+
+    Returns:
+        (tổng số node, tổng thời gian)
+    """
+    total_nodes = 0
+    start = time.perf_counter()
+    for fen in fens:
+        agent.new_game()
+        agent.get_move(chess.Board(fen))
+        total_nodes += agent.nodes_searched
+        if stats is not None:
+            stats.append(agent.get_stats())
+    return total_nodes, time.perf_counter() - start
+
+
+def play_match_game(white_agent, black_agent, start_fen, max_moves=80):
+    """
+    Chơi một ván từ vị trí cho trước, phân xử theo vật chất khi hết số nước
+
+    Returns:
+        1 nếu Trắng thắng, 0 nếu Đen thắng, 0.5 nếu hòa
+    """
+    board = chess.Board(start_fen)
+    white_agent.new_game()
+    black_agent.new_game()
+
+    for _ in range(max_moves):
+        if board.is_game_over():
+            break
+        agent = white_agent if board.turn == chess.WHITE else black_agent
+        board.push(agent.get_move(board))
+
+    if board.is_checkmate():
+        return 0 if board.turn == chess.WHITE else 1
+    if board.is_game_over():
+        return 0.5
+
+    # Phân xử: hơn ít nhất 1 quân nhẹ thì tính thắng
+    white_material, black_material = count_material(board)
+    if white_material - black_material >= 300:
+        return 1
+    if black_material - white_material >= 300:
+        return 0
+    return 0.5
+
+
+def play_match(agent, opponent, openings=MATCH_OPENINGS, max_moves=80):
+    """
+    Đấu agent với opponent trên mỗi khai cuộc, mỗi bên cầm Trắng một lần
+
+    Returns:
+        Điểm của agent (thắng = 1, hòa = 0.5) và số ván
+    """
+    score = 0
+    for fen in openings:
+        score += play_match_game(agent, opponent, fen, max_moves)
+        score += 1 - play_match_game(opponent, agent, fen, max_moves)
+    return score, 2 * len(openings)
+
+
+def benchmark_selective_search(depth=4, match_depth=3, with_match=True):
+    """
+    So sánh từng kỹ thuật tìm kiếm chọn lọc với tìm kiếm đầy đủ:
+    số node, thời gian trên BENCH_FENS và điểm khi đấu với bản không cắt tỉa
+    """
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK: TÌM KIẾM CHỌN LỌC (depth={depth})")
+    print("=" * 60)
+
+    baseline_options = dict(null_move_pruning=False, late_move_reductions=False, futility_pruning=False,
+                            see_pruning=False)
+    configs = [
+        ("Đầy đủ (không cắt tỉa)", {}),
+        ("+ Null-move pruning", {'null_move_pruning': True}),
+        ("+ Late move reductions", {'late_move_reductions': True}),
+        ("+ Futility/razoring", {'futility_pruning': True}),
+        ("+ SEE/delta (quiescence)", {'see_pruning': True}),
+        ("Tất cả", {'null_move_pruning': True, 'late_move_reductions': True, 'futility_pruning': True,
+                    'see_pruning': True}),
+    ]
+
+    base_nodes = None
+    for name, options in configs:
+        agent = MinimaxAgent(depth=depth, tt_mb=16, opening_book=None,
+                             **{**baseline_options, **options})
+        stats = []
+        nodes, elapsed = search_positions(agent, stats=stats)
+        if base_nodes is None:
+            base_nodes = nodes
+        # Tỉ lệ cutoff ở nước đầu tiên (chất lượng sắp xếp) và hệ số phân nhánh hiệu dụng
+        first_move = sum(s.first_move_cutoffs for s in stats) / max(1, sum(s.beta_cutoffs for s in stats))
+        branching = sum(s.branching_factor for s in stats) / len(stats)
+        line = (f"{name:<26} nodes={nodes:>9,} ({nodes / base_nodes * 100:5.1f}%)  time={elapsed:6.2f}s"
+                f"  fmc={first_move:5.1%}  ebf={branching:4.2f}")
+
+        if with_match and options:
+            opponent = MinimaxAgent(depth=match_depth, tt_mb=16, opening_book=None,
+                                    **baseline_options)
+            agent.depth = match_depth
+            score, games = play_match(agent, opponent)
+            line += f"  match={score:.1f}/{games}"
+        print(line)
+
+    print("=" * 60)
+
+
+def legacy_positional_terms(board, endgame):
+    """
+    Phiên bản gốc (duyệt từng ô bằng board.piece_at) của các yếu tố:
+    King Safety, tốt kép, phát triển quân, tốt thông, Xe trên cột mở.
+    Chỉ dùng để kiểm tra kết quả và so sánh tốc độ với bản bitboard.
+    """
+    score = 0
+    
+    # 3. King Safety (An toàn vua) - quan trọng trong opening/middlegame
+    if not endgame:
+        white_king_sq = board.king(chess.WHITE)
+        black_king_sq = board.king(chess.BLACK)
+
+        # Kiểm tra vua có được bảo vệ bởi tốt không
+        if white_king_sq:
+            # Đếm tốt trắng quanh vua trắng
+            king_file = chess.square_file(white_king_sq)
+            king_rank = chess.square_rank(white_king_sq)
+            pawn_shield = 0
+            for file_offset in [-1, 0, 1]:
+                f = king_file + file_offset
+                if 0 <= f < 8 and king_rank < 7:
+                    sq = chess.square(f, king_rank + 1)
+                    piece = board.piece_at(sq)
+                    if piece and piece.piece_type == chess.PAWN and piece.color == chess.WHITE:
+                        pawn_shield += 15
+            score += pawn_shield
+
+        if black_king_sq:
+            king_file = chess.square_file(black_king_sq)
+            king_rank = chess.square_rank(black_king_sq)
+            pawn_shield = 0
+            for file_offset in [-1, 0, 1]:
+                f = king_file + file_offset
+                if 0 <= f < 8 and king_rank > 0:
+                    sq = chess.square(f, king_rank - 1)
+                    piece = board.piece_at(sq)
+                    if piece and piece.piece_type == chess.PAWN and piece.color == chess.BLACK:
+                        pawn_shield += 15
+            score -= pawn_shield
+
+    # 4. Pawn Structure (Cấu trúc tốt)
+    # Tốt đơn (isolated pawn) bị phạt
+    # Tốt kép (doubled pawn) bị phạt
+    for file in range(8):
+        white_pawns_on_file = 0
+        black_pawns_on_file = 0
+
+        for rank in range(8):
+            sq = chess.square(file, rank)
+            piece = board.piece_at(sq)
+            if piece and piece.piece_type == chess.PAWN:
+                if piece.color == chess.WHITE:
+                    white_pawns_on_file += 1
+                else:
+                    black_pawns_on_file += 1
+
+        # Phạt tốt kép
+        if white_pawns_on_file > 1:
+            score -= 10 * (white_pawns_on_file - 1)
+        if black_pawns_on_file > 1:
+            score += 10 * (black_pawns_on_file - 1)
+
+    # 7. Development bonus (Opening phase)
+    if not endgame and board.fullmove_number <= 15:
+        # Thưởng cho việc phát triển quân
+        white_developed = 0
+        black_developed = 0
+
+        # Kiểm tra mã và tượng có rời khỏi hàng đầu chưa
+        for piece_type in [chess.KNIGHT, chess.BISHOP]:
+            for square in board.pieces(piece_type, chess.WHITE):
+                if chess.square_rank(square) > 0:  # Đã rời hàng 1
+                    white_developed += 10
+            for square in board.pieces(piece_type, chess.BLACK):
+                if chess.square_rank(square) < 7:  # Đã rời hàng 8
+                    black_developed += 10
+
+        score += white_developed - black_developed
+
+    # 8. Passed Pawns (Tốt thông) - tốt không bị chặn bởi tốt địch
+    for square in chess.SQUARES:
+        piece = board.piece_at(square)
+        if piece and piece.piece_type == chess.PAWN:
+            file = chess.square_file(square)
+            rank = chess.square_rank(square)
+
+            is_passed = True
+            if piece.color == chess.WHITE:
+                # Kiểm tra các hàng phía trước
+                for check_rank in range(rank + 1, 8):
+                    # Kiểm tra cùng cột và 2 cột bên cạnh
+                    for check_file in [file - 1, file, file + 1]:
+                        if 0 <= check_file < 8:
+                            check_sq = chess.square(check_file, check_rank)
+                            check_piece = board.piece_at(check_sq)
+                            if check_piece and check_piece.piece_type == chess.PAWN and check_piece.color == chess.BLACK:
+                                is_passed = False
+                                break
+                    if not is_passed:
+                        break
+
+                if is_passed:
+                    # Thưởng tùy theo vị trí: tốt càng gần promotion càng giá trị
+                    bonus = 10 * (rank - 1)  # Rank 2 = 10, Rank 7 = 60
+                    score += bonus
+
+            else:  # BLACK pawn
+                for check_rank in range(0, rank):
+                    for check_file in [file - 1, file, file + 1]:
+                        if 0 <= check_file < 8:
+                            check_sq = chess.square(check_file, check_rank)
+                            check_piece = board.piece_at(check_sq)
+                            if check_piece and check_piece.piece_type == chess.PAWN and check_piece.color == chess.WHITE:
+                                is_passed = False
+                                break
+                    if not is_passed:
+                        break
+
+                if is_passed:
+                    bonus = 10 * (6 - rank)  # Rank 6 = 10, Rank 1 = 60
+                    score -= bonus
+
+    # 9. Rook on Open/Semi-Open Files (Xe trên cột mở/nửa mở)
+    for file in range(8):
+        white_pawns = 0
+        black_pawns = 0
+        white_rook = False
+        black_rook = False
+
+        for rank in range(8):
+            sq = chess.square(file, rank)
+            piece = board.piece_at(sq)
+            if piece:
+                if piece.piece_type == chess.PAWN:
+                    if piece.color == chess.WHITE:
+                        white_pawns += 1
+                    else:
+                        black_pawns += 1
+                elif piece.piece_type == chess.ROOK:
+                    if piece.color == chess.WHITE:
+                        white_rook = True
+                    else:
+                        black_rook = True
+
+        # Open file (không có tốt nào)
+        if white_pawns == 0 and black_pawns == 0:
+            if white_rook:
+                score += 20
+            if black_rook:
+                score -= 20
+        # Semi-open file (chỉ có tốt địch)
+        elif white_pawns == 0 and black_pawns > 0:
+            if white_rook:
+                score += 15
+        elif black_pawns == 0 and white_pawns > 0:
+            if black_rook:
+                score -= 15
+    
+    return score
+
+
+def random_positions(count, seed=1):
+    """Sinh các vị trí ngẫu nhiên hợp lệ bằng cách đi ngẫu nhiên từ BENCH_FENS"""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = chess.Board(rng.choice(BENCH_FENS))
+        for _ in range(rng.randint(0, 60)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        positions.append(board)
+    return positions
+
+
+def benchmark_evaluation_terms(num_positions=500, repeat=20):
+    """
+    So sánh bản bitboard với bản duyệt từng ô của các yếu tố vị trí:
+    kiểm tra kết quả giống hệt và đo thời gian mỗi lần gọi
+    """
+    print("\n" + "=" * 60)
+    print("BENCHMARK: YẾU TỐ VỊ TRÍ (BITBOARD vs DUYỆT TỪNG Ô)")
+    print("=" * 60)
+    
+    agent = MinimaxAgent(depth=1, tt_mb=1, opening_book=None)
+    positions = [(board, is_endgame(board)) for board in random_positions(num_positions)]
+    
+    for board, endgame in positions:
+        expected = legacy_positional_terms(board, endgame)
+        actual = agent._pawn_structure_score(board, endgame) + agent._piece_placement_score(board, endgame)
+        assert actual == expected, f"{board.fen()}: {actual} != {expected}"
+    print(f"✓ Kết quả giống hệt trên {len(positions)} vị trí")
+    
+    calls = len(positions) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for board, endgame in positions:
+            legacy_positional_terms(board, endgame)
+    legacy_time = (time.perf_counter() - start) / calls
+    
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for board, endgame in positions:
+            agent._pawn_structure_score(board, endgame)
+            agent._piece_placement_score(board, endgame)
+    bitboard_time = (time.perf_counter() - start) / calls
+    
+    print(f"Duyệt từng ô: {legacy_time * 1e6:8.1f} µs/lần")
+    print(f"Bitboard:     {bitboard_time * 1e6:8.1f} µs/lần  (nhanh hơn {legacy_time / bitboard_time:.1f}x)")
+    print("=" * 60)
+
+
+def benchmark_mobility(depth=4, num_positions=300, repeat=10):
+    """
+    So sánh mobility ước lượng từ bitboard tấn công với bản đếm nước hợp lệ:
+    thời gian evaluate_board và số node / thời gian tìm kiếm
+    """
+    print("\n" + "=" * 60)
+    print("BENCHMARK: MOBILITY (BITBOARD TẤN CÔNG vs ĐẾM NƯỚC HỢP LỆ)")
+    print("=" * 60)
+    
+    positions = random_positions(num_positions)
+    calls = len(positions) * repeat
+    
+    results = {}
+    for mobility in ('legal', 'attacks'):
+        agent = MinimaxAgent(depth=1, tt_mb=1, mobility=mobility, opening_book=None)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for board in positions:
+                agent.evaluate_board(board)
+        eval_time = (time.perf_counter() - start) / calls
+        
+        agent = MinimaxAgent(depth=depth, mobility=mobility, opening_book=None)
+        nodes, elapsed = search_positions(agent)
+        results[mobility] = (eval_time, nodes, elapsed)
+        print(f"{mobility:8s}: evaluate {eval_time * 1e6:7.1f} µs/lần | "
+              f"depth {depth}: {nodes:8d} nodes, {elapsed:6.2f}s, {nodes / elapsed:8.0f} nodes/s")
+    
+    legal_eval, _, legal_elapsed = results['legal']
+    attacks_eval, _, attacks_elapsed = results['attacks']
+    print(f"\nevaluate_board nhanh hơn {legal_eval / attacks_eval:.1f}x, "
+          f"tìm kiếm nhanh hơn {legal_elapsed / attacks_elapsed:.1f}x")
+    print("=" * 60)
+
+
+class GameOverCheckAgent(MinimaxAgent):
+    """
+    Phiên bản gốc: gọi board.is_game_over() ở mỗi node negamax / quiescence.
+    Chỉ dùng để so sánh tốc độ với bản tự phát hiện kết thúc ván trong tìm kiếm.
+    """
+    
+    def _game_over_score(self, board):
+        """Điểm theo góc nhìn bên đang đi nếu ván đã kết thúc, None nếu chưa"""
+        if not board.is_game_over():
+            return None
+        self.nodes_searched += 1
+        return -999999 if board.is_checkmate() else 0
+    
+    def negamax(self, board, depth, alpha, beta):
+        """Negamax của MinimaxAgent, kiểm tra is_game_over() trước"""
+        score = self._game_over_score(board)
+        return super().negamax(board, depth, alpha, beta) if score is None else score
+    
+    def quiescence_search(self, board, alpha, beta, depth=0):
+        """Quiescence của MinimaxAgent, kiểm tra is_game_over() trước"""
+        score = self._game_over_score(board)
+        return super().quiescence_search(board, alpha, beta, depth) if score is None else score
+
+
+def terminal_search_speed(agent_class, max_depth):
+    """
+    Tìm trên bộ vị trí chiếu hết / stalemate ở từng độ sâu và trên BENCH_FENS
+    
+    Returns:
+        (số lần sai, nodes/s trên bộ kết thúc ván, nodes/s trên BENCH_FENS)
+    """
+    total_nodes = 0
+    total_time = 0.0
+    failures = 0
+    for fen, expected in TERMINAL_POSITIONS:
+        for depth in range(1, max_depth + 1):
+            agent = agent_class(depth=depth, tt_mb=4, opening_book=None)
+            start = time.perf_counter()
+            move = agent.get_move(chess.Board(fen))
+            total_time += time.perf_counter() - start
+            total_nodes += agent.nodes_searched
+            if (move.uci() if move else None) != expected:
+                failures += 1
+                print(f"✗ {agent_class.__name__} {fen} depth={depth}: {move} (mong đợi {expected})")
+    
+    nodes, elapsed = search_positions(agent_class(depth=max_depth, tt_mb=16, opening_book=None))
+    return failures, total_nodes / total_time, nodes / elapsed
+
+
+def benchmark_terminal_detection(max_depth=4):
+    """
+    Kiểm tra kết quả trên bộ vị trí chiếu hết / stalemate ở từng độ sâu và so sánh
+    tốc độ tìm kiếm (nodes/s) với bản gọi board.is_game_over() ở mỗi node
+    """
+    print("\n" + "=" * 60)
+    print("BENCHMARK: PHÁT HIỆN KẾT THÚC VÁN")
+    print("=" * 60)
+    
+    checked = len(TERMINAL_POSITIONS) * max_depth
+    results = {}
+    for name, agent_class in (("is_game_over()", GameOverCheckAgent), ("Trong tìm kiếm", MinimaxAgent)):
+        failures, terminal_nps, bench_nps = terminal_search_speed(agent_class, max_depth)
+        results[name] = (terminal_nps, bench_nps)
+        print(f"{name:15s} đúng {checked - failures}/{checked}, "
+              f"bộ kết thúc ván {terminal_nps:8.0f} nodes/s, BENCH_FENS {bench_nps:8.0f} nodes/s")
+    
+    (base_terminal, base_bench), (terminal_nps, bench_nps) = results.values()
+    print(f"Nhanh hơn: bộ kết thúc ván {terminal_nps / base_terminal:.2f}x, "
+          f"BENCH_FENS {bench_nps / base_bench:.2f}x")
+    print("=" * 60)
+
+
+def benchmark_lazy_smp(depth=5, worker_counts=(1, 2, 4, 8)):
+    """
+    Time-to-depth của Lazy SMP: thời gian hoàn thành depth trên BENCH_FENS
+    với số tiến trình khác nhau (bảng chuyển vị được xóa trước mỗi vị trí)
+    """
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK: LAZY SMP (depth={depth}, {os.cpu_count()} CPU)")
+    print("=" * 60)
+    
+    base_time = None
+    for workers in worker_counts:
+        agent = MinimaxAgent(depth=depth, tt_mb=64, workers=workers, opening_book=None)
+        try:
+            # Khởi động helper trước khi đo
+            agent.get_move(chess.Board(), node_limit=100)
+            nodes, elapsed = search_positions(agent)
+        finally:
+            agent.close()
+        if base_time is None:
+            base_time = elapsed
+        print(f"{workers:2d} tiến trình: {elapsed:7.2f}s  nodes={nodes:>10,}  "
+              f"speedup={base_time / elapsed:5.2f}x")
+    
+    print("=" * 60)
+
+
+def benchmark_root_parallel(depth=5, worker_counts=(1, 2, 4, 8)):
+    """
+    Độ trễ mỗi vị trí khi chia nước đi ở gốc cho pool tiến trình (phân tích hàng loạt);
+    pool được khởi động trước khi đo và dùng lại cho mọi vị trí
+    """
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK: TÌM SONG SONG Ở GỐC (depth={depth}, {os.cpu_count()} CPU)")
+    print("=" * 60)
+    
+    base_time = None
+    for root_workers in worker_counts:
+        agent = MinimaxAgent(depth=depth, tt_mb=16, root_workers=root_workers, opening_book=None)
+        try:
+            agent.get_move(chess.Board(), node_limit=100)
+            nodes, elapsed = search_positions(agent)
+        finally:
+            agent.close()
+        if base_time is None:
+            base_time = elapsed
+        per_position = elapsed / len(BENCH_FENS)
+        print(f"{root_workers:2d} tiến trình: {per_position:6.2f}s/vị trí  nodes={nodes:>10,}  "
+              f"speedup={base_time / elapsed:5.2f}x")
+    
+    print("=" * 60)
+
+
+# Tàn cuộc cơ bản thắng được (bên mạnh đi trước hoặc bên yếu đi trước)
+CONVERSION_FENS = [
+    "8/8/8/4k3/8/8/8/4K2R w - - 0 1",
+    "8/2k5/8/8/8/8/6R1/K7 b - - 0 1",
+    "8/8/8/3k4/8/8/8/Q3K3 w - - 0 1",
+    "8/8/3k4/8/8/2K5/2P5/8 w - - 0 1",
+    "4k3/8/4K3/4P3/8/8/8/8 b - - 0 1",
+]
+
+
+def benchmark_bitbases(depth=3, max_plies=120):
+    """
+    So sánh khả năng thắng các tàn cuộc cơ bản khi có / không có bitbase
+
+    Hai bên dùng cùng cấu hình; đo số nửa nước đến khi kết thúc và số node của bên mạnh.
+    """
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK BITBASE TÀN CUỘC (depth={depth})")
+    print("=" * 60)
+
+    for label, bitbases in (("Không bitbase", None), ("Có bitbase", BITBASE_DIR)):
+        if bitbases is not None and not os.path.isdir(bitbases):
+            print(f"\nChưa có {bitbases} - chạy build_bitbases.py trước")
+            continue
+        print(f"\n{label}:")
+        for fen in CONVERSION_FENS:
+            strong = MinimaxAgent(depth=depth, tt_mb=16, opening_book=None, bitbases=bitbases)
+            weak = MinimaxAgent(depth=depth, tt_mb=16, opening_book=None, bitbases=bitbases)
+            board = chess.Board(fen)
+            strong_color = chess.WHITE if board.occupied_co[chess.WHITE] & ~board.kings else chess.BLACK
+            nodes = 0
+            start = time.perf_counter()
+            while not board.is_game_over(claim_draw=True) and board.ply() < max_plies:
+                agent = strong if board.turn == strong_color else weak
+                board.push(agent.get_move(board))
+                if agent is strong:
+                    nodes += agent.nodes_searched
+            elapsed = time.perf_counter() - start
+            print(f"  {fen:<34} {board.result(claim_draw=True):<8} {board.ply():>4} ply  "
+                  f"nodes={nodes:>7,}  time={elapsed:5.1f}s")
+            strong.close()
+            weak.close()
+
+    print("=" * 60)
+
+
+def benchmark_pawn_hash(depth=4):
+    """
+    Bảng băm cấu trúc Tốt: tỉ lệ trúng, thời gian ước lượng tiết kiệm và thời gian
+    tìm kiếm thực tế so với khi tính lại điểm Tốt ở mỗi lần đánh giá
+    """
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK: BẢNG BĂM TỐT (depth={depth})")
+    print("=" * 60)
+    
+    agent = MinimaxAgent(depth=depth, tt_mb=16, opening_book=None, pawn_hash_entries=0)
+    nodes, base_elapsed = search_positions(agent)
+    print(f"Không có bảng băm: {nodes:8d} nodes, {base_elapsed:6.2f}s")
+    
+    agent = MinimaxAgent(depth=depth, tt_mb=16, opening_book=None)
+    probes = hits = 0
+    saved = 0.0
+    start = time.perf_counter()
+    for fen in BENCH_FENS:
+        agent.new_game()
+        agent.get_move(chess.Board(fen))
+        stats = agent.get_stats()
+        print(f"  {fen[:40]:<40} trúng {stats['pawn_hash_hit_rate']:6.1%} "
+              f"({stats['pawn_hash_probes']:6d} lần tra)")
+        probes += stats['pawn_hash_probes']
+        hits += round(stats['pawn_hash_hit_rate'] * stats['pawn_hash_probes'])
+        saved += stats['pawn_hash_time_saved']
+    elapsed = time.perf_counter() - start
+    print(f"Có bảng băm:       tỉ lệ trúng {hits / probes:.1%}, "
+          f"ước lượng tiết kiệm {saved:.2f}s, thời gian {elapsed:6.2f}s "
+          f"(nhanh hơn {base_elapsed / elapsed:.2f}x)")
+    print("=" * 60)
+
+
+def benchmark_pondering(depth=4, moves=10, think_time=2.0):
+    """
+    Thời gian phản hồi của AI khi chơi với "người" mô phỏng (MinimaxAgent depth 2
+    suy nghĩ think_time giây mỗi nước), có và không có pondering
+    """
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK: PONDERING (depth={depth}, người suy nghĩ {think_time:.1f}s/nước)")
+    print("=" * 60)
+    
+    for ponder in (False, True):
+        engine = MinimaxAgent(depth=depth, tt_mb=32, opening_book=None)
+        human = MinimaxAgent(depth=2, tt_mb=4, opening_book=None)
+        board = chess.Board(MATCH_OPENINGS[0])
+        response_times = []
+        hits = 0
+        for _ in range(moves):
+            start = time.perf_counter()
+            move = engine.get_move(board)
+            response_times.append(time.perf_counter() - start)
+            hits += engine.ponder_hit
+            board.push(move)
+            if board.is_game_over():
+                break
+            
+            # "Người" chọn nước trước, sau đó AI suy nghĩ trong thời gian còn lại
+            reply = human.get_move(board)
+            if ponder:
+                engine.start_pondering(board)
+            time.sleep(think_time)
+            board.push(reply)
+            if board.is_game_over():
+                break
+        engine.stop_pondering()
+        
+        average = sum(response_times) / len(response_times)
+        label = "Có pondering" if ponder else "Không pondering"
+        print(f"{label:<16}: trung bình {average:6.2f}s/nước, lâu nhất {max(response_times):6.2f}s, "
+              f"ponder hit {hits}/{len(response_times)}")
+    
+    print("=" * 60)
+
+
+def benchmark_ml_batch(num_positions=512, batch_sizes=(1, 32, 256), depth=2, num_searches=3):
+    """
+    Đánh giá theo batch của MLAgent: số vị trí/giây của model ở từng batch size và
+    thời gian tìm kiếm khi đánh giá từng lá so với đánh giá các con theo batch
+    """
+    from agents.ml_agent import MLAgent
+    
+    print("\n" + "=" * 60)
+    print("BENCHMARK: ĐÁNH GIÁ THEO BATCH CỦA ML AGENT")
+    print("=" * 60)
+    
+    agent = MLAgent(depth=depth, opening_book=None)
+    if agent.model is None:
+        print("Cần model đã train để chạy benchmark này")
+        return
+    
+    tensors = boards_to_tensor_batch(random_positions(num_positions))
+    agent.predict_batch(tensors[:max(batch_sizes)])  # Khởi động model
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        for index in range(0, num_positions, batch_size):
+            agent.predict_batch(tensors[index:index + batch_size])
+        elapsed = time.perf_counter() - start
+        print(f"Batch {batch_size:4d}: {num_positions / elapsed:10,.0f} vị trí/giây")
+    
+    print(f"\nTìm kiếm depth={depth} trên {num_searches} vị trí:")
+    moves = {}
+    for batch_size in (1, max(batch_sizes)):
+        agent.batch_size = batch_size
+        moves[batch_size] = []
+        calls = evaluated = 0
+        start = time.perf_counter()
+        for fen in BENCH_FENS[:num_searches]:
+            agent._evaluation_cache.clear()
+            moves[batch_size].append(agent.get_move(chess.Board(fen)))
+            calls += agent.model_calls
+            evaluated += agent.positions_evaluated
+        elapsed = time.perf_counter() - start
+        print(f"  batch_size={batch_size:4d}: {elapsed:7.2f}s, {calls:6d} lần forward, "
+              f"{evaluated:6d} vị trí đánh giá")
+    same = moves[1] == moves[max(batch_sizes)]
+    print(f"  Cùng nước đi: {'có' if same else 'không'}")
+    print("=" * 60)
+
+
+def benchmark_input_encoding(num_positions=200, repeat=20):
+    """
+    Chi phí tạo tensor đầu vào cho mỗi lá của ML agent (đi nước, mã hóa, hoàn tác):
+    FEN -> fen_to_tensor, bitboard (board_to_tensor) và bộ đệm tăng dần của MLAgent
+    (make_move / unmake_move, đã gồm cả khóa Zobrist dùng làm khóa cache)
+    """
+    from agents.ml_agent import MLAgent
+    
+    print("\n" + "=" * 60)
+    print("BENCHMARK: MÃ HÓA ĐẦU VÀO CỦA ML AGENT")
+    print("=" * 60)
+    
+    agent = MLAgent(depth=1, opening_book=None)
+    positions = [(board, list(board.legal_moves)) for board in random_positions(num_positions)]
+    positions = [(board, moves) for board, moves in positions if moves]
+    count = sum(len(moves) for _, moves in positions) * repeat
+    
+    def encode_fen(board):
+        return fen_to_tensor(board.fen())
+    
+    times = {}
+    for label, encode in (("fen_to_tensor(board.fen())", encode_fen),
+                          ("board_to_tensor (bitboard)", board_to_tensor)):
+        start = time.perf_counter()
+        for board, moves in positions:
+            for _ in range(repeat):
+                for move in moves:
+                    board.push(move)
+                    encode(board)
+                    board.pop()
+        times[label] = (time.perf_counter() - start) / count
+    
+    start = time.perf_counter()
+    for board, moves in positions:
+        agent.set_root(board)
+        for _ in range(repeat):
+            for move in moves:
+                agent.make_move(board, move)
+                agent.planes.copy()
+                agent.unmake_move(board)
+    times["Bộ đệm tăng dần (MLAgent)"] = (time.perf_counter() - start) / count
+    
+    baseline = times["fen_to_tensor(board.fen())"]
+    for label, elapsed in times.items():
+        print(f"{label:<27}: {elapsed * 1e6:7.1f} µs/lá (nhanh hơn {baseline / elapsed:5.1f}x)")
+    print("=" * 60)
+
+
+def main():
+    """Hàm main"""
+    print("=" * 60)
+    print("BENCHMARK AI CHESS")
+    print("=" * 60)
+    print("\nChọn benchmark:")
+    print("1. Tìm kiếm chọn lọc (null-move, LMR, futility, SEE)")
+    print("2. Yếu tố vị trí của hàm đánh giá (bitboard)")
+    print("3. Mobility (bitboard tấn công vs nước hợp lệ)")
+    print("4. Phát hiện kết thúc ván (chiếu hết / stalemate)")
+    print("5. Lazy SMP (time-to-depth theo số tiến trình)")
+    print("6. Tìm song song các nước đi ở gốc (process pool)")
+    print("7. Pondering (thời gian phản hồi khi chơi với người)")
+    print("8. Bitbase tàn cuộc (KPK / KRK / KQK)")
+    print("9. Bảng băm cấu trúc Tốt (tỉ lệ trúng, thời gian tiết kiệm)")
+    print("10. Đánh giá theo batch của ML agent (cần model)")
+    print("11. Mã hóa đầu vào của ML agent (FEN / bitboard / tăng dần)")
+
+    choice = input("\nNhập lựa chọn: ").strip()
+
+    if choice == '1':
+        depth = int(input("Depth tìm kiếm (đề xuất 4): ").strip() or "4")
+        benchmark_selective_search(depth=depth)
+    elif choice == '2':
+        benchmark_evaluation_terms()
+    elif choice == '3':
+        depth = int(input("Depth tìm kiếm (đề xuất 4): ").strip() or "4")
+        benchmark_mobility(depth=depth)
+    elif choice == '4':
+        benchmark_terminal_detection()
+    elif choice == '5':
+        depth = int(input("Depth tìm kiếm (đề xuất 5): ").strip() or "5")
+        benchmark_lazy_smp(depth=depth)
+    elif choice == '6':
+        depth = int(input("Depth tìm kiếm (đề xuất 5): ").strip() or "5")
+        benchmark_root_parallel(depth=depth)
+    elif choice == '7':
+        benchmark_pondering()
+    elif choice == '8':
+        benchmark_bitbases()
+    elif choice == '9':
+        depth = int(input("Depth tìm kiếm (đề xuất 4): ").strip() or "4")
+        benchmark_pawn_hash(depth=depth)
+    elif choice == '10':
+        benchmark_ml_batch()
+    elif choice == '11':
+        benchmark_input_encoding()
+    else:
+        print("Lựa chọn không hợp lệ!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Script tạo bitbase tàn cuộc KPK / KRK / KQK bằng phân tích ngược (chạy offline)
+Bảng được lưu vào BITBASE_DIR và kiểm tra lại với python-chess trên các vị trí ngẫu nhiên
+"""
+import time
+
+from agents.bitbase import Bitbases, ENDGAMES, generate_all, verify_table
+from config import BITBASE_DIR
+
+
+def build_bitbases(directory=BITBASE_DIR, samples=2000):
+    """
+    Tạo, lưu và kiểm tra tất cả bitbase
+
+    Returns:
+        True nếu mọi bảng khớp với python-chess
+    """
+    print(f"\nTạo bitbase vào {directory}...")
+    start = time.perf_counter()
+    generate_all(directory)
+    print(f"✓ Tạo xong trong {time.perf_counter() - start:.1f}s")
+
+    print(f"\nKiểm tra với python-chess ({samples} vị trí ngẫu nhiên mỗi bảng)...")
+    bitbases = Bitbases(directory)
+    ok = True
+    for name, piece_type in ENDGAMES.items():
+        errors = verify_table(bitbases, piece_type, samples=samples)
+        if errors:
+            ok = False
+            print(f"  ✗ {name}: {len(errors)} vị trí sai, ví dụ {errors[0]}")
+        else:
+            print(f"  ✓ {name}")
+    bitbases.close()
+    return ok
+
+
+def main():
+    """Hàm main"""
+    print("=" * 60)
+    print("TẠO BITBASE TÀN CUỘC (KPK / KRK / KQK)")
+    print("=" * 60)
+
+    directory = input(f"\nThư mục đầu ra ({BITBASE_DIR}): ").strip() or BITBASE_DIR
+    samples = int(input("Số vị trí kiểm tra mỗi bảng (đề xuất 2000): ").strip() or "2000")
+
+    if build_bitbases(directory, samples):
+        print("\n✅ Bitbase đã sẵn sàng, MinimaxAgent sẽ tự tải khi khởi tạo")
+    else:
+        print("\n⚠ Bitbase không khớp với python-chess!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Script tạo sách khai cuộc Polyglot (.bin) từ các ván Minimax tự chơi
+Mỗi nước đi trong OPENING_BOOK_MAX_PLY nửa nước đầu được cộng trọng số theo kết quả
+ván đối với bên đi nước đó (thắng 2, hòa 1, thua 0) - giống cách tính của Polyglot
+"""
+import random
+import time
+from collections import defaultdict
+
+import chess
+
+from agents.minimax_agent import MinimaxAgent
+from agents import zobrist
+from agents.opening_book import OpeningBook, encode_move, write_book
+from config import OPENING_BOOK_PATH, OPENING_BOOK_MAX_PLY, DATA_NODE_LIMIT
+
+
+def play_book_game(agent, max_ply=OPENING_BOOK_MAX_PLY, random_ply=4, random_rate=0.3,
+                   max_moves=150):
+    """
+    Tự chơi một ván, ghi lại các nước đi trong phần khai cuộc
+
+    Args:
+        agent: MinimaxAgent (không dùng sách khai cuộc)
+        max_ply: Số nửa nước đầu được ghi vào sách
+        random_ply: Trong random_ply nửa nước đầu, mỗi nước có xác suất random_rate
+                    là nước ngẫu nhiên để các ván khác nhau
+        random_rate: Xác suất đi nước ngẫu nhiên trong phần đầu ván
+        max_moves: Số nửa nước tối đa (quá thì tính hòa)
+
+    Returns:
+        (danh sách (khóa Zobrist, mã nước Polyglot, màu bên đi), kết quả '1-0' / '0-1' / '1/2-1/2')
+    """
+    board = chess.Board()
+    agent.new_game()
+    book_moves = []
+
+    while not board.is_game_over(claim_draw=True) and board.ply() < max_moves:
+        if board.ply() < random_ply and random.random() < random_rate:
+            move = random.choice(list(board.legal_moves))
+        else:
+            move = agent.get_move(board)
+        if board.ply() < max_ply:
+            book_moves.append((zobrist.compute_key(board), encode_move(board, move), board.turn))
+        board.push(move)
+
+    result = board.result(claim_draw=True)
+    if result == '*':
+        result = '1/2-1/2'
+    return book_moves, result
+
+
+def build_book(num_games=50, depth=3, node_limit=DATA_NODE_LIMIT, path=OPENING_BOOK_PATH,
+               max_ply=OPENING_BOOK_MAX_PLY):
+    """
+    Tạo sách khai cuộc từ num_games ván tự chơi
+
+    Returns:
+        Số entry đã ghi
+    """
+    agent = MinimaxAgent(depth=depth, node_limit=node_limit, opening_book=None)
+    move_weights = defaultdict(int)
+    results = defaultdict(int)
+    start = time.perf_counter()
+
+    for game_num in range(num_games):
+        book_moves, result = play_book_game(agent, max_ply=max_ply)
+        results[result] += 1
+        for key, raw_move, color in book_moves:
+            # Polyglot: thắng 2, hòa 1, thua 0 (entry trọng số 0 không được ghi)
+            if result == '1/2-1/2':
+                points = 1
+            else:
+                points = 2 if (result == '1-0') == (color == chess.WHITE) else 0
+            move_weights[(key, raw_move)] += points
+        print(f"  Ván {game_num + 1}/{num_games}: {result}  "
+              f"({time.perf_counter() - start:.0f}s)")
+
+    agent.close()
+    count = write_book(path, move_weights)
+    print(f"\n✓ Đã ghi {count} entry vào {path}")
+    print(f"  Kết quả: trắng thắng {results['1-0']}, đen thắng {results['0-1']}, "
+          f"hòa {results['1/2-1/2']}")
+    return count
+
+
+def main():
+    """Hàm main"""
+    print("=" * 60)
+    print("TẠO SÁCH KHAI CUỘC (POLYGLOT)")
+    print("=" * 60)
+
+    num_games = int(input("\nSố ván tự chơi (đề xuất 50): ").strip() or "50")
+    depth = int(input("Depth cho Minimax (đề xuất 3): ").strip() or "3")
+    path = input(f"File đầu ra ({OPENING_BOOK_PATH}): ").strip() or OPENING_BOOK_PATH
+
+    build_book(num_games=num_games, depth=depth, path=path)
+
+    # Kiểm tra nhanh: các nước trong sách ở vị trí ban đầu
+    book = OpeningBook(path)
+    board = chess.Board()
+    print("\nNước trong sách ở vị trí ban đầu:")
+    for move, weight in book.entries(board):
+        print(f"  {board.san(move):<6} trọng số {weight}")
+    book.close()
+
+
+if __name__ == "__main__":
+    main()
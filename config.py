@@ -17,6 +17,13 @@ COLOR_SELECTED = (246, 246, 130)
 # Cấu hình AI
 MINIMAX_DEPTH = 3  # Độ sâu tìm kiếm Minimax
 ML_DEPTH = 2       # Độ sâu cho ML agent
+ML_BATCH_SIZE = 256  # Số vị trí tối đa mỗi lần forward của model ML (1 = đánh giá từng lá)
+ML_QUANTIZATION = None  # 'int8' / 'float16': ML agent dùng file nén models/chess_model_<kiểu>.npz (tạo bằng quantize_model.py), chỉ giảm dung lượng, không nhanh hơn
+TT_SIZE_MB = 64    # Dung lượng bảng chuyển vị (MB) cho mỗi Minimax agent
+PAWN_HASH_ENTRIES = 16384  # Số mục của bảng băm cấu trúc Tốt (lũy thừa của 2)
+MINIMAX_TIME_LIMIT = 5.0   # Thời gian tối đa mỗi nước khi chơi với người (giây)
+DATA_NODE_LIMIT = 20000    # Số node tối đa mỗi nước khi tự chơi tạo dữ liệu
+OPENING_BOOK_MAX_PLY = 16  # Chỉ dùng sách khai cuộc trong 16 nửa nước đầu
 
 # Giá trị quân cờ
 PIECE_VALUES = {
@@ -109,4 +116,6 @@ KING_END_GAME_TABLE = [
 
 # Đường dẫn model ML
 ML_MODEL_PATH = "models/chess_model.h5"
+OPENING_BOOK_PATH = "models/opening_book.bin"  # Sách khai cuộc Polyglot (tạo bằng build_book.py)
+BITBASE_DIR = "models/bitbases"  # Bitbase tàn cuộc KPK/KRK/KQK (tạo bằng build_bitbases.py)
 TRAINING_DATA_PATH = "data/chess_data.csv"
@@ -0,0 +1,75 @@
+"""
+Script xuất model Keras (.h5) ra file .npz cho NumpyModel (gộp BatchNormalization)
+Cần TensorFlow khi chạy script này; sau đó ML Agent chạy được mà không cần TensorFlow
+"""
+import os
+import random
+import time
+
+import chess
+import numpy as np
+
+from agents.numpy_model import NumpyModel, convert_h5
+from config import ML_MODEL_PATH
+from utils import boards_to_tensor_batch
+
+
+def sample_positions(count, seed=0):
+    """Các vị trí ngẫu nhiên (đi ngẫu nhiên từ vị trí ban đầu) để so sánh hai model"""
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = chess.Board()
+        for _ in range(rng.randint(0, 80)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        boards.append(board)
+    return boards_to_tensor_batch(boards)
+
+
+def compare_models(keras_model, numpy_model, tensors, batch_size=256):
+    """
+    So sánh đầu ra (normalized) và tốc độ của model Keras với NumpyModel
+
+    Returns:
+        Sai lệch tuyệt đối lớn nhất
+    """
+    start = time.perf_counter()
+    expected = keras_model.predict(tensors, batch_size=batch_size, verbose=0).reshape(-1)
+    keras_time = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = numpy_model.predict(tensors, batch_size=batch_size).reshape(-1)
+    numpy_time = time.perf_counter() - start
+
+    max_error = float(np.abs(expected - actual).max())
+    print(f"  Sai lệch lớn nhất: {max_error:.2e}, trung bình: {np.abs(expected - actual).mean():.2e}")
+    print(f"  Keras: {len(tensors) / keras_time:8,.0f} vị trí/giây")
+    print(f"  NumPy: {len(tensors) / numpy_time:8,.0f} vị trí/giây")
+    return max_error
+
+
+def main():
+    """Hàm main"""
+    print("=" * 60)
+    print("XUẤT MODEL KERAS -> NUMPY (.npz)")
+    print("=" * 60)
+
+    h5_path = input(f"\nFile model Keras ({ML_MODEL_PATH}): ").strip() or ML_MODEL_PATH
+    default_npz = os.path.splitext(h5_path)[0] + '.npz'
+    npz_path = input(f"File đầu ra ({default_npz}): ").strip() or default_npz
+
+    keras_model = convert_h5(h5_path, npz_path)
+    print(f"\n✓ Đã xuất {npz_path} ({os.path.getsize(npz_path) / 1024 / 1024:.1f} MB)")
+
+    print("\nSo sánh với Keras trên 1000 vị trí ngẫu nhiên:")
+    max_error = compare_models(keras_model, NumpyModel(npz_path), sample_positions(1000))
+    if max_error < 1e-3:
+        print("✓ Kết quả khớp với Keras")
+    else:
+        print("⚠ Sai lệch lớn hơn 1e-3, kiểm tra lại kiến trúc model")
+
+
+if __name__ == "__main__":
+    main()
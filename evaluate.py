@@ -27,6 +27,11 @@ def play_game(white_agent, black_agent, max_moves=200, verbose=False):
     board = chess.Board()
     move_count = 0
     
+    # Xóa dữ liệu của ván trước (bảng chuyển vị...)
+    white_agent.new_game()
+    if black_agent is not white_agent:
+        black_agent.new_game()
+    
     while not board.is_game_over() and move_count < max_moves:
         # Lấy agent hiện tại
         if board.turn == chess.WHITE:
@@ -5,11 +5,12 @@ Chạy Minimax tự chơi với chính nó và lưu các trạng thái + điểm
 import chess
 import csv
 from agents.minimax_agent import MinimaxAgent
+from config import DATA_NODE_LIMIT
 from tqdm import tqdm
 import random
 
 
-def generate_game_data(num_games=100, depth=2, save_interval=100):
+def generate_game_data(num_games=100, depth=2, save_interval=100, node_limit=DATA_NODE_LIMIT):
     """
     Tạo dữ liệu từ các ván cờ tự chơi (tối ưu cho số lượng lớn)
     
@@ -17,12 +18,13 @@ def generate_game_data(num_games=100, depth=2, save_interval=100):
         num_games: Số ván cờ
         depth: Độ sâu minimax (khuyến nghị: 2 cho cân bằng tốc độ/chất lượng)
         save_interval: Lưu file sau mỗi N games (để tránh mất dữ liệu)
+        node_limit: Số node tối đa mỗi nước (chi phí mỗi nước cố định), None = không giới hạn
     
     Returns:
         List of (fen, score) tuples
     """
     data = []
-    agent = MinimaxAgent(depth=depth)
+    agent = MinimaxAgent(depth=depth, node_limit=node_limit)
     
     print(f"Tạo dữ liệu từ {num_games} ván cờ (depth={depth})...")
     print(f"Dự kiến: ~{num_games * 40} positions, thời gian: ~{num_games * 30 / 3600:.1f} giờ")
@@ -30,6 +32,7 @@ def generate_game_data(num_games=100, depth=2, save_interval=100):
     
     for game_num in tqdm(range(num_games), desc="Generating games"):
         board = chess.Board()
+        agent.new_game()
         move_count = 0
         max_moves = 150
         
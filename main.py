@@ -9,12 +9,18 @@ from game_ui import ChessUI
 from agents.random_agent import RandomAgent
 from agents.minimax_agent import MinimaxAgent
 from agents.ml_agent import MLAgent
+from config import MINIMAX_TIME_LIMIT
+
+
+def print_iteration(iteration):
+    """In kết quả từng iteration của Minimax (callback on_iteration)"""
+    print(f"    {iteration}")
 
 
 class ChessGame:
     """Lớp quản lý game"""
     
-    def __init__(self, white_agent=None, black_agent=None, human_player=None):
+    def __init__(self, white_agent=None, black_agent=None, human_player=None, ponder=True):
         """
         Khởi tạo game
         
@@ -22,6 +28,7 @@ class ChessGame:
             white_agent: Agent chơi quân trắng (None = người chơi)
             black_agent: Agent chơi quân đen (None = người chơi)
             human_player: 'white', 'black', hoặc None (AI vs AI)
+            ponder: AI suy nghĩ trong lượt người chơi (nếu agent hỗ trợ)
         """
         self.board = chess.Board()
         self.ui = ChessUI()
@@ -32,6 +39,8 @@ class ChessGame:
         self.game_over = False
         self.result_text = ""
         self.waiting_for_start = True  # Đợi 3s trước khi bắt đầu
+        self.ponder = ponder
+        self.clock = pygame.time.Clock()
         
     def get_current_agent(self):
         """Lấy agent hiện tại"""
@@ -61,14 +70,36 @@ class ChessGame:
             print(f"\n{agent.name} is thinking...")
             
             # KHÔNG lưu FEN của AI (chỉ lưu nước người chơi)
+            start = time.perf_counter()
             move = agent.get_move(self.board)
+            elapsed = time.perf_counter() - start
             if move:
                 self.board.push(move)
                 self.last_move = move
                 
                 print(f"  → Move: {move.uci()}")
                 stats = agent.get_stats()
-                print(f"  → Nodes searched: {stats['nodes_searched']}")
+                if hasattr(stats, 'summary') and stats.iterations:
+                    for line in stats.summary():
+                        print(f"  → {line}")
+                else:
+                    print(f"  → Nodes searched: {stats['nodes_searched']}")
+                if getattr(agent, 'book_hit', False):
+                    print(f"  → Time: {elapsed:.2f}s (opening book)")
+                elif getattr(agent, 'ponder_hit', False):
+                    print(f"  → Time: {elapsed:.2f}s (ponder hit)")
+                else:
+                    print(f"  → Time: {elapsed:.2f}s")
+                
+                # Suy nghĩ tiếp trong lượt người chơi
+                if self.ponder and self.is_human_turn() and hasattr(agent, 'start_pondering'):
+                    agent.start_pondering(self.board)
+    
+    def stop_pondering(self):
+        """Dừng pondering của các agent (khi undo / reset / thoát)"""
+        for agent in (self.white_agent, self.black_agent):
+            if agent and hasattr(agent, 'stop_pondering'):
+                agent.stop_pondering()
     
     def check_game_over(self):
         """Kiểm tra game kết thúc (ENGLISH messages)"""
@@ -92,6 +123,9 @@ class ChessGame:
     def reset(self):
         """Reset game"""
         self.board.reset()
+        for agent in (self.white_agent, self.black_agent):
+            if agent:
+                agent.new_game()
         self.last_move = None
         self.game_over = False
         self.result_text = ""
@@ -140,6 +174,7 @@ class ChessGame:
                         if not self.ui.is_paused and self.ui.can_undo():
                             fen = self.ui.get_undo_state()
                             if fen:
+                                self.stop_pondering()
                                 self.board.set_fen(fen)
                                 self.last_move = None
                                 print("\n↶ Undo: Moved back 2 moves")
@@ -176,6 +211,9 @@ class ChessGame:
             # AI di chuyển (nếu không phải lượt người)
             if not self.game_over and not self.is_human_turn():
                 self.make_ai_move()
+            elif self.ponder and self.human_player:
+                # Lượt người chơi: giới hạn FPS để nhường CPU cho thread pondering
+                self.clock.tick(30)
             
             # Kiểm tra kết thúc
             self.check_game_over()
@@ -193,6 +231,7 @@ class ChessGame:
             
             self.ui.update()
         
+        self.stop_pondering()
         self.ui.quit()
 
 
@@ -217,18 +256,18 @@ def main():
     
     if choice == '1':
         human_player = 'white'
-        black_agent = MinimaxAgent(depth=3)
+        black_agent = MinimaxAgent(depth=3, time_limit=MINIMAX_TIME_LIMIT, on_iteration=print_iteration)
     elif choice == '2':
         human_player = 'white'
         black_agent = RandomAgent()
     elif choice == '3':
-        white_agent = MinimaxAgent(depth=3)
+        white_agent = MinimaxAgent(depth=3, time_limit=MINIMAX_TIME_LIMIT, on_iteration=print_iteration)
         black_agent = RandomAgent()
     elif choice == '4':
         white_agent = MLAgent()
         black_agent = RandomAgent()
     elif choice == '5':
-        white_agent = MinimaxAgent(depth=3)
+        white_agent = MinimaxAgent(depth=3, time_limit=MINIMAX_TIME_LIMIT, on_iteration=print_iteration)
         black_agent = MLAgent()
     elif choice == '6':
         human_player = 'white'
@@ -0,0 +1,142 @@
+"""
+Script lượng tử hóa model NumPy (.npz) sang int8 / float16 sau training
+So sánh với model float32 trên tập validation của notebook (cùng cách chia
+train_test_split(test_size=0.2, random_state=42) trên data/chess_data.csv):
+sai lệch MAE (centipawn), kích thước file và số vị trí/giây (tải model + forward
+theo batch). Lượng tử hóa chỉ giảm dung lượng lưu trữ: kernel được giải lượng tử
+về float32 khi tải nên tốc độ forward giống model float32 (xem agents/numpy_model.py).
+"""
+import csv
+import math
+import os
+import time
+
+import numpy as np
+
+from agents.numpy_model import NumpyModel, QUANTIZATIONS, quantize_layers, quantized_path, save_npz
+from config import ML_MODEL_PATH, TRAINING_DATA_PATH
+from convert_model import sample_positions
+from utils import fens_to_tensor_batch
+
+
+def validation_indices(num_samples, test_size=0.2, random_state=42):
+    """
+    Chỉ số tập validation giống train_test_split(test_size, random_state) của sklearn
+    trong notebook: hoán vị np.random.RandomState(random_state), lấy ceil(test_size * N)
+    chỉ số đầu tiên
+    """
+    num_test = math.ceil(test_size * num_samples)
+    return np.random.RandomState(random_state).permutation(num_samples)[:num_test]
+
+
+def load_held_out(path=TRAINING_DATA_PATH, test_size=0.2, random_state=42, limit=5000):
+    """
+    Đọc tập validation mà model không được train (cùng cách chia với notebook)
+
+    Returns:
+        (tensors (N, 8, 8, 12), điểm số (N,)) hoặc None nếu không có file
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    indices = validation_indices(len(rows), test_size, random_state)[:limit]
+    rows = [rows[index] for index in indices]
+    tensors = fens_to_tensor_batch([row['fen'] for row in rows])
+    scores = np.array([float(row['score']) for row in rows], dtype=np.float32)
+    return tensors, scores
+
+
+def load_normalization(model_path):
+    """(y_mean, y_std) từ normalization_params.npy cùng thư mục với model"""
+    params_path = os.path.join(os.path.dirname(model_path), 'normalization_params.npy')
+    if os.path.exists(params_path):
+        params = np.load(params_path)
+        return float(params[0]), float(params[1])
+    return 0.0, 1000.0
+
+
+def throughput(path, tensors, batch_size=256, repeat=3):
+    """
+    Số vị trí/giây của model trong file path, tính cả thời gian tải model
+    (lấy lần nhanh nhất trong repeat lần)
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        NumpyModel(path).predict(tensors, batch_size=batch_size)
+        best = min(best, time.perf_counter() - start)
+    return len(tensors) / best
+
+
+def compare_quantized(float_path, quantization, tensors, scores=None, y_mean=0.0, y_std=1000.0):
+    """
+    Tạo model lượng tử hóa và so sánh với model float32
+
+    Args:
+        float_path: File .npz float32 (tạo bởi convert_model.py)
+        quantization: 'int8' hoặc 'float16'
+        tensors: Vị trí dùng để so sánh
+        scores: Điểm thật của các vị trí (None = chỉ so với model float32)
+        y_mean, y_std: Tham số de-normalize
+
+    Returns:
+        dict kết quả
+    """
+    float_model = NumpyModel(float_path)
+    path = quantized_path(float_path, quantization)
+    save_npz(path, quantize_layers(float_model.layers, quantization))
+    model = NumpyModel(path)
+
+    float_scores = float_model.predict(tensors).reshape(-1) * y_std + y_mean
+    quantized_scores = model.predict(tensors).reshape(-1) * y_std + y_mean
+    result = {
+        'path': path,
+        'size_ratio': os.path.getsize(float_path) / os.path.getsize(path),
+        'mae_vs_float': float(np.abs(quantized_scores - float_scores).mean()),
+        'max_vs_float': float(np.abs(quantized_scores - float_scores).max()),
+        'float_speed': throughput(float_path, tensors),
+        'quantized_speed': throughput(path, tensors),
+    }
+    if scores is not None:
+        result['mae_float'] = float(np.abs(float_scores - scores).mean())
+        result['mae_quantized'] = float(np.abs(quantized_scores - scores).mean())
+    return result
+
+
+def main():
+    """Hàm main"""
+    print("=" * 60)
+    print("LƯỢNG TỬ HÓA MODEL (INT8 / FLOAT16)")
+    print("=" * 60)
+
+    default_path = os.path.splitext(ML_MODEL_PATH)[0] + '.npz'
+    float_path = input(f"\nFile model NumPy float32 ({default_path}): ").strip() or default_path
+    print("Kiểu lượng tử hóa: 1. int8  2. float16  3. cả hai")
+    choice = input("Nhập lựa chọn (3): ").strip() or "3"
+    quantizations = {'1': ['int8'], '2': ['float16']}.get(choice, list(QUANTIZATIONS))
+
+    y_mean, y_std = load_normalization(float_path)
+    held_out = load_held_out()
+    if held_out is None:
+        print(f"⚠ Không có {TRAINING_DATA_PATH}, so sánh trên 2000 vị trí ngẫu nhiên (không có điểm thật)")
+        tensors, scores = sample_positions(2000), None
+    else:
+        tensors, scores = held_out
+        print(f"Tập validation của notebook: {len(tensors)} vị trí từ {TRAINING_DATA_PATH}")
+
+    for quantization in quantizations:
+        result = compare_quantized(float_path, quantization, tensors, scores, y_mean, y_std)
+        print(f"\n{quantization}: {result['path']} (nhỏ hơn {result['size_ratio']:.1f}x)")
+        print(f"  Sai lệch so với float32: MAE {result['mae_vs_float']:.2f} cp, "
+              f"lớn nhất {result['max_vs_float']:.2f} cp")
+        if scores is not None:
+            print(f"  MAE so với điểm thật: float32 {result['mae_float']:.2f} cp, "
+                  f"{quantization} {result['mae_quantized']:.2f} cp")
+        print(f"  Tốc độ (tải + forward): float32 {result['float_speed']:,.0f} vị trí/giây, "
+              f"{quantization} {result['quantized_speed']:,.0f} vị trí/giây "
+              f"({result['quantized_speed'] / result['float_speed']:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
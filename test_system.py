@@ -62,7 +62,7 @@ def test_agents():
         
         # Test Minimax Agent
         print("Test Minimax Agent (depth=2)...", end=" ")
-        minimax_agent = MinimaxAgent(depth=2)
+        minimax_agent = MinimaxAgent(depth=2, opening_book=None)
         move = minimax_agent.get_move(board)
         assert move is not None
         assert move in board.legal_moves
@@ -106,6 +106,9 @@ def test_utils():
             get_piece_value, 
             get_position_value, 
             fen_to_tensor,
+            board_to_tensor,
+            boards_to_tensor_batch,
+            fens_to_tensor_batch,
             is_endgame
         )
         
@@ -127,6 +130,34 @@ def test_utils():
         assert tensor.sum() == 32  # 32 quân cờ
         print("✓")
         
+        # Test board_to_tensor (bitboard) giống fen_to_tensor
+        print("Test board_to_tensor...", end=" ")
+        import random
+        rng = random.Random(5)
+        samples = []
+        for _ in range(50):
+            sample = chess.Board()
+            for _ in range(rng.randint(0, 80)):
+                moves = list(sample.legal_moves)
+                if not moves:
+                    break
+                sample.push(rng.choice(moves))
+            samples.append(sample)
+            encoded = board_to_tensor(sample)
+            assert encoded.dtype == np.float32
+            assert np.array_equal(encoded, fen_to_tensor(sample.fen()))
+        print("✓")
+        
+        # Test mã hóa theo batch giống fen_to_tensor
+        print("Test boards_to_tensor_batch / fens_to_tensor_batch...", end=" ")
+        fens = [sample.fen() for sample in samples]
+        expected = np.stack([fen_to_tensor(fen) for fen in fens])
+        for encoded in (boards_to_tensor_batch(samples), fens_to_tensor_batch(fens)):
+            assert encoded.shape == (50, 8, 8, 12) and encoded.dtype == np.float32
+            assert np.array_equal(encoded, expected)
+        assert fens_to_tensor_batch([]).shape == (0, 8, 8, 12)
+        print("✓")
+        
         # Test is_endgame
         print("Test is_endgame...", end=" ")
         assert not is_endgame(board)  # Vị trí đầu không phải endgame
@@ -155,7 +186,7 @@ def test_game_logic():
         print("\nChạy 1 ván Minimax vs Random...", end=" ")
         
         board = chess.Board()
-        white = MinimaxAgent(depth=2)
+        white = MinimaxAgent(depth=2, opening_book=None)
         black = RandomAgent()
         
         moves = 0
@@ -184,6 +215,898 @@ def test_game_logic():
         return False
 
 
+def test_incremental_state():
+    """Kiểm tra khóa Zobrist và bộ tích lũy đánh giá cập nhật tăng dần"""
+    print("\n" + "="*60)
+    print("KIỂM TRA CẬP NHẬT TĂNG DẦN (ZOBRIST, ĐÁNH GIÁ)")
+    print("="*60)
+    
+    try:
+        import random
+        import chess
+        import chess.polyglot
+        from agents import zobrist
+        from agents.minimax_agent import MinimaxAgent
+        from agents.incremental_eval import compute_accumulators
+        
+        print("\nTest khóa tăng dần qua các ván ngẫu nhiên...", end=" ")
+        agent = MinimaxAgent(depth=1, opening_book=None)
+        rng = random.Random(2024)
+        positions = 0
+        
+        # Có nhập thành, bắt tốt qua đường và phong cấp
+        start_fens = [
+            chess.STARTING_FEN,
+            "r3k2r/pPppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+            "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+        ]
+        for fen in start_fens:
+            for _ in range(10):
+                board = chess.Board(fen)
+                agent.set_root(board)
+                assert agent.hash_stack[-1] == chess.polyglot.zobrist_hash(board)
+                for _ in range(60):
+                    moves = list(board.legal_moves)
+                    if not moves:
+                        break
+                    agent.make_move(board, rng.choice(moves))
+                    assert agent.hash_stack[-1] == chess.polyglot.zobrist_hash(board)
+                    assert agent.pawn_stack[-1] == zobrist.pawn_key(board)
+                    assert agent.eval_stack[-1] == compute_accumulators(board)
+                    positions += 1
+                while board.move_stack:
+                    agent.unmake_move(board)
+                    assert agent.hash_stack[-1] == chess.polyglot.zobrist_hash(board)
+                    assert agent.pawn_stack[-1] == zobrist.pawn_key(board)
+                    assert agent.eval_stack[-1] == compute_accumulators(board)
+        print(f"✓ ({positions} positions)")
+        
+        print("Test tensor đầu vào tăng dần của ML Agent...", end=" ")
+        import numpy as np
+        from agents.ml_agent import MLAgent
+        from utils import board_to_tensor
+        ml_agent = MLAgent(depth=1, opening_book=None)
+        for fen in start_fens:
+            for _ in range(5):
+                board = chess.Board(fen)
+                ml_agent.set_root(board)
+                for _ in range(60):
+                    moves = list(board.legal_moves)
+                    if not moves:
+                        break
+                    ml_agent.make_move(board, rng.choice(moves))
+                    assert np.array_equal(ml_agent.planes, board_to_tensor(board)), board.fen()
+                while board.move_stack:
+                    ml_agent.unmake_move(board)
+                    assert np.array_equal(ml_agent.planes, board_to_tensor(board)), board.fen()
+        print("✓")
+        
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Lỗi: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_transposition_table():
+    """Kiểm tra bảng chuyển vị kích thước cố định"""
+    print("\n" + "="*60)
+    print("KIỂM TRA TRANSPOSITION TABLE")
+    print("="*60)
+    
+    try:
+        import random
+        import chess
+        from agents.transposition_table import TranspositionTable, EXACT, LOWER_BOUND
+        
+        print("\nTest store/probe...", end=" ")
+        tt = TranspositionTable(size_mb=1)
+        move = chess.Move.from_uci("e7e8q")
+        tt.store(12345, 4, -999990, LOWER_BOUND, move)
+        entry = tt.probe(12345)
+        assert entry is not None
+        assert (entry.depth, entry.score, entry.flag, entry.best_move) == (4, -999990, LOWER_BOUND, move)
+        assert tt.probe(54321) is None
+        print("✓")
+        
+        print("Test bộ nhớ cố định...", end=" ")
+        size_before = tt.size_bytes
+        assert size_before <= 1024 * 1024
+        rng = random.Random(7)
+        for _ in range(100000):
+            tt.store(rng.getrandbits(64), rng.randint(0, 10), rng.randint(-5000, 5000), EXACT)
+        assert tt.size_bytes == size_before
+        # Mục sâu được giữ lại ở slot ưu tiên độ sâu
+        tt.store(12345, 20, 50, EXACT, move)
+        for i in range(1, 50):
+            tt.store(12345 + i * tt.num_buckets, 1, 0, EXACT)
+        assert tt.probe(12345).depth == 20
+        print(f"✓ ({size_before // 1024} KB)")
+        
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Lỗi: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_static_exchange():
+    """Kiểm tra Static Exchange Evaluation (kể cả tấn công xuyên)"""
+    print("\n" + "="*60)
+    print("KIỂM TRA STATIC EXCHANGE EVALUATION")
+    print("="*60)
+    
+    try:
+        import chess
+        from agents.see import static_exchange
+        
+        cases = [
+            ("4k3/8/8/3p4/8/8/8/3RK3 w - - 0 1", "d1d5", 100),        # Tốt không được bảo vệ
+            ("4k3/3r4/8/3p4/8/8/8/3RK3 w - - 0 1", "d1d5", -400),     # Xe đổi lấy Tốt
+            ("4k3/3r4/8/3p4/8/8/3Q4/3RK3 w - - 0 1", "d2d5", -300),   # Hậu đi trước, Xe xuyên phía sau
+            ("4k3/3r4/8/3p4/8/8/3R4/3QK3 w - - 0 1", "d2d5", 100),    # Xe đi trước, Hậu xuyên phía sau
+            ("1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1", "d3e5", -220),
+            ("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", "e5d6", 100),       # Bắt tốt qua đường
+        ]
+        
+        print()
+        for fen, uci, expected in cases:
+            board = chess.Board(fen)
+            score = static_exchange(board, chess.Move.from_uci(uci))
+            print(f"  {uci}: {score:5d} (mong đợi {expected})")
+            assert score == expected
+        print("✓ SEE đúng")
+        
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Lỗi: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_staged_move_generation():
+    """Kiểm tra bộ sinh nước theo giai đoạn: đủ mọi nước hợp lệ, không trùng lặp"""
+    print("\n" + "="*60)
+    print("KIỂM TRA SINH NƯỚC THEO GIAI ĐOẠN")
+    print("="*60)
+    
+    try:
+        import random
+        import chess
+        from agents.minimax_agent import MinimaxAgent
+        
+        print("\nTest trên các ván ngẫu nhiên...", end=" ")
+        agent = MinimaxAgent(depth=1, tt_mb=1, opening_book=None)
+        rng = random.Random(11)
+        fens = [
+            chess.STARTING_FEN,
+            "r3k2r/pPppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+            "8/2P5/8/3k4/8/8/5Kp1/8 w - - 0 1",
+        ]
+        positions = 0
+        for fen in fens:
+            board = chess.Board(fen)
+            for _ in range(40):
+                legal_moves = list(board.legal_moves)
+                if not legal_moves:
+                    break
+                # TT move và killer lấy ngẫu nhiên, có thể không hợp lệ ở vị trí này
+                tt_move = rng.choice(legal_moves + [chess.Move.from_uci("a1h8")])
+                agent.killer_moves[0] = [rng.choice(legal_moves), chess.Move.from_uci("e2e4")]
+                generated = list(agent.generate_ordered_moves(board, tt_move, 0))
+                assert len(generated) == len(set(generated))
+                assert set(generated) == set(legal_moves)
+                if tt_move in legal_moves:
+                    assert generated[0] == tt_move
+                positions += 1
+                board.push(rng.choice(legal_moves))
+        print(f"✓ ({positions} vị trí)")
+        
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Lỗi: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_terminal_detection():
+    """Kiểm tra phát hiện chiếu hết / stalemate / lặp lại trong tìm kiếm (không dùng is_game_over)"""
+    print("\n" + "="*60)
+    print("KIỂM TRA PHÁT HIỆN KẾT THÚC VÁN")
+    print("="*60)
+    
+    try:
+        import random
+        import chess
+        from agents import zobrist
+        from agents.minimax_agent import MinimaxAgent
+        
+        print("\nTest chiếu hết / stalemate...", end=" ")
+        cases = [
+            ("6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1", "d1d8"),     # Chiếu hết 1 nước
+            ("r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4", "h5f7"),
+            ("8/8/8/8/8/1qk5/8/K7 b - - 0 1", "b3b2"),              # Chiếu hết thay vì stalemate
+            ("k7/8/1Q6/8/8/8/8/6K1 b - - 0 1", None),               # Đã stalemate
+            ("R5k1/5ppp/8/8/8/8/5PPP/6K1 b - - 0 1", None),         # Đã bị chiếu hết
+        ]
+        for depth in (1, 2, 3):
+            agent = MinimaxAgent(depth=depth, tt_mb=1, opening_book=None)
+            for fen, expected in cases:
+                move = agent.get_move(chess.Board(fen))
+                assert (move.uci() if move else None) == expected, f"{fen} depth={depth}: {move}"
+        # Thắng lớn nhưng không được đi nước làm đối phương hết nước
+        board = chess.Board("k7/8/8/1Q6/8/8/8/6K1 w - - 0 1")
+        for depth in (1, 2, 3):
+            board.push(MinimaxAgent(depth=depth, tt_mb=1, opening_book=None).get_move(board))
+            assert not board.is_stalemate()
+            board.pop()
+        # Stalemate khi bên đi còn quân ngoài Vua + Tốt (Mã bị ghim) ở lá quiescence
+        board = chess.Board("k7/1n1N4/1KB5/8/8/8/8/8 b - - 0 1")
+        agent = MinimaxAgent(depth=1, tt_mb=1, opening_book=None)
+        agent.set_root(board)
+        agent._in_search = True
+        for alpha, beta in ((float('-inf'), float('inf')), (-5000, -4000)):
+            assert agent.quiescence_search(board, alpha, beta) == 0
+        print("✓")
+        
+        print("Test lặp lại bằng khóa Zobrist...", end=" ")
+        rng = random.Random(5)
+        board = chess.Board()
+        # Đi qua lại quân Mã để tạo nhiều lần lặp, xen kẽ vài nước Tốt
+        shuffles = ["g1f3", "g8f6", "f3g1", "f6g8"]
+        checked = 0
+        for step in range(60):
+            if step % 9 == 8:
+                move = rng.choice([m for m in board.legal_moves if board.piece_type_at(m.from_square) == chess.PAWN])
+            else:
+                move = chess.Move.from_uci(shuffles[step % 4])
+                if move not in board.legal_moves:
+                    move = rng.choice(list(board.legal_moves))
+            board.push(move)
+            # Gốc ở giữa lịch sử: phần trước gốc lấy từ game_keys, phần sau từ đường đi
+            for split in range(0, min(6, len(board.move_stack)) + 1):
+                root = _pop_copy(board, split)
+                game_keys = zobrist.history_keys(root)
+                path = [zobrist.compute_key(root)]
+                for tail_move in board.move_stack[len(board.move_stack) - split:]:
+                    root.push(tail_move)
+                    path.append(zobrist.compute_key(root))
+                assert zobrist.is_repetition(path, game_keys, board.halfmove_clock) == board.is_repetition(2)
+                checked += 1
+        print(f"✓ ({checked} trường hợp)")
+        
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Lỗi: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def _pop_copy(board, count):
+    """Bản sao của bàn cờ sau khi lùi `count` nước"""
+    board = board.copy()
+    for _ in range(count):
+        board.pop()
+    return board
+
+
+def test_parallel_search():
+    """Kiểm tra tìm kiếm nhiều tiến trình (Lazy SMP, song song ở gốc)"""
+    print("\n" + "="*60)
+    print("KIỂM TRA TÌM KIẾM SONG SONG")
+    print("="*60)
+    
+    try:
+        import chess
+        from agents.minimax_agent import MinimaxAgent
+        from agents.transposition_table import TranspositionTable, EXACT
+        
+        print("\nTest bảng chuyển vị dùng chung...", end=" ")
+        table = TranspositionTable(size_mb=1, shared=True)
+        other = TranspositionTable.attach(table.shared_name, table.num_buckets)
+        move = chess.Move.from_uci("g1f3")
+        table.store(987654321, 6, 42, EXACT, move)
+        entry = other.probe(987654321)
+        assert (entry.depth, entry.score, entry.best_move) == (6, 42, move)
+        other.close()
+        table.close()
+        print("✓")
+        
+        for name, options in [("Lazy SMP", {'workers': 2}), ("song song ở gốc", {'root_workers': 2})]:
+            print(f"Test get_move với 2 tiến trình ({name})...", end=" ")
+            agent = MinimaxAgent(depth=3, tt_mb=4, opening_book=None, **options)
+            try:
+                for fen in [chess.STARTING_FEN, "6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1"]:
+                    board = chess.Board(fen)
+                    move = agent.get_move(board)
+                    assert move in board.legal_moves
+                    assert agent.completed_depth >= 3
+                assert move == chess.Move.from_uci("d1d8")
+            finally:
+                agent.close()
+            print("✓")
+        
+        print("Test dừng helper Lazy SMP khi get_move có ngoại lệ...", end=" ")
+        
+        def interrupt(iteration):
+            raise KeyboardInterrupt()
+        
+        agent = MinimaxAgent(depth=4, tt_mb=4, opening_book=None, workers=2, on_iteration=interrupt)
+        try:
+            board = chess.Board()
+            try:
+                agent.get_move(board)
+                assert False, "get_move phải ném lại KeyboardInterrupt"
+            except KeyboardInterrupt:
+                pass
+            # Helper đã được dừng và kết quả đã được thu khỏi hàng đợi
+            assert agent._helpers.stop_event.is_set() and agent._helpers._results.empty()
+            agent.on_iteration = None
+            assert agent.get_move(board) in board.legal_moves
+        finally:
+            agent.close()
+        print("✓")
+        
+        print("Test node_limit và ván mới khi song song ở gốc...", end=" ")
+        agent = MinimaxAgent(depth=6, tt_mb=4, opening_book=None, root_workers=2)
+        try:
+            board = chess.Board()
+            move = agent.get_move(board, node_limit=2000)
+            assert move in board.legal_moves
+            assert agent.nodes_searched <= 2000, agent.nodes_searched
+            agent.new_game()
+            assert agent.get_move(board, node_limit=2000) in board.legal_moves
+        finally:
+            agent.close()
+        print("✓")
+        
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Lỗi: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_pondering():
+    """Kiểm tra pondering: suy nghĩ trong lượt đối thủ bằng thread nền"""
+    print("\n" + "="*60)
+    print("KIỂM TRA PONDERING")
+    print("="*60)
+    
+    try:
+        import time
+        import chess
+        from agents.minimax_agent import MinimaxAgent
+        
+        fen = "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 9"
+        
+        print("\nTest đối thủ đi đúng nước dự đoán...", end=" ")
+        agent = MinimaxAgent(depth=3, tt_mb=4, opening_book=None)
+        board = chess.Board(fen)
+        board.push(agent.get_move(board))
+        agent.start_pondering(board)
+        # Chờ pondering tìm xong depth
+        deadline = time.time() + 30
+        while agent._ponder_result is None and time.time() < deadline:
+            time.sleep(0.05)
+        predicted = agent._ponder_board.move_stack[-1]
+        board.push(predicted)
+        move = agent.get_move(board)
+        assert agent.ponder_hit and move in board.legal_moves
+        print(f"✓ (dự đoán {predicted.uci()}, trả lời {move.uci()})")
+        
+        print("Test đối thủ đi nước khác...", end=" ")
+        board.push(move)
+        agent.start_pondering(board)
+        other = next(m for m in board.legal_moves if m != agent._ponder_board.move_stack[-1])
+        board.push(other)
+        move = agent.get_move(board)
+        assert not agent.ponder_hit and move in board.legal_moves
+        assert agent._ponder_thread is None
+        print("✓")
+        
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Lỗi: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_opening_book():
+    """Kiểm tra sách khai cuộc Polyglot (ghi file, đọc qua mmap, agent dùng sách)"""
+    print("\n" + "="*60)
+    print("KIỂM TRA SÁCH KHAI CUỘC")
+    print("="*60)
+    
+    try:
+        import tempfile
+        import chess
+        from agents import zobrist
+        from agents.minimax_agent import MinimaxAgent
+        from agents.opening_book import OpeningBook, encode_move, write_book
+        
+        # Sách nhỏ: 1.e4 (trọng số 3) / 1.d4 (1), sau 1.e4 e5 2.Nf3 Nc6 3.Bc4 Bc5 là O-O
+        board = chess.Board()
+        weights = {}
+        for san, weight in (("e4", 3), ("d4", 1)):
+            weights[(zobrist.compute_key(board), encode_move(board, board.parse_san(san)))] = weight
+        for san in ("e4", "e5", "Nf3", "Nc6", "Bc4", "Bc5"):
+            board.push_san(san)
+        castling_board = board.copy()
+        castle = castling_board.parse_san("O-O")
+        weights[(zobrist.compute_key(castling_board), encode_move(castling_board, castle))] = 5
+        
+        path = os.path.join(tempfile.mkdtemp(), "book.bin")
+        
+        print("\nTest ghi và đọc entry...", end=" ")
+        assert write_book(path, weights) == 3
+        book = OpeningBook(path, seed=1)
+        assert len(book) == 3
+        start = chess.Board()
+        entries = book.entries(start)
+        assert [(move.uci(), weight) for move, weight in entries] == [("e2e4", 3), ("d2d4", 1)]
+        assert book.get_move(start, weighted_random=False) == chess.Move.from_uci("e2e4")
+        picks = {book.get_move(start).uci() for _ in range(50)}
+        assert picks == {"e2e4", "d2d4"}
+        print("✓")
+        
+        print("Test nhập thành (mã hóa Vua bắt Xe)...", end=" ")
+        assert book.get_move(castling_board) == chess.Move.from_uci("e1g1")
+        print("✓")
+        
+        print("Test giới hạn số nửa nước và vị trí ngoài sách...", end=" ")
+        book.max_ply = 4
+        assert book.get_move(castling_board) is None
+        assert book.get_move(chess.Board("8/8/8/8/8/8/4k3/4K3 w - - 0 1")) is None
+        book.close()
+        assert OpeningBook.open_if_exists(path + ".missing") is None
+        print("✓")
+        
+        print("Test agent đi nước trong sách không cần tìm kiếm...", end=" ")
+        agent = MinimaxAgent(depth=3, tt_mb=1, opening_book=path)
+        move = agent.get_move(chess.Board())
+        assert agent.book_hit and move.uci() in ("e2e4", "d2d4")
+        assert agent.get_stats()['nodes_searched'] == 0
+        board = chess.Board()
+        board.push_san("a3")
+        assert agent.get_move(board) is not None and not agent.book_hit
+        agent.close()
+        print("✓")
+        
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Lỗi: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_bitbases():
+    """Kiểm tra bitbase tàn cuộc: tạo bằng phân tích ngược, đối chiếu với python-chess"""
+    print("\n" + "="*60)
+    print("KIỂM TRA BITBASE TÀN CUỘC")
+    print("="*60)
+    
+    try:
+        import tempfile
+        import chess
+        from agents.minimax_agent import MinimaxAgent
+        from agents.bitbase import Bitbases, ENDGAMES, generate_all, verify_table
+        
+        directory = tempfile.mkdtemp()
+        print("\nTạo KQK / KRK / KPK...", end=" ")
+        counts = generate_all(directory, verbose=False)
+        bitbases = Bitbases(directory)
+        assert len(bitbases) == 3 and all(counts.values())
+        print("✓")
+        
+        print("Test đối chiếu với python-chess (chiếu hết, stalemate, 1 nước)...", end=" ")
+        for name, piece_type in ENDGAMES.items():
+            errors = verify_table(bitbases, piece_type, samples=300, seed=7)
+            assert not errors, f"{name}: {errors[:3]}"
+        print("✓")
+        
+        print("Test vị trí đã biết...", end=" ")
+        known = [
+            ("4k3/8/8/4K3/4P3/8/8/8 w - - 0 1", 1),    # Trắng giành thế đối đầu
+            ("4k3/8/8/4K3/4P3/8/8/8 b - - 0 1", 0),    # Đen giữ thế đối đầu
+            ("1k6/8/K7/P7/8/8/8/8 w - - 0 1", 0),      # Tốt cột a
+            ("8/8/8/8/8/8/1q6/K1k5 w - - 0 1", -1),    # Bị chiếu hết (quân Đen mạnh)
+            ("8/8/8/8/8/8/k7/1R2K3 b - - 0 1", 0),     # Đen bắt được Xe
+            ("k7/8/1Q6/8/8/8/8/K7 b - - 0 1", 0),      # Stalemate
+            ("8/8/8/8/8/8/4k3/4K3 w - - 0 1", None),   # Không thuộc bảng nào
+        ]
+        for fen, expected in known:
+            assert bitbases.probe(chess.Board(fen)) == expected, fen
+        bitbases.close()
+        print("✓")
+        
+        print("Test agent dùng bitbase...", end=" ")
+        agent = MinimaxAgent(depth=2, tt_mb=1, opening_book=None, bitbases=directory)
+        # Chỉ bắt Xe mới giữ được hòa
+        board = chess.Board("8/8/8/8/8/8/k7/1R2K3 b - - 0 1")
+        assert agent.get_move(board) == chess.Move.from_uci("a2b1")
+        # Thắng KQK: chiếu hết trong vòng 40 nửa nước
+        board = chess.Board("8/8/8/3k4/8/8/8/Q3K3 w - - 0 1")
+        while not board.is_game_over() and board.ply() < 40:
+            board.push(agent.get_move(board))
+        assert board.is_checkmate()
+        agent.close()
+        print("✓")
+        
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Lỗi: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_search_stats():
+    """Kiểm tra thống kê tìm kiếm (SearchStats) và callback sau mỗi iteration"""
+    print("\n" + "="*60)
+    print("KIỂM TRA THỐNG KÊ TÌM KIẾM")
+    print("="*60)
+    
+    try:
+        import chess
+        from agents.minimax_agent import MinimaxAgent
+        
+        fen = "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 9"
+        
+        print("\nTest callback và số liệu từng iteration...", end=" ")
+        reported = []
+        agent = MinimaxAgent(depth=3, tt_mb=4, opening_book=None, on_iteration=reported.append)
+        board = chess.Board(fen)
+        move = agent.get_move(board)
+        stats = agent.get_stats()
+        assert [iteration.depth for iteration in reported] == [1, 2, 3]
+        assert stats.iterations == reported and stats.depth == 3
+        assert sum(iteration.nodes for iteration in reported) == stats.nodes == agent.nodes_searched
+        assert 0 < stats.qnodes < stats.nodes
+        assert board.fen() == fen
+        print("✓")
+        
+        print("Test PV và các tỉ lệ...", end=" ")
+        assert stats.pv and stats.pv[0] == move
+        for pv_move in stats.pv:
+            assert pv_move in board.legal_moves
+            board.push(pv_move)
+        for key in ('tt_hit_rate', 'tt_cutoff_rate', 'first_move_cutoff_rate'):
+            assert 0.0 < stats[key] <= 1.0, key
+        assert stats.tt_hits <= stats.tt_probes and stats.first_move_cutoffs <= stats.beta_cutoffs
+        assert stats.branching_factor > 1.0 and stats.nps > 0
+        assert stats['nodes_searched'] == stats.nodes and stats['pv'][0] == move.uci()
+        assert len(stats.summary()) >= 3
+        print(f"✓ (fmc {stats.first_move_cutoff_rate:.0%}, ebf {stats.branching_factor:.2f})")
+        
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Lỗi: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_ml_batch():
+    """Kiểm tra đánh giá theo batch của MLAgent (model tuyến tính thay cho mạng đã train)"""
+    print("\n" + "="*60)
+    print("KIỂM TRA ĐÁNH GIÁ THEO BATCH (ML)")
+    print("="*60)
+    
+    try:
+        import chess
+        import numpy as np
+        from agents.ml_agent import MLAgent
+        
+        class LinearModel:
+            """Model nhỏ: tổng giá trị quân theo 12 kênh (đủ để kiểm tra cơ chế batch)"""
+            def __init__(self):
+                self.weights = np.array([1, 3, 3, 5, 9, 0, -1, -3, -3, -5, -9, 0], dtype=np.float32) / 10
+                self.batch_sizes = []
+            
+            def predict_on_batch(self, x):
+                self.batch_sizes.append(len(x))
+                return (x.sum(axis=(1, 2)) @ self.weights).reshape(-1, 1)
+        
+        fen = "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 9"
+        
+        print("\nTest batch cho cùng kết quả với từng lá...", end=" ")
+        results = {}
+        for batch_size in (1, 256):
+            agent = MLAgent(depth=2, opening_book=None, batch_size=batch_size)
+            agent.model = LinearModel()
+            board = chess.Board(fen)
+            move = agent.get_move(board)
+            assert board.fen() == fen
+            results[batch_size] = (move, agent.nodes_searched, agent.get_stats(), agent.model.batch_sizes)
+        assert results[1][0] == results[256][0] and results[1][1] == results[256][1]
+        assert set(results[1][3]) == {1}
+        assert max(results[256][3]) > 1
+        assert results[256][2]['model_calls'] < results[1][2]['model_calls']
+        print(f"✓ ({results[1][2]['model_calls']} -> {results[256][2]['model_calls']} lần forward)")
+        
+        print("Test chia batch theo batch_size...", end=" ")
+        agent = MLAgent(depth=1, opening_book=None, batch_size=8)
+        agent.model = LinearModel()
+        board = chess.Board()
+        agent.get_move(board)
+        assert agent.model.batch_sizes == [8, 8, 4]
+        assert agent.get_stats()['positions_evaluated'] == 20
+        print("✓")
+        
+        print("Test chiếu hết ở lá khi đánh giá theo batch...", end=" ")
+        for depth in (1, 2):
+            agent = MLAgent(depth=depth, opening_book=None)
+            agent.model = LinearModel()
+            # Bắt Xe đen được nhiều điểm model hơn, Qh5xf7# mới là chiếu hết
+            board = chess.Board("r1bqkbnr/1ppp1ppp/2n5/1r2p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQk - 0 1")
+            assert agent.get_move(board) == chess.Move.from_uci("h5f7")
+            assert not agent._in_search
+        print("✓")
+        
+        print("Test stalemate ở lá và cache sau khi đánh giá theo batch...", end=" ")
+        agent = MLAgent(depth=1, opening_book=None)
+        agent.model = LinearModel()
+        board = chess.Board("k7/1n6/1KB5/4N3/8/8/8/8 w - - 0 1")
+        stalemate = chess.Move.from_uci("e5d7")
+        agent.set_root(board)
+        agent.prefetch_children(board, list(board.legal_moves))
+        board.push(stalemate)
+        assert agent.evaluate_board(board) == 0  # Không lấy điểm model trong cache
+        agent.set_root(board)
+        agent._in_search = True
+        assert agent.negamax(board, 0, float('-inf'), float('inf')) == 0
+        agent._in_search = False
+        board.pop()
+        assert agent.get_move(board) != stalemate
+        print("✓")
+        
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Lỗi: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_numpy_model():
+    """Kiểm tra model NumPy: gộp BatchNormalization và convolution im2col"""
+    print("\n" + "="*60)
+    print("KIỂM TRA MODEL NUMPY")
+    print("="*60)
+    
+    try:
+        import tempfile
+        import chess
+        import numpy as np
+        from agents.numpy_model import NumpyModel, fold_layers, save_npz, quantize_layers, quantized_path
+        from agents.ml_agent import MLAgent
+        
+        # Model cùng kiến trúc với notebook, trọng số ngẫu nhiên
+        rng = np.random.default_rng(0)
+        layers = []
+        channels = 12
+        for filters in (32, 64, 128, 128):
+            layers.append({'type': 'conv', 'kernel': rng.normal(0, (4.5 * channels) ** -0.5, (3, 3, channels, filters)),
+                           'bias': rng.normal(0, 0.1, filters), 'activation': 'relu', 'padding': 'same'})
+            layers.append({'type': 'batchnorm', 'gamma': rng.uniform(0.5, 1.5, filters),
+                           'beta': rng.normal(0, 0.3, filters), 'mean': rng.normal(0, 0.3, filters),
+                           'variance': rng.uniform(0.5, 2.0, filters), 'epsilon': 1e-3})
+            channels = filters
+        layers.append({'type': 'flatten'})
+        for inputs, units in ((8 * 8 * 128, 256), (256, 128), (128, 1)):
+            layers.append({'type': 'dense', 'kernel': rng.normal(0, inputs ** -0.5, (inputs, units)),
+                           'bias': rng.normal(0, 0.1, units),
+                           'activation': 'relu' if units > 1 else 'linear'})
+            if units > 1:
+                layers.append({'type': 'dropout'})
+        
+        def reference(x):
+            """Forward trực tiếp (BN riêng, conv bằng cách dịch bàn cờ) để so sánh"""
+            for layer in layers:
+                if layer['type'] == 'conv':
+                    padded = np.pad(x, ((0, 0), (1, 1), (1, 1), (0, 0)))
+                    x = sum(padded[:, dy:dy + 8, dx:dx + 8] @ layer['kernel'][dy, dx]
+                            for dy in range(3) for dx in range(3))
+                    x = np.maximum(x + layer['bias'], 0)
+                elif layer['type'] == 'batchnorm':
+                    x = ((x - layer['mean']) / np.sqrt(layer['variance'] + layer['epsilon'])
+                         * layer['gamma'] + layer['beta'])
+                elif layer['type'] == 'flatten':
+                    x = x.reshape(len(x), -1)
+                elif layer['type'] == 'dense':
+                    x = x @ layer['kernel'] + layer['bias']
+                    if layer['activation'] == 'relu':
+                        x = np.maximum(x, 0)
+            return x
+        
+        print("\nTest gộp BatchNormalization (kể cả ô sát biên)...", end=" ")
+        x = (rng.random((16, 8, 8, 12)) < 0.1).astype(np.float32)
+        folded = fold_layers(layers)
+        assert [layer['type'] for layer in folded] == ['conv'] * 4 + ['dense'] * 3
+        assert folded[1]['bias'].shape == (8, 8, 64)
+        expected = reference(x.astype(np.float64))
+        actual = NumpyModel(layers=folded).predict_on_batch(x)
+        assert actual.shape == (16, 1)
+        error = np.abs(actual - expected).max()
+        assert error < 1e-3 * max(1.0, np.abs(expected).max()), error
+        print(f"✓ (sai lệch {error:.1e})")
+        
+        print("Test lưu / tải .npz và MLAgent dùng model NumPy...", end=" ")
+        path = os.path.join(tempfile.mkdtemp(), "chess_model.npz")
+        save_npz(path, folded)
+        model = NumpyModel(path)
+        assert np.allclose(model.predict(x, batch_size=5), actual, atol=1e-5)
+        agent = MLAgent(model_path=path, depth=1, opening_book=None)
+        assert isinstance(agent.model, NumpyModel)
+        board = chess.Board()
+        assert agent.get_move(board) in board.legal_moves
+        print("✓")
+        
+        print("Test lượng tử hóa int8 / float16...", end=" ")
+        errors = {}
+        for quantization, tolerance in (('float16', 0.01), ('int8', 0.2)):
+            quantized = quantized_path(path, quantization)
+            save_npz(quantized, quantize_layers(folded, quantization))
+            assert os.path.getsize(quantized) < os.path.getsize(path)
+            agent = MLAgent(model_path=path, depth=1, opening_book=None, quantization=quantization)
+            assert agent.model.quantization == quantization
+            output = agent.model.predict_on_batch(x)
+            errors[quantization] = np.abs(output - actual).mean() / np.abs(actual).mean()
+            assert errors[quantization] < tolerance, errors
+        print(f"✓ (sai lệch tương đối int8 {errors['int8']:.1%}, float16 {errors['float16']:.2%})")
+        
+        print("Test báo cáo của quantize_model (MAE, dung lượng, tốc độ)...", end=" ")
+        from quantize_model import compare_quantized
+        result = compare_quantized(path, 'int8', x)
+        assert result['size_ratio'] > 3 and result['mae_vs_float'] >= 0
+        assert result['float_speed'] > 0 and result['quantized_speed'] > 0
+        print(f"✓ (int8 {result['quantized_speed'] / result['float_speed']:.2f}x so với float32)")
+        
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Lỗi: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_search_limits():
+    """Kiểm tra giới hạn thời gian / số node của Iterative Deepening"""
+    print("\n" + "="*60)
+    print("KIỂM TRA GIỚI HẠN TÌM KIẾM")
+    print("="*60)
+    
+    try:
+        import time
+        import chess
+        from agents.minimax_agent import MinimaxAgent
+        
+        fen = "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 9"
+        
+        print("\nTest node_limit...", end=" ")
+        agent = MinimaxAgent(depth=10, tt_mb=4, opening_book=None)
+        board = chess.Board(fen)
+        move = agent.get_move(board, node_limit=3000)
+        assert move in board.legal_moves
+        assert agent.nodes_searched <= 3000
+        assert board.fen() == fen and not board.move_stack  # Bàn cờ được khôi phục
+        print(f"✓ (depth {agent.completed_depth}, {agent.nodes_searched} nodes)")
+        
+        print("Test time_limit...", end=" ")
+        agent = MinimaxAgent(depth=10, tt_mb=4, time_limit=0.5, opening_book=None)
+        start = time.perf_counter()
+        move = agent.get_move(board)
+        elapsed = time.perf_counter() - start
+        assert move in board.legal_moves
+        assert elapsed < 1.0
+        assert board.fen() == fen and not board.move_stack
+        print(f"✓ (depth {agent.completed_depth}, {elapsed:.2f}s)")
+        
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Lỗi: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+# Điểm của MinimaxAgent.evaluate_board trước khi tối ưu (phải giữ nguyên)
+REFERENCE_EVALUATIONS = [
+    ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", 0),
+    ("r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3", -40),
+    ("r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 9", -255),
+    ("8/5k2/8/3P4/8/8/5K2/8 w - - 0 1", 190),
+    ("8/8/8/4k3/8/8/8/R3K3 w Q - 0 1", 740),
+    ("6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1", 930),
+    ("r3k2r/pp3ppp/2n5/3pP3/1b1P4/2N5/PP3PPP/R3KB1R b KQkq - 0 12", 20),
+    ("2r3k1/1p3ppp/p7/3P4/8/1P6/P4PPP/2R3K1 b - - 0 25", 180),
+    ("4k3/8/8/8/8/8/4P3/4K3 w - - 0 1", 160),
+    ("rnbqkbnr/ppp2ppp/8/3pp3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq d6 0 3", -20),
+    ("r1b1k2r/ppppqppp/2n2n2/2b1p3/2B1P3/2NP1N2/PPP2PPP/R1BQK2R w KQkq - 1 6", -10),
+    ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", -10),
+    ("k7/8/1Q6/8/8/8/8/6K1 b - - 0 1", 0),
+    ("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", 0),
+]
+
+
+def test_evaluation():
+    """Kiểm tra hàm đánh giá cho kết quả giống phiên bản gốc"""
+    print("\n" + "="*60)
+    print("KIỂM TRA HÀM ĐÁNH GIÁ")
+    print("="*60)
+    
+    try:
+        import chess
+        from agents.minimax_agent import MinimaxAgent
+        
+        print("\nTest evaluate_board với điểm tham chiếu...", end=" ")
+        agent = MinimaxAgent(depth=1, tt_mb=1, mobility='legal', opening_book=None)
+        for fen, expected in REFERENCE_EVALUATIONS:
+            score = agent.evaluate_board(chess.Board(fen))
+            assert score == expected, f"{fen}: {score} != {expected}"
+        print(f"✓ ({len(REFERENCE_EVALUATIONS)} positions)")
+        
+        print("Test đánh giá trong cây tìm kiếm (tăng dần)...", end=" ")
+        for fen, expected in REFERENCE_EVALUATIONS:
+            board = chess.Board(fen)
+            # Trong cây tìm kiếm, chiếu hết / stalemate do negamax / quiescence phát hiện
+            if board.is_checkmate() or board.is_stalemate():
+                continue
+            agent.set_root(board)
+            agent._in_search = True
+            try:
+                score = agent.evaluate_board(board)
+            finally:
+                agent._in_search = False
+            assert score == expected, f"{fen}: {score} != {expected}"
+        print("✓")
+        
+        print("Test bảng băm Tốt...", end=" ")
+        # Lần đánh giá thứ hai lấy điểm Tốt từ bảng; kết quả phải giống khi không có bảng
+        no_hash = MinimaxAgent(depth=1, tt_mb=1, mobility='legal', opening_book=None,
+                               pawn_hash_entries=0)
+        for fen, expected in REFERENCE_EVALUATIONS:
+            board = chess.Board(fen)
+            assert agent.evaluate_board(board) == expected
+            assert no_hash.evaluate_board(board) == expected
+        searcher = MinimaxAgent(depth=3, tt_mb=4, opening_book=None)
+        searcher.get_move(chess.Board(
+            "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 9"))
+        stats = searcher.get_stats()
+        assert stats['pawn_hash_probes'] > 0 and stats['pawn_hash_hit_rate'] > 0.5
+        print(f"✓ (tỉ lệ trúng {stats['pawn_hash_hit_rate']:.0%})")
+        
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Lỗi: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def test_files():
     """Kiểm tra các file cần thiết"""
     print("\n" + "="*60)
@@ -254,6 +1177,48 @@ def main():
     # Test game logic
     results.append(("Game logic", test_game_logic()))
     
+    # Test incremental updates
+    results.append(("Cập nhật tăng dần", test_incremental_state()))
+    
+    # Test evaluation
+    results.append(("Hàm đánh giá", test_evaluation()))
+    
+    # Test transposition table
+    results.append(("Transposition table", test_transposition_table()))
+    
+    # Test SEE
+    results.append(("Static exchange", test_static_exchange()))
+    
+    # Test staged move generation
+    results.append(("Sinh nước theo giai đoạn", test_staged_move_generation()))
+    
+    # Test terminal detection
+    results.append(("Kết thúc ván", test_terminal_detection()))
+    
+    # Test parallel search
+    results.append(("Tìm kiếm song song", test_parallel_search()))
+    
+    # Test pondering
+    results.append(("Pondering", test_pondering()))
+    
+    # Test opening book
+    results.append(("Sách khai cuộc", test_opening_book()))
+    
+    # Test endgame bitbases
+    results.append(("Bitbase tàn cuộc", test_bitbases()))
+    
+    # Test search statistics
+    results.append(("Thống kê tìm kiếm", test_search_stats()))
+    
+    # Test batched ML evaluation
+    results.append(("Đánh giá theo batch (ML)", test_ml_batch()))
+    
+    # Test NumPy model
+    results.append(("Model NumPy", test_numpy_model()))
+    
+    # Test search limits
+    results.append(("Giới hạn tìm kiếm", test_search_limits()))
+    
     # Summary
     print("\n" + "="*60)
     print("TỔNG KẾT")
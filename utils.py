@@ -74,6 +74,22 @@ def is_endgame(board):
     return total_material < 1300
 
 
+def castling_squares(move):
+    """
+    Các ô liên quan của nước nhập thành (chuẩn hoặc dạng Vua bắt Xe)
+    
+    Args:
+        move: Nước nhập thành (board.is_castling(move) == True)
+    
+    Returns:
+        (ô đích của Vua, ô đi của Xe, ô đích của Xe)
+    """
+    rank_base = move.from_square & ~7
+    if (move.to_square & 7) > (move.from_square & 7):
+        return rank_base + 6, rank_base + 7, rank_base + 5  # Cánh Vua
+    return rank_base + 2, rank_base, rank_base + 3          # Cánh Hậu
+
+
 def fen_to_tensor(fen):
     """
     Chuyển FEN string thành tensor 3D (8x8x12)
@@ -114,6 +130,92 @@ def fen_to_tensor(fen):
     return tensor
 
 
+def board_to_tensor(board):
+    """
+    Chuyển bàn cờ thành tensor (8x8x12) trực tiếp từ bitboard, kết quả giống fen_to_tensor
+    
+    Mỗi bitboard được ghi big-endian nên byte đầu tiên là hàng 8 (row 0), sau đó
+    np.unpackbits (bitorder='little') tách bit của từng byte theo cột a..h.
+    
+    Args:
+        board: chess.Board
+    
+    Returns:
+        numpy array shape (8, 8, 12)
+    """
+    masks = np.array([board.pieces_mask(piece_type, color)
+                      for color in (chess.WHITE, chess.BLACK)
+                      for piece_type in chess.PIECE_TYPES], dtype='>u8')
+    bits = np.unpackbits(masks.view(np.uint8), bitorder='little').reshape(12, 8, 8)
+    return bits.transpose(1, 2, 0).astype(np.float32, order='C')
+
+
+# Ký hiệu quân trong FEN -> chỉ số bitboard (kênh) của tensor
+FEN_PIECE_CHANNELS = {symbol: index for index, symbol in enumerate("PNBRQKpnbrqk")}
+
+
+def masks_to_tensor_batch(masks):
+    """
+    Chuyển bitboard của nhiều vị trí thành tensor bằng một lần np.unpackbits
+
+    Args:
+        masks: Mảng (N, 12) uint64 - bitboard Tốt..Vua trắng rồi Tốt..Vua đen
+
+    Returns:
+        numpy array shape (N, 8, 8, 12), float32
+    """
+    masks = np.asarray(masks, dtype='>u8').reshape(-1, 12)
+    bits = np.unpackbits(masks.view(np.uint8), axis=1, bitorder='little')
+    return bits.reshape(-1, 12, 8, 8).transpose(0, 2, 3, 1).astype(np.float32, order='C')
+
+
+def boards_to_tensor_batch(boards):
+    """
+    Chuyển nhiều bàn cờ thành tensor (N, 8, 8, 12), kết quả giống fen_to_tensor
+
+    Args:
+        boards: Danh sách chess.Board
+
+    Returns:
+        numpy array shape (N, 8, 8, 12)
+    """
+    masks = np.array([[board.pieces_mask(piece_type, color)
+                       for color in (chess.WHITE, chess.BLACK)
+                       for piece_type in chess.PIECE_TYPES]
+                      for board in boards], dtype=np.uint64)
+    return masks_to_tensor_batch(masks)
+
+
+def fens_to_tensor_batch(fens):
+    """
+    Chuyển nhiều FEN thành tensor (N, 8, 8, 12), kết quả giống fen_to_tensor
+
+    Chỉ đọc phần vị trí quân của FEN thành 12 bitboard (không tạo chess.Board,
+    không kiểm tra tính hợp lệ của vị trí).
+
+    Args:
+        fens: Danh sách FEN string
+
+    Returns:
+        numpy array shape (N, 8, 8, 12)
+    """
+    channels = FEN_PIECE_CHANNELS
+    masks = []
+    for fen in fens:
+        position = [0] * 12
+        square = 56  # a8
+        for symbol in fen.split(' ', 1)[0]:
+            if symbol == '/':
+                square -= 16
+            elif symbol <= '8':
+                square += ord(symbol) - 48
+            else:
+                position[channels[symbol]] |= 1 << square
+                square += 1
+        masks.append(position)
+    return masks_to_tensor_batch(np.array(masks, dtype=np.uint64))
+
+
 def count_material(board):
     """
     Đếm tổng giá trị quân cờ cho cả hai bên